@@ -0,0 +1,199 @@
+# ai_client.py - 타임아웃/재시도/서킷 브레이커를 갖춘 OpenAI 클라이언트
+import random
+import threading
+import time
+
+import openai
+from openai import OpenAI
+
+
+class AIClientError(Exception):
+    """AI 호출 실패 (호출 측에서 기본 응답으로 대체)"""
+
+
+class CircuitOpenError(AIClientError):
+    """서킷 브레이커가 열려 있어 호출하지 않고 즉시 실패"""
+
+
+class AIClientBusyError(AIClientError):
+    """동시 호출 한도 초과로 제한 시간 내 슬롯을 얻지 못함"""
+
+
+class CircuitBreaker:
+    """연속 실패가 임계값을 넘으면 일정 시간 동안 호출을 차단"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self):
+        """호출 가능 여부 (half-open 상태에서는 시험 호출 1건만 허용)"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class ResilientOpenAIClient:
+    """OpenAI chat completion 호출을 감싸는 복원력 계층
+
+    - 호출별 전체 제한시간(deadline): 재시도를 포함해 이 시간을 넘기지 않음
+    - 일시적 오류(타임아웃, 연결 오류, 429, 5xx)에 대해 지터가 있는 지수 백오프 재시도
+    - 서킷 브레이커: 업스트림 장애 시 즉시 실패해 기본 응답으로 대체
+    - 세마포어: 동시에 진행 중인 호출 수 제한
+    """
+
+    TRANSIENT_ERRORS = (
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
+    def __init__(self, api_key, base_url=None, timeout=15.0, deadline=30.0,
+                 max_retries=2, backoff_base=0.5, backoff_cap=4.0,
+                 max_concurrency=4, failure_threshold=5, reset_timeout=30):
+        # SDK 자체 재시도는 끄고 이 계층에서 재시도/제한시간을 관리
+        self.client = OpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=0)
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+        self._stats_lock = threading.Lock()
+        self._stats = {'calls': 0, 'successes': 0, 'failures': 0,
+                       'retries': 0, 'rejected_open': 0, 'rejected_busy': 0}
+
+    def _count(self, key):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def _backoff_delay(self, attempt, error):
+        """지터가 있는 지수 백오프 (Retry-After 헤더가 있으면 우선)"""
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_cap)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def chat_completion(self, messages, model="gpt-3.5-turbo", temperature=0.7,
+                        max_tokens=500, deadline=None, **kwargs):
+        """chat completion 호출 후 응답 텍스트 반환 (실패 시 AIClientError)"""
+        self._count('calls')
+
+        # 열린 서킷은 슬롯을 기다리지 않고 바로 실패
+        if self.breaker.state == CircuitBreaker.OPEN:
+            self._count('rejected_open')
+            raise CircuitOpenError("AI 서비스 일시 차단 중 (서킷 브레이커 열림)")
+
+        expires_at = time.monotonic() + (deadline or self.deadline)
+
+        if not self._slots.acquire(timeout=max(0.0, expires_at - time.monotonic())):
+            self._count('rejected_busy')
+            raise AIClientBusyError("AI 호출 대기열이 가득 찼습니다.")
+
+        try:
+            if not self.breaker.allow_request():
+                self._count('rejected_open')
+                raise CircuitOpenError("AI 서비스 일시 차단 중 (서킷 브레이커 열림)")
+
+            attempt = 0
+            while True:
+                remaining = expires_at - time.monotonic()
+                if remaining <= 0:
+                    self.breaker.record_failure()
+                    self._count('failures')
+                    raise AIClientError("AI 호출 제한시간 초과")
+
+                try:
+                    response = self.client.with_options(
+                        timeout=min(self.timeout, remaining)
+                    ).chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        **kwargs
+                    )
+                    content = response.choices[0].message.content
+                    self.breaker.record_success()
+                    self._count('successes')
+                    return content
+
+                except self.TRANSIENT_ERRORS as e:
+                    delay = self._backoff_delay(attempt, e)
+                    if attempt >= self.max_retries or time.monotonic() + delay >= expires_at:
+                        self.breaker.record_failure()
+                        self._count('failures')
+                        raise AIClientError(f"AI 호출 실패 (재시도 {attempt}회): {e}") from e
+                    attempt += 1
+                    self._count('retries')
+                    time.sleep(delay)
+
+                except openai.APIStatusError as e:
+                    # 4xx 요청 오류는 재시도해도 소용없지만 업스트림 자체는 정상 응답한 것
+                    self.breaker.record_success()
+                    self._count('failures')
+                    raise AIClientError(f"AI 호출 실패 ({e.status_code}): {e}") from e
+
+                except openai.OpenAIError as e:
+                    self.breaker.record_failure()
+                    self._count('failures')
+                    raise AIClientError(f"AI 호출 실패: {e}") from e
+
+                except Exception as e:
+                    # 형식이 잘못된 응답(choices 없음 등)이나 SDK 밖의 예외도 실패로 기록해야
+                    # half-open 시험 호출이 풀림 (풀리지 않으면 재시작할 때까지 모든 호출이 차단됨)
+                    self.breaker.record_failure()
+                    self._count('failures')
+                    raise AIClientError(f"AI 호출 실패 (예상하지 못한 오류): {e}") from e
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        with self._stats_lock:
+            return {**self._stats, 'circuit_state': self.breaker.state}
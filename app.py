@@ -1,18 +1,21 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, g
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 import sqlite3
 import json
 import os
+import base64
+import hashlib
 from dotenv import load_dotenv
 import pandas as pd
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 import re
+import threading
 from datetime import datetime, timedelta
-import openai
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from ai_client import ResilientOpenAIClient
 
 # Enhanced Policy Matcher 임포트
 try:
@@ -22,12 +25,32 @@ except ImportError as e:
     print(f"Enhanced Policy Matcher를 import할 수 없습니다: {e}")
     ENHANCED_MATCHER_AVAILABLE = False
 
+from semantic_cache import SemanticResponseCache
+from generation_cache import GenerationCache, LRUCache, profile_signature
+from policy_search_index import PolicyPrefixIndex
+from policy_dedup import PolicyDeduplicator
+from application_form import ApplicationFormGenerator, reason_inputs
+from job_queue import JobQueue
+from policy_recommender import PolicyRecommender, catalog_version
+from reverse_matcher import ReverseMatcher
+from storage import ConstraintError, SQLiteBackend, StorageError, VersionRepository, create_storage
+from data_archiver import DataArchiver
+from http_cache import HttpCache, conditional, version_etag
+
 # 환경변수 로드
 load_dotenv()
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-change-this')
 
+# 응답 압축 (이 크기 미만은 그대로), 정적 파일 URL에 내용 해시 추가 + 장기 캐시
+http_cache = HttpCache(
+    app,
+    min_size=int(os.getenv('COMPRESS_MIN_SIZE', 1024)),
+    gzip_level=int(os.getenv('COMPRESS_GZIP_LEVEL', 6)),
+    brotli_quality=int(os.getenv('COMPRESS_BROTLI_QUALITY', 5))
+)
+
 # Flask-Login 설정
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -37,7 +60,14 @@ login_manager.login_view = 'login'
 openai_client = None
 if os.getenv('OPENAI_API_KEY'):
     try:
-        openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        openai_client = ResilientOpenAIClient(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            base_url=os.getenv('OPENAI_BASE_URL') or None,
+            timeout=float(os.getenv('OPENAI_TIMEOUT', 15)),
+            deadline=float(os.getenv('OPENAI_DEADLINE', 30)),
+            max_retries=int(os.getenv('OPENAI_MAX_RETRIES', 2)),
+            max_concurrency=int(os.getenv('OPENAI_MAX_CONCURRENCY', 4))
+        )
         print("✅ OpenAI API 클라이언트 초기화 완료")
     except Exception as e:
         print(f"⚠️ OpenAI API 클라이언트 초기화 실패: {e}")
@@ -46,6 +76,102 @@ else:
 
 # 전역 변수로 선언
 enhanced_matcher = None
+response_cache = None
+
+# 목표별 상세 계획 AI 요청을 병렬 실행하는 스레드 풀
+detail_plan_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('DETAIL_PLAN_WORKERS', 4)),
+    thread_name_prefix='detail-plan'
+)
+
+# 사용자/프로필/로드맵/할 일/대화 저장소 (STORAGE_BACKEND=sqlite|postgres)
+storage = create_storage()
+
+# PostgreSQL 저장소면 추천/역매칭 작업도 프로필을 그쪽에서 읽음 (SQLite면 같은 파일에서 직접 조인)
+external_profile_loader = None if storage.backend.dialect == 'sqlite' else storage.profiles.load_for_matching
+
+# 알림/추천 결과는 작업 워커도 쓰는 로컬 SQLite 파일 (SQLite 저장소면 같은 파일이라 연결 하나로 함께 읽음)
+local_backend = storage.backend if storage.backend.dialect == 'sqlite' else SQLiteBackend('database/iruda.db')
+# ETag용 사용자 데이터 버전: 알림/추천은 로컬 SQLite 테이블의 트리거가 올림
+LOCAL_VERSION_SCOPES = ('notifications', 'recommendations')
+local_versions = storage.versions if local_backend is storage.backend else VersionRepository(local_backend)
+
+# 대시보드 첫 화면에 함께 넣어 보내는 최근 대화 수
+DASHBOARD_CHAT_TURNS = int(os.getenv('DASHBOARD_CHAT_TURNS', 20))
+
+# 로드맵/상세 계획 생성 결과 캐시 (프로필 서명 기준 공유)
+generation_cache = GenerationCache(
+    'database/iruda.db',
+    memory_size=int(os.getenv('GENERATION_CACHE_SIZE', 256)),
+    ttl_seconds=int(os.getenv('GENERATION_CACHE_TTL', 7 * 24 * 3600))
+)
+
+# 로드맵 템플릿 로직이 바뀌면 올려서 이전 캐시를 무효화
+ROADMAP_TEMPLATE_VERSION = 1
+
+# 사용자/프로필 조회 캐시 (요청 단위 g + 짧은 유효시간의 프로세스 캐시)
+USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 60))
+user_cache = LRUCache(max_entries=2048, ttl_seconds=USER_CACHE_TTL)
+profile_cache = LRUCache(max_entries=2048, ttl_seconds=USER_CACHE_TTL)
+
+# 정책 카탈로그 (최초 요청 시 한 번 로드)
+policy_catalog = None
+policy_catalog_by_id = {}
+policy_catalog_lock = threading.Lock()
+policy_dedup_report = None
+policy_catalog_version = None
+
+# 정책 목록 API 한 페이지 크기 및 의미적 검색 결과 캐시 (페이지 이동용)
+POLICY_PAGE_SIZE = 12
+
+# 정책 검색 결과 다양성 (MMR, 0이면 사용 안 함)
+SEARCH_DIVERSITY = float(os.getenv('SEARCH_DIVERSITY', 0.3))
+semantic_search_results = LRUCache(max_entries=256, ttl_seconds=120)
+
+# 정책 자동완성 인덱스 (최초 요청 시 한 번 생성) 및 검색 결과 캐시
+policy_search_index = None
+policy_search_index_lock = threading.Lock()
+policy_search_results = LRUCache(max_entries=1024, ttl_seconds=300)
+
+# 신청서 생성기 (최초 요청 시 카탈로그로 정책별 템플릿 생성)
+application_form_generator = None
+
+# 백그라운드 작업 큐 (작업 처리 함수는 아래에서 등록, 워커는 첫 요청 시 시작)
+# JOB_WORKERS=0 으로 두면 웹 서버에서는 등록만 하고 `python job_queue.py`로 워커를 따로 실행
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+job_queue = JobQueue(
+    'database/iruda.db',
+    poll_interval=float(os.getenv('JOB_POLL_INTERVAL', 1.0)),
+    lease_seconds=int(os.getenv('JOB_LEASE_SECONDS', 300))
+)
+
+# 사용자별 추천 정책 (프로필/카탈로그 변경 시 작업 큐에서 미리 계산해 테이블에 저장)
+policy_recommender = PolicyRecommender(
+    'database/iruda.db',
+    limit=int(os.getenv('RECOMMENDATION_LIMIT', 20)),
+    profile_loader=external_profile_loader
+)
+
+# 새 정책 -> 맞는 사용자 역매칭 (카탈로그에 정책이 추가되면 알림 저장)
+reverse_matcher = ReverseMatcher(
+    'database/iruda.db',
+    threshold=float(os.getenv('REVERSE_MATCH_THRESHOLD', 0.6)),
+    profile_loader=external_profile_loader
+)
+
+# 오래된 대화/완료한 할 일 보관 (작업 큐에서 하루 한 번, 보관 일수가 지난 달 단위로 압축 보관)
+data_archiver = DataArchiver(
+    storage,
+    chat_days=int(os.getenv('ARCHIVE_CHAT_DAYS', 180)),
+    todo_days=int(os.getenv('ARCHIVE_TODO_DAYS', 90)),
+    codec=os.getenv('ARCHIVE_CODEC', 'zlib'),
+    vacuum_pages=int(os.getenv('ARCHIVE_VACUUM_PAGES', 2000))
+)
+
+# 작업 우선순위 (숫자가 작을수록 먼저 실행)
+JOB_PRIORITY_INTERACTIVE = 1   # 사용자가 화면에서 기다리는 작업
+JOB_PRIORITY_NORMAL = 5
+JOB_PRIORITY_BATCH = 9
 
 def initialize_enhanced_matcher():
     """앱 시작 시 정책 매칭 시스템 초기화"""
@@ -60,32 +186,58 @@ def initialize_enhanced_matcher():
         print(f"Enhanced Policy Matcher 초기화 실패: {e}")
         return False
 
+def initialize_response_cache():
+    """Enhanced Matcher의 임베딩 모델을 재사용하는 채팅 응답 캐시 초기화"""
+    global response_cache
+    if not enhanced_matcher:
+        return False
+    response_cache = SemanticResponseCache(
+        enhanced_matcher.model,
+        threshold=float(os.getenv('CHAT_CACHE_THRESHOLD', 0.95)),
+        ttl_seconds=int(os.getenv('CHAT_CACHE_TTL', 3600)),
+        max_entries=int(os.getenv('CHAT_CACHE_SIZE', 500))
+    )
+    return True
+
 def get_user_profile(user_id):
-    """사용자 프로필 정보 가져오기"""
-    try:
-        conn = sqlite3.connect('database/iruda.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT housing_status, income_level, support_needs, age 
-            FROM user_profiles up
-            JOIN users u ON up.user_id = u.id
-            WHERE user_id = ?
-        ''', (user_id,))
-        profile_data = cursor.fetchone()
-        conn.close()
-        
-        if profile_data:
-            return {
-                'housing_status': profile_data[0],
-                'income_level': profile_data[1], 
-                'support_needs': json.loads(profile_data[2]) if profile_data[2] else [],
-                'age': profile_data[3]
-            }
+    """사용자 프로필 정보 가져오기 (요청/프로세스 캐시 사용)"""
+    cache_key = str(user_id)
+    
+    # 같은 요청 안에서는 한 번만 조회
+    request_profiles = g.setdefault('user_profiles', {})
+    if cache_key in request_profiles:
+        return copy_profile(request_profiles[cache_key])
+    
+    profile = profile_cache.get(cache_key)
+    if profile is None:
+        profile = fetch_user_profile(user_id)
+        if profile is not None:
+            profile_cache.put(cache_key, profile)
+    
+    request_profiles[cache_key] = profile
+    return copy_profile(profile)
+
+def copy_profile(profile):
+    """캐시된 프로필을 호출 측에서 수정해도 안전하도록 복사"""
+    if profile is None:
         return None
+    return {**profile, 'support_needs': list(profile.get('support_needs', []))}
+
+def fetch_user_profile(user_id):
+    """DB에서 사용자 프로필 조회"""
+    try:
+        return storage.profiles.get(user_id)
     except Exception as e:
         print(f"사용자 프로필 조회 실패: {e}")
         return None
 
+def invalidate_user_cache(user_id):
+    """사용자 정보/프로필 변경 시 캐시 삭제"""
+    cache_key = str(user_id)
+    user_cache.pop(cache_key)
+    profile_cache.pop(cache_key)
+    g.pop('user_profiles', None)
+
 def apply_keyword_filter(policies, search_query):
     """기존 키워드 필터링 (fallback용)"""
     return [
@@ -111,14 +263,16 @@ class User(UserMixin):
 
 @login_manager.user_loader
 def load_user(user_id):
-    conn = sqlite3.connect('database/iruda.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT id, email, name FROM users WHERE id = ?', (user_id,))
-    user_data = cursor.fetchone()
-    conn.close()
+    # Flask-Login이 요청 단위로 결과를 보관하므로 여기서는 프로세스 캐시만 확인
+    user_data = user_cache.get(str(user_id))
+    if user_data is None:
+        user_data = storage.users.get(user_id)
+        
+        if user_data:
+            user_cache.put(str(user_id), user_data)
     
     if user_data:
-        return User(user_data[0], user_data[1], user_data[2])
+        return User(user_data['id'], user_data['email'], user_data['name'])
     return None
 
 # 정부 정책 데이터 로드 함수
@@ -145,6 +299,69 @@ def load_government_policies():
         print(f"정책 데이터 로드 실패: {e}")
         return []
 
+def make_policy_id(policy):
+    """서비스명/기관명으로 만드는 안정적인 정책 ID (카탈로그가 바뀌어도 유지)"""
+    raw = f"{policy.get('서비스명', '')}|{policy.get('기관명', '')}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:12]
+
+def get_policy_catalog():
+    """정책 카탈로그를 한 번만 로드해 유사 중복을 묶고 ID를 붙여 보관"""
+    global policy_catalog, policy_catalog_by_id, policy_dedup_report, policy_catalog_version
+    if policy_catalog is None:
+        with policy_catalog_lock:
+            if policy_catalog is None:
+                if enhanced_matcher:
+                    # 매처가 로드 시 이미 중복을 정리함 (임베딩 행과 순서 일치)
+                    catalog = enhanced_matcher.policies
+                    policy_dedup_report = enhanced_matcher.dedup_report
+                else:
+                    catalog = load_government_policies()
+                    clean_policy_values(catalog)
+                    if os.getenv('POLICY_DEDUP', '1') == '1':
+                        deduplicator = PolicyDeduplicator(threshold=float(os.getenv('POLICY_DEDUP_THRESHOLD', 0.8)))
+                        catalog, policy_dedup_report = deduplicator.deduplicate(catalog)
+                for policy in catalog:
+                    # 변형 정책도 ID로 상세 조회할 수 있도록 등록
+                    for entry in [policy] + policy.get('_variants', []):
+                        entry['_id'] = unique_policy_id(entry)
+                        policy_catalog_by_id[entry['_id']] = entry
+                sync_policy_table(expand_policy_variants(catalog))
+                policy_catalog_version = catalog_version(catalog)
+                policy_catalog = catalog
+    return policy_catalog
+
+def sync_policy_table(policies):
+    """북마크가 참조하는 정책 테이블을 카탈로그와 맞춤 (실패해도 카탈로그는 그대로 사용)"""
+    try:
+        deactivated = storage.policies.sync([
+            (policy['_id'], policy.get('서비스명', ''), policy.get('기관명', ''), policy.get('구분', ''))
+            for policy in policies
+        ])
+        if deactivated:
+            print(f"카탈로그에서 빠진 정책 {deactivated}개 비활성 처리")
+    except Exception as e:
+        print(f"정책 테이블 동기화 실패: {e}")
+
+def expand_policy_variants(catalog):
+    """대표 정책과 묶인 변형 정책을 모두 나열 (이름으로 찾는 자동완성/신청서용)"""
+    return [entry for policy in catalog for entry in [policy] + policy.get('_variants', [])]
+
+def clean_policy_values(policies):
+    """빈 셀(NaN)은 빈 문자열로 (문자열 연결/JSON 직렬화 오류 방지)"""
+    for policy in policies:
+        for key, value in policy.items():
+            if isinstance(value, float) and value != value:
+                policy[key] = ''
+
+def unique_policy_id(policy):
+    """서비스명/기관명이 완전히 같은 행은 순번을 붙여 구분"""
+    policy_id = make_policy_id(policy)
+    suffix = 2
+    while policy_id in policy_catalog_by_id:
+        policy_id = f"{make_policy_id(policy)}-{suffix}"
+        suffix += 1
+    return policy_id
+
 # 홈페이지
 @app.route('/')
 def home():
@@ -169,32 +386,17 @@ def register():
     support_needs = data.getlist('support_needs')
     
     try:
-        conn = sqlite3.connect('database/iruda.db')
-        cursor = conn.cursor()
-        
-        # 사용자 생성
-        password_hash = generate_password_hash(password)
-        cursor.execute('''
-            INSERT INTO users (name, email, password_hash, age) 
-            VALUES (?, ?, ?, ?)
-        ''', (name, email, password_hash, age))
-        
-        user_id = cursor.lastrowid
-        
-        # 프로필 정보 저장
-        cursor.execute('''
-            INSERT INTO user_profiles 
-            (user_id, housing_status, income_level, support_needs)
-            VALUES (?, ?, ?, ?)
-        ''', (user_id, housing_status, income_level, json.dumps(support_needs)))
-        
-        conn.commit()
-        conn.close()
+        # 사용자와 프로필을 한 트랜잭션으로 생성
+        storage.users.create(name, email, generate_password_hash(password), age, {
+            'housing_status': housing_status,
+            'income_level': income_level,
+            'support_needs': support_needs
+        })
         
         flash('회원가입이 완료되었습니다!', 'success')
         return redirect(url_for('login'))
         
-    except sqlite3.IntegrityError:
+    except ConstraintError:
         flash('이미 존재하는 이메일입니다.', 'error')
         return render_template('register.html')
 
@@ -207,14 +409,10 @@ def login():
     email = request.form.get('email')
     password = request.form.get('password')
     
-    conn = sqlite3.connect('database/iruda.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT id, email, name, password_hash FROM users WHERE email = ?', (email,))
-    user_data = cursor.fetchone()
-    conn.close()
+    user_data = storage.users.find_by_email(email)
     
-    if user_data and check_password_hash(user_data[3], password):
-        user = User(user_data[0], user_data[1], user_data[2])
+    if user_data and check_password_hash(user_data['password_hash'], password):
+        user = User(user_data['id'], user_data['email'], user_data['name'])
         login_user(user)
         return redirect(url_for('dashboard'))
     else:
@@ -229,6 +427,15 @@ def call_openai_api(message, conversation_history=None):
     if not openai_client:
         return generate_mock_response(message)
     
+    # 반복되는 일반 질문은 캐시된 응답 사용
+    if response_cache:
+        try:
+            cached_response = response_cache.get(message, conversation_history)
+            if cached_response:
+                return cached_response
+        except Exception as e:
+            print(f"응답 캐시 조회 실패: {e}")
+    
     try:
         # 시스템 메시지 설정
         system_message = {
@@ -253,14 +460,20 @@ def call_openai_api(message, conversation_history=None):
         
         messages.append({"role": "user", "content": message})
         
-        response = openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        ai_response = openai_client.chat_completion(
             messages=messages,
+            model="gpt-3.5-turbo",
             temperature=0.7,
             max_tokens=500
         )
         
-        return response.choices[0].message.content
+        if response_cache:
+            try:
+                response_cache.put(message, ai_response, conversation_history)
+            except Exception as e:
+                print(f"응답 캐시 저장 실패: {e}")
+        
+        return ai_response
         
     except Exception as e:
         print(f"OpenAI API 호출 실패: {e}")
@@ -279,6 +492,12 @@ def chat():
         ai_response = call_openai_api(message, conversation_history)
         suggestion = check_for_page_suggestion(message)
         
+        # 대화 기록 저장 (실패해도 응답은 그대로 반환)
+        try:
+            storage.chat.add(current_user.id, message, ai_response)
+        except Exception as e:
+            print(f"대화 기록 저장 실패: {e}")
+        
         return jsonify({
             'success': True,
             'response': ai_response,
@@ -288,6 +507,28 @@ def chat():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+# 이전 대화 기록 API (최근 대화가 모자라면 보관된 대화까지 이어서 조회)
+@app.route('/chat/history')
+@login_required
+def chat_history():
+    try:
+        limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+        return jsonify({'success': True, 'history': storage.chat.recent(current_user.id, limit)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+# 채팅 응답 캐시 통계 API
+@app.route('/chat/cache-stats')
+@login_required
+def chat_cache_stats():
+    if not response_cache:
+        return jsonify({'success': False, 'error': '응답 캐시가 비활성화되어 있습니다.'})
+    return jsonify({
+        'success': True,
+        'stats': response_cache.stats(),
+        'openai': openai_client.stats() if openai_client else None
+    })
+
 def generate_mock_response(message):
     """OpenAI 대신 사용할 임시 응답 생성기 (개선된 버전)"""
     message_lower = message.lower()
@@ -342,77 +583,149 @@ def check_for_page_suggestion(message):
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    # 사용자 로드맵 조회
-    conn = sqlite3.connect('database/iruda.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT title, description, priority_areas, timeline 
-        FROM roadmaps WHERE user_id = ? ORDER BY created_at DESC LIMIT 1
-    ''', (current_user.id,))
-    roadmap_data = cursor.fetchone()
-    conn.close()
-    
-    roadmap = None
-    if roadmap_data:
+    # 통계/알림/최근 대화/로드맵 요약을 한 번에 조회해 페이지에 넣음 (실패하면 화면에서 각 API로 다시 조회)
+    try:
+        bootstrap = build_dashboard_bootstrap(current_user.id)
+    except Exception as e:
+        print(f"대시보드 초기 데이터 조회 실패: {e}")
+        bootstrap = None
+    return render_template('dashboard.html', bootstrap=bootstrap)
+
+def read_user_alerts(session, user_id):
+    """로컬 SQLite의 추천 정책 개수와 읽지 않은 새 맞춤 정책 알림 (역매칭 작업이 저장)"""
+    recommendation_row = session.execute(
+        'SELECT policy_count FROM recommendation_state WHERE user_id = ?', (user_id,)
+    ).fetchone()
+    policy_alerts = session.execute('''
+        SELECT id, title, message, created_at FROM notifications
+        WHERE user_id = ? AND type = 'policy' AND is_read = 0
+        ORDER BY created_at DESC
+    ''', (user_id,)).fetchall()
+    return (recommendation_row[0] if recommendation_row else 0), policy_alerts
+
+def build_dashboard_stats(summary, recommended_policies):
+    return {
+        'active_tasks': summary['total'] - summary['completed'],
+        'completed_tasks': summary['completed'],
+        'due_today': summary['due_today'],
+        'overdue_tasks': summary['overdue'],
+        'recommended_policies': recommended_policies
+    }
+
+def build_notifications(open_todos, policy_alerts, today):
+    """3일 뒤까지 마감인 미완료 할 일을 연체 / 오늘 마감 / 곧 마감으로 나누고 정책 알림을 덧붙임"""
+    overdue = [todo for todo in open_todos if todo['due_date'] < today]
+    due_today = [todo for todo in open_todos if todo['due_date'] == today]
+    upcoming = [todo for todo in open_todos if todo['due_date'] > today]
+
+    notifications = []
+    for todo in overdue:
+        notifications.append({
+            'id': todo['id'],
+            'title': todo['title'],
+            'message': f"마감일이 지난 할일: {todo['title']}",
+            'type': 'error',
+            'due_date': todo['due_date']
+        })
+    for todo in due_today:
+        notifications.append({
+            'id': todo['id'],
+            'title': todo['title'],
+            'message': f"오늘 마감: {todo['title']}",
+            'type': 'warning',
+            'due_date': todo['due_date']
+        })
+    for todo in upcoming:
+        notifications.append({
+            'id': todo['id'],
+            'title': todo['title'],
+            'message': f"곧 마감: {todo['title']} ({todo['due_date']})",
+            'type': 'info',
+            'due_date': todo['due_date']
+        })
+    for alert in policy_alerts:
+        notifications.append({
+            'id': alert[0],
+            'title': alert[1],
+            'message': alert[2],
+            'type': 'policy',
+            'created_at': alert[3]
+        })
+
+    return {
+        'notifications': notifications,
+        'counts': {
+            'overdue': len(overdue),
+            'due_today': len(due_today),
+            'upcoming': len(upcoming),
+            'policy': len(policy_alerts)
+        }
+    }
+
+def build_dashboard_bootstrap(user_id):
+    """대시보드 첫 화면 데이터 {stats, notifications, chat_history, roadmap}
+
+    /dashboard-stats, /notifications, /chat/history 세 요청을 따로 보내는 대신 읽기 트랜잭션 하나(연결 하나)로 조회
+    """
+    now = datetime.now()
+    today = now.strftime('%Y-%m-%d')
+    horizon = (now + timedelta(days=4)).strftime('%Y-%m-%d')
+    with storage.snapshot() as session:
+        summary = storage.todos.summary(user_id, today, session=session)
+        open_todos = storage.todos.open_due_before(user_id, horizon, session=session)
+        chat_history = storage.chat.recent(user_id, DASHBOARD_CHAT_TURNS, session=session)
+        roadmap = storage.roadmaps.latest(user_id, session=session)
+        roadmap_summary = storage.todos.summary(user_id, today, roadmap['id'], session=session) if roadmap else None
+        if local_backend is storage.backend:
+            recommended_policies, policy_alerts = read_user_alerts(session, user_id)
+    if local_backend is not storage.backend:
+        with local_backend.session() as local_session:
+            recommended_policies, policy_alerts = read_user_alerts(local_session, user_id)
+
+    if roadmap:
         roadmap = {
-            'title': roadmap_data[0],
-            'description': roadmap_data[1],
-            'priority_areas': json.loads(roadmap_data[2]) if roadmap_data[2] else [],
-            'timeline': json.loads(roadmap_data[3]) if roadmap_data[3] else {}
+            'id': roadmap['id'],
+            'title': roadmap['title'],
+            'total': roadmap_summary['total'],
+            'completed': roadmap_summary['completed'],
+            'progress': round(roadmap_summary['completed'] / roadmap_summary['total'] * 100) if roadmap_summary['total'] else 0
         }
-    
-    return render_template('dashboard.html', roadmap=roadmap)
+    return {
+        'stats': build_dashboard_stats(summary, recommended_policies),
+        'notifications': build_notifications(open_todos, policy_alerts, today),
+        'chat_history': chat_history,
+        'roadmap': roadmap
+    }
 
 # 대시보드 통계 API
+def user_data_versions(user_id, *scopes):
+    """{범위: 버전} - 저장소(할 일/북마크/프로필)와 로컬 SQLite(알림/추천)가 같은 파일이면 한 번에 조회"""
+    if local_versions is storage.versions:
+        return storage.versions.get(user_id, scopes)
+    versions = storage.versions.get(user_id, [scope for scope in scopes if scope not in LOCAL_VERSION_SCOPES])
+    versions.update(local_versions.get(user_id, [scope for scope in scopes if scope in LOCAL_VERSION_SCOPES]))
+    return versions
+
+def dashboard_stats_etag():
+    """할 일/추천 버전 + 날짜 (연체/오늘 마감은 날짜가 바뀌면 달라짐)"""
+    versions = user_data_versions(current_user.id, 'todos', 'recommendations')
+    return version_etag('dashboard-stats', current_user.id, datetime.now().strftime('%Y-%m-%d'),
+                        versions['todos'], versions['recommendations'])
+
 @app.route('/dashboard-stats')
 @login_required
+@conditional(dashboard_stats_etag)
 def dashboard_stats():
     try:
-        conn = sqlite3.connect('database/iruda.db')
-        cursor = conn.cursor()
-        
-        # 활성 할일 개수
-        cursor.execute('''
-            SELECT COUNT(*) FROM todos 
-            WHERE user_id = ? AND status IN ('pending', 'in_progress')
-        ''', (current_user.id,))
-        active_tasks = cursor.fetchone()[0]
-        
-        # 완료된 할일 개수
-        cursor.execute('''
-            SELECT COUNT(*) FROM todos 
-            WHERE user_id = ? AND status = 'completed'
-        ''', (current_user.id,))
-        completed_tasks = cursor.fetchone()[0]
-        
-        # 오늘 기한인 할일
-        cursor.execute('''
-            SELECT COUNT(*) FROM todos 
-            WHERE user_id = ? AND DATE(due_date) = DATE('now') AND status != 'completed'
-        ''', (current_user.id,))
-        due_today = cursor.fetchone()[0]
-        
-        # 연체된 할일
-        cursor.execute('''
-            SELECT COUNT(*) FROM todos 
-            WHERE user_id = ? AND DATE(due_date) < DATE('now') AND status != 'completed'
-        ''', (current_user.id,))
-        overdue_tasks = cursor.fetchone()[0]
-        
-        conn.close()
-        
-        return jsonify({
-            'success': True,
-            'active_tasks': active_tasks,
-            'completed_tasks': completed_tasks,
-            'due_today': due_today,
-            'overdue_tasks': overdue_tasks,
-            'recommended_policies': 3  # 임시값
-        })
+        # 할 일 개수 (SQLite는 트리거로 유지되는 요약 테이블에서 한 번에) + 추천 정책 개수 (사전 계산된 값)
+        summary = storage.todos.summary(current_user.id, datetime.now().strftime('%Y-%m-%d'))
+        with local_backend.session() as session:
+            recommended_policies, _ = read_user_alerts(session, current_user.id)
+        return jsonify({'success': True, **build_dashboard_stats(summary, recommended_policies)})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-# AI 로드맵 생성 (기존 함수 개선)
+# AI 로드맵 생성 (기존 함수 개선, async 요청이면 작업 큐로 실행)
 @app.route('/generate-roadmap', methods=['POST'])
 @login_required
 def generate_roadmap():
@@ -423,33 +736,49 @@ def generate_roadmap():
         if not user_profile:
             return jsonify({'success': False, 'error': '프로필 정보가 없습니다.'})
         
-        # OpenAI를 통한 로드맵 생성 (또는 템플릿 사용)
-        roadmap = generate_personalized_roadmap(user_profile)
-        
-        # 로드맵을 데이터베이스에 저장
-        conn = sqlite3.connect('database/iruda.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO roadmaps (user_id, title, description, priority_areas, timeline)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
-            current_user.id,
-            roadmap['title'],
-            roadmap['description'],
-            json.dumps(roadmap['priority_areas']),
-            json.dumps(roadmap['timeline'])
-        ))
-        
-        conn.commit()
-        conn.close()
+        if wants_async():
+            # 같은 사용자의 생성 작업이 이미 대기 중이면 그 작업을 그대로 반환
+            job_id = job_queue.enqueue(
+                'roadmap',
+                {'user_id': current_user.id, 'user_name': current_user.name},
+                user_id=current_user.id,
+                dedupe_key=f"roadmap:{current_user.id}"
+            )
+            return queued_job_response(job_id)
         
+        roadmap = create_user_roadmap(current_user.id, current_user.name, user_profile)
         return jsonify({'success': True, 'roadmap': roadmap})
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-def generate_personalized_roadmap(user_profile):
-    """사용자 프로필을 바탕으로 개인화된 로드맵 생성"""
+def create_user_roadmap(user_id, user_name, user_profile):
+    """로드맵 생성 후 데이터베이스에 저장"""
+    # OpenAI를 통한 로드맵 생성 (또는 템플릿 사용)
+    roadmap = generate_personalized_roadmap(user_profile, user_name)
+    storage.roadmaps.create(user_id, roadmap)
+    return roadmap
+
+def run_roadmap_job(payload):
+    """작업 큐: 로드맵 생성"""
+    user_profile = fetch_user_profile(payload['user_id'])
+    if not user_profile:
+        raise ValueError('프로필 정보가 없습니다.')
+    return {'roadmap': create_user_roadmap(payload['user_id'], payload['user_name'], user_profile)}
+
+def generate_personalized_roadmap(user_profile, user_name):
+    """사용자 프로필을 바탕으로 개인화된 로드맵 생성 (같은 프로필 서명이면 캐시 재사용)"""
+    cache_key = generation_cache.make_key(
+        'roadmap', ROADMAP_TEMPLATE_VERSION, profile_signature(user_profile)
+    )
+    roadmap = generation_cache.get_or_create(
+        'roadmap', cache_key, lambda: build_roadmap_template(user_profile)
+    )
+    roadmap['title'] = f"{user_name}님의 맞춤형 자립 로드맵"
+    return roadmap
+
+def build_roadmap_template(user_profile):
+    """프로필 서명에만 의존하는 로드맵 본문 생성"""
     # 기본 템플릿 (추후 OpenAI로 개선)
     support_needs = user_profile.get('support_needs', [])
     
@@ -471,7 +800,6 @@ def generate_personalized_roadmap(user_profile):
         timeline['1개월'] = timeline.get('1개월', []) + ['상담센터 연결', '멘토 매칭']
         
     return {
-        "title": f"{current_user.name}님의 맞춤형 자립 로드맵",
         "description": "체계적인 자립을 위한 단계별 계획입니다.",
         "priority_areas": priority_areas or ["주거 안정", "경제적 자립", "사회적 네트워크 구축"],
         "timeline": timeline or {
@@ -486,42 +814,18 @@ def generate_personalized_roadmap(user_profile):
 @login_required
 def roadmap():
     # 사용자 로드맵 조회
-    conn = sqlite3.connect('database/iruda.db')
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT id, title, description, priority_areas, timeline 
-        FROM roadmaps WHERE user_id = ? ORDER BY created_at DESC LIMIT 1
-    ''', (current_user.id,))
-    roadmap_data = cursor.fetchone()
-    
-    roadmap = None
+    roadmap = storage.roadmaps.latest(current_user.id)
     progress_percentage = 0
-    roadmap_id = None
     
-    if roadmap_data:
-        roadmap_id = roadmap_data[0]
-        roadmap = {
-            'id': roadmap_id,
-            'title': roadmap_data[1],
-            'description': roadmap_data[2],
-            'priority_areas': json.loads(roadmap_data[3]) if roadmap_data[3] else [],
-            'timeline': json.loads(roadmap_data[4]) if roadmap_data[4] else {}
-        }
-        
-        # 진행률 계산 (todos 테이블 기반)
-        cursor.execute('''
-            SELECT COUNT(*) as total, 
-                   SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed
-            FROM todos WHERE user_id = ? AND roadmap_id = ?
-        ''', (current_user.id, roadmap_id))
-        progress_data = cursor.fetchone()
-        if progress_data[0] > 0:
-            progress_percentage = int((progress_data[1] / progress_data[0]) * 100)
-    
-    conn.close()
+    if roadmap:
+        # 진행률 계산 (SQLite는 로드맵별 할 일 요약 테이블)
+        progress = storage.todos.summary(current_user.id, datetime.now().strftime('%Y-%m-%d'), roadmap['id'])
+        if progress['total'] > 0:
+            progress_percentage = int((progress['completed'] / progress['total']) * 100)
+    
     return render_template('roadmap.html', roadmap=roadmap, progress_percentage=progress_percentage)
 
-# 로드맵 상세 계획 생성 API (수정된 버전)
+# 로드맵 상세 계획 생성 API (수정된 버전, async 요청이면 작업 큐로 실행)
 @app.route('/roadmap/detail-plan', methods=['POST'])
 @login_required
 def roadmap_detail_plan():
@@ -533,56 +837,126 @@ def roadmap_detail_plan():
         if not goals:
             return jsonify({'success': False, 'error': '목표가 없습니다.'})
         
-        # 상세 계획 생성
-        if openai_client:
-            detail_plan = generate_ai_detail_plan(period, goals)
-        else:
-            detail_plan = generate_detail_plan(period, goals)
+        if wants_async():
+            job_id = job_queue.enqueue(
+                'detail_plan',
+                {'period': period, 'goals': goals},
+                user_id=current_user.id
+            )
+            return queued_job_response(job_id)
         
         return jsonify({
             'success': True,
-            'detail_plan': detail_plan
+            'detail_plan': build_detail_plan(period, goals)
         })
         
     except Exception as e:
         print(f"상세 계획 생성 오류: {e}")
         return jsonify({'success': False, 'error': str(e)})
 
+def build_detail_plan(period, goals):
+    """상세 계획 생성 (AI 사용 가능하면 AI, 아니면 기본 계획)"""
+    if openai_client:
+        return generate_ai_detail_plan(period, goals)
+    return generate_detail_plan(period, goals)
+
+def run_detail_plan_job(payload):
+    """작업 큐: 상세 계획 생성"""
+    return {'detail_plan': build_detail_plan(payload['period'], payload['goals'])}
+
 def generate_ai_detail_plan(period, goals):
-    """OpenAI를 사용한 상세 계획 생성"""
+    """OpenAI를 사용한 상세 계획 생성 (목표별 요청을 병렬로 실행)"""
+    futures = [
+        detail_plan_executor.submit(generate_ai_goal_plan, period, goal)
+        for goal in goals
+    ]
+    
+    # 목표 순서를 유지하며 결과 병합, 실패한 목표만 기본 계획으로 대체
+    detail_plan = []
+    for goal, future in zip(goals, futures):
+        try:
+            detail_plan.append(future.result())
+        except Exception as e:
+            print(f"AI 상세 계획 생성 실패 ({goal}): {e}")
+            detail_plan.extend(generate_detail_plan(period, [goal]))
+    
+    return detail_plan
+
+def generate_ai_goal_plan(period, goal):
+    """목표 하나에 대한 상세 계획 (같은 기간/목표는 AI를 한 번만 호출)"""
+    goal = ' '.join(goal.split())
+    cache_key = generation_cache.make_key('detail_plan', period, goal)
+    return generation_cache.get_or_create(
+        'detail_plan', cache_key, lambda: request_ai_goal_plan(period, goal)
+    )
+
+def request_ai_goal_plan(period, goal):
+    """목표 하나에 대한 상세 계획을 JSON 형식으로 생성"""
+    prompt = f"""
+    다음 {period} 목표에 대한 구체적이고 실행 가능한 상세 계획을 작성해주세요.
+    목표: {goal}
+    
+    반드시 아래 JSON 형식으로만 답변해주세요:
+    {{
+        "title": "{goal} - 세부 계획",
+        "tasks": ["실행 가능한 액션 아이템 5개"],
+        "estimated_time": "예상 소요시간 (예: 2-3주)",
+        "priority": "high, medium, low 중 하나"
+    }}
+    
+    자립준비청년의 관점에서 현실적이고 도움이 되는 계획으로 작성해주세요.
+    """
+    
+    ai_response = openai_client.chat_completion(
+        messages=[
+            {"role": "system", "content": "당신은 자립준비청년을 위한 실무 전문가입니다. 구체적이고 실행 가능한 계획을 JSON으로 수립해주세요."},
+            {"role": "user", "content": prompt}
+        ],
+        model="gpt-3.5-turbo",
+        temperature=0.3,
+        max_tokens=600,
+        response_format={"type": "json_object"}
+    )
+    
+    plan = parse_ai_detail_plan(ai_response, goal)
+    if not plan:
+        raise ValueError(f"AI 응답 형식이 올바르지 않습니다: {ai_response[:100]}")
+    return plan
+
+def parse_ai_detail_plan(ai_response, goal):
+    """AI 응답(JSON)을 검증하여 상세 계획 구조로 변환 (실패 시 None)"""
+    if not ai_response:
+        return None
+    
+    # 코드 블록이나 앞뒤 설명이 섞여 있어도 JSON 객체 부분만 추출
+    match = re.search(r'\{.*\}', ai_response, re.DOTALL)
+    if not match:
+        return None
     try:
-        goals_text = ', '.join(goals)
-        prompt = f"""
-        다음 {period} 목표들에 대한 구체적이고 실행 가능한 상세 계획을 작성해주세요:
-        목표: {goals_text}
-        
-        각 목표마다 다음 형식으로 작성해주세요:
-        1. 제목: [목표명] - 세부 계획
-        2. 구체적인 실행 단계 5개 (각각 실행 가능한 액션 아이템)
-        3. 예상 소요시간
-        4. 우선순위 (high/medium/low)
-        
-        자립준비청년의 관점에서 현실적이고 도움이 되는 계획으로 작성해주세요.
-        """
-        
-        response = openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "당신은 자립준비청년을 위한 실무 전문가입니다. 구체적이고 실행 가능한 계획을 수립해주세요."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=2000
-        )
-        
-        ai_response = response.choices[0].message.content
-        
-        # AI 응답을 구조화된 형태로 파싱
-        return parse_ai_detail_plan(ai_response, goals)
-        
-    except Exception as e:
-        print(f"AI 상세 계획 생성 실패: {e}")
-        return generate_detail_plan(period, goals)
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+    
+    if not isinstance(data, dict):
+        return None
+    
+    tasks = data.get('tasks')
+    if not isinstance(tasks, list):
+        return None
+    tasks = [str(task).strip() for task in tasks if str(task).strip()][:7]
+    if not tasks:
+        return None
+    
+    priority = str(data.get('priority', '')).strip().lower()
+    if priority not in ('high', 'medium', 'low'):
+        priority = 'medium'
+    
+    return {
+        'title': str(data.get('title') or f"{goal} - 세부 계획").strip(),
+        'tasks': tasks,
+        'estimated_time': str(data.get('estimated_time') or '2주').strip(),
+        'priority': priority
+    }
 
 def generate_detail_plan(period, goals):
     """상세 계획 생성 함수 (OpenAI 대신 임시 구현)"""
@@ -654,48 +1028,32 @@ def convert_to_todos():
         goals = data.get('goals')
         detail_plan = data.get('detail_plan', [])
         
-        conn = sqlite3.connect('database/iruda.db')
-        cursor = conn.cursor()
-        
-        # 로드맵 ID 가져오기
-        cursor.execute('''
-            SELECT id FROM roadmaps WHERE user_id = ? ORDER BY created_at DESC LIMIT 1
-        ''', (current_user.id,))
-        roadmap_result = cursor.fetchone()
-        roadmap_id = roadmap_result[0] if roadmap_result else None
-        
-        # 상세 계획이 있다면 각 태스크를 개별 Todo로 생성
-        if detail_plan:
-            for plan in detail_plan:
-                for task in plan['tasks']:
-                    # 기한 계산 (period에 따라)
-                    due_date = calculate_due_date(period, plan.get('estimated_time', '1주'))
-                    
-                    cursor.execute('''
-                        INSERT INTO todos 
-                        (user_id, roadmap_id, title, description, due_date, priority, status, category)
-                        VALUES (?, ?, ?, ?, ?, ?, 'pending', ?)
-                    ''', (
-                        current_user.id, 
-                        roadmap_id, 
-                        task, 
-                        plan['title'],
-                        due_date,
-                        plan.get('priority', 'medium'),
-                        period
-                    ))
-        else:
-            # 기본 목표를 Todo로 변환
-            for goal in goals:
-                due_date = calculate_due_date(period)
-                cursor.execute('''
-                    INSERT INTO todos 
-                    (user_id, roadmap_id, title, description, due_date, priority, status, category)
-                    VALUES (?, ?, ?, ?, ?, 'medium', 'pending', ?)
-                ''', (current_user.id, roadmap_id, goal, f"{period} 목표", due_date, period))
-        
-        conn.commit()
-        conn.close()
+        with storage.transaction() as session:
+            # 로드맵 ID 가져오기
+            roadmap_id = storage.roadmaps.latest_id(current_user.id, session=session)
+            
+            # 상세 계획이 있다면 각 태스크를 개별 Todo로 생성
+            if detail_plan:
+                for plan in detail_plan:
+                    for task in plan['tasks']:
+                        # 기한 계산 (period에 따라)
+                        due_date = calculate_due_date(period, plan.get('estimated_time', '1주'))
+                        storage.todos.create(current_user.id, {
+                            'title': task,
+                            'description': plan['title'],
+                            'due_date': due_date,
+                            'priority': plan.get('priority', 'medium'),
+                            'category': period
+                        }, roadmap_id, session=session)
+            else:
+                # 기본 목표를 Todo로 변환
+                for goal in goals:
+                    storage.todos.create(current_user.id, {
+                        'title': goal,
+                        'description': f"{period} 목표",
+                        'due_date': calculate_due_date(period),
+                        'category': period
+                    }, roadmap_id, session=session)
         
         return jsonify({'success': True, 'message': '할 일 목록으로 변환되었습니다!'})
         
@@ -722,47 +1080,105 @@ def calculate_due_date(period, estimated_time=None):
                 return (base_date + timedelta(weeks=weeks)).strftime('%Y-%m-%d')
         return (base_date + timedelta(days=14)).strftime('%Y-%m-%d')  # 기본 2주
 
-# Todo 관리 페이지
+# 할 일 목록 한 페이지 크기 및 필터 값
+TODO_PAGE_SIZE = 30
+TODO_STATUSES = ('pending', 'in_progress', 'completed')
+TODO_PRIORITIES = ('high', 'medium', 'low')
+
+def encode_todo_cursor(section, due_date, todo_id):
+    return base64.urlsafe_b64encode(f"{section}:{due_date or ''}:{todo_id or ''}".encode()).decode().rstrip('=')
+
+def decode_todo_cursor(cursor):
+    """커서 -> (구간, 마감일, ID). 구간 'o'는 미완료(마감일 오름차순), 'c'는 완료(마감일 내림차순),
+    'a'는 보관된 완료 할 일(마감일 내림차순)
+    
+    마감일/ID가 비어 있으면 해당 구간의 처음부터
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        section, due_date, todo_id = base64.urlsafe_b64decode(padded.encode()).decode().split(':')
+        if section not in ('o', 'c', 'a'):
+            raise ValueError
+        return section, due_date or None, int(todo_id) if todo_id else None
+    except Exception:
+        raise ValueError('잘못된 커서입니다.')
+
+def parse_todo_filters(args):
+    """목록 필터 (알 수 없는 값은 무시)"""
+    status = args.get('status', 'all')
+    priority = args.get('priority', 'all')
+    due = args.get('due', 'all')
+    return {
+        'status': status if status in TODO_STATUSES else 'all',
+        'priority': priority if priority in TODO_PRIORITIES else 'all',
+        'category': args.get('category', 'all').strip() or 'all',
+        'q': args.get('q', '').strip(),
+        'due': due if due in ('overdue', 'today') else 'all'
+    }
+
+def build_todo_page(user_id, args, cursor=None, limit=TODO_PAGE_SIZE, with_counts=False):
+    """필터에 맞는 할 일 한 페이지와 다음 커서 계산
+    
+    미완료 할 일(마감일 순: 연체 -> 오늘 마감 -> 예정)을 먼저, 그다음 완료한 할 일(최근 마감일 순),
+    마지막으로 보관된 완료 할 일
+    """
+    filters = parse_todo_filters(args)
+    today = datetime.now().strftime('%Y-%m-%d')
+    
+    if filters['status'] == 'completed':
+        sections = ['c', 'a'] if filters['due'] == 'all' else []
+    elif filters['status'] != 'all' or filters['due'] != 'all':
+        sections = ['o']
+    else:
+        sections = ['o', 'c', 'a']
+    
+    position = decode_todo_cursor(cursor) if cursor else None
+    if position:
+        sections = sections[sections.index(position[0]):] if position[0] in sections else []
+    
+    items = []
+    next_cursor = None
+    with storage.backend.session() as session:
+        for section in sections:
+            after = position[1:] if position and position[0] == section and position[2] is not None else None
+            remaining = limit - len(items)
+            if remaining == 0:
+                # 페이지가 찼으면 다음 구간에 남은 항목이 있는지만 확인
+                if storage.todos.select_section(user_id, section, filters, today, None, 1, session=session):
+                    next_cursor = encode_todo_cursor(section, None, None)
+                break
+            rows = storage.todos.select_section(user_id, section, filters, today, after, remaining + 1, session=session)
+            if len(rows) > remaining:
+                rows = rows[:remaining]
+                items.extend(rows)
+                next_cursor = encode_todo_cursor(section, rows[-1]['due_date'], rows[-1]['id'])
+                break
+            items.extend(rows)
+        
+        page = {'todos': items, 'next_cursor': next_cursor, 'filters': filters}
+        if with_counts:
+            page['counts'] = storage.todos.summary(user_id, today, session=session)
+    return page
+
+# Todo 관리 페이지 (첫 페이지만 포함, 필터 변경/다음 페이지는 목록 API로 조회)
 @app.route('/todos')
 @login_required
 def todos():
-    conn = sqlite3.connect('database/iruda.db')
-    cursor = conn.cursor()
-    
-    # 모든 todos 조회 (상태별로 정렬)
-    cursor.execute('''
-        SELECT id, title, description, due_date, priority, status, category, created_at,
-               CASE 
-                   WHEN status = 'completed' THEN 3
-                   WHEN DATE(due_date) < DATE('now') THEN 1  
-                   WHEN DATE(due_date) = DATE('now') THEN 2
-                   ELSE 4
-               END as sort_priority
-        FROM todos 
-        WHERE user_id = ? 
-        ORDER BY sort_priority, due_date ASC
-    ''', (current_user.id,))
-    
-    all_todos = cursor.fetchall()
-    
-    # 데이터 구조화
-    todos = []
-    for todo in all_todos:
-        todos.append({
-            'id': todo[0],
-            'title': todo[1], 
-            'description': todo[2],
-            'due_date': todo[3],
-            'priority': todo[4],
-            'status': todo[5],
-            'category': todo[6],
-            'created_at': todo[7],
-            'is_overdue': datetime.strptime(todo[3], '%Y-%m-%d').date() < datetime.now().date() if todo[5] != 'completed' else False,
-            'is_due_today': datetime.strptime(todo[3], '%Y-%m-%d').date() == datetime.now().date() if todo[5] != 'completed' else False
-        })
-    
-    conn.close()
-    return render_template('todos.html', todos=todos)
+    page = build_todo_page(current_user.id, request.args, with_counts=True)
+    return render_template('todos.html', first_page=page)
+
+# Todo 목록 API (상태/우선순위/카테고리/제목 검색 필터, 커서 기반 페이지네이션)
+@app.route('/api/todos')
+@login_required
+def list_todos_api():
+    try:
+        limit = max(1, min(request.args.get('limit', TODO_PAGE_SIZE, type=int), 100))
+        cursor = request.args.get('cursor')
+        page = build_todo_page(current_user.id, request.args, cursor=cursor, limit=limit,
+                               with_counts=not cursor)
+        return jsonify({'success': True, **page})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
 
 # Todo 상태 업데이트 API
 @app.route('/todos/<int:todo_id>/update-status', methods=['POST'])
@@ -772,20 +1188,12 @@ def update_todo_status(todo_id):
         data = request.json
         new_status = data.get('status')
         
-        conn = sqlite3.connect('database/iruda.db')
-        cursor = conn.cursor()
-        
         # 완료 시간 업데이트
         completed_at = datetime.now().isoformat() if new_status == 'completed' else None
         
-        cursor.execute('''
-            UPDATE todos 
-            SET status = ?, completed_at = ? 
-            WHERE id = ? AND user_id = ?
-        ''', (new_status, completed_at, todo_id, current_user.id))
-        
-        conn.commit()
-        conn.close()
+        storage.todos.update(current_user.id, ('id', todo_id),
+                             {'status': new_status, 'completed_at': completed_at},
+                             datetime.now().strftime('%Y-%m-%d'))
         
         return jsonify({'success': True})
         
@@ -797,15 +1205,7 @@ def update_todo_status(todo_id):
 @login_required
 def delete_todo(todo_id):
     try:
-        conn = sqlite3.connect('database/iruda.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            DELETE FROM todos WHERE id = ? AND user_id = ?
-        ''', (todo_id, current_user.id))
-        
-        conn.commit()
-        conn.close()
+        storage.todos.delete(current_user.id, ('id', todo_id), datetime.now().strftime('%Y-%m-%d'))
         
         return jsonify({'success': True})
         
@@ -823,137 +1223,236 @@ def edit_todo(todo_id):
         due_date = data.get('due_date')
         priority = data.get('priority')
         
-        conn = sqlite3.connect('database/iruda.db')
-        cursor = conn.cursor()
+        storage.todos.update(current_user.id, ('id', todo_id), {
+            'title': title,
+            'description': description,
+            'due_date': due_date,
+            'priority': priority
+        }, datetime.now().strftime('%Y-%m-%d'))
         
-        cursor.execute('''
-            UPDATE todos 
-            SET title = ?, description = ?, due_date = ?, priority = ?
-            WHERE id = ? AND user_id = ?
-        ''', (title, description, due_date, priority, todo_id, current_user.id))
+        return jsonify({'success': True})
         
-        conn.commit()
-        conn.close()
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+# 할 일 일괄 변경 한 번에 받을 수 있는 최대 작업 수
+TODO_BATCH_LIMIT = 200
+TODO_EDITABLE_FIELDS = ('title', 'description', 'due_date', 'priority', 'category', 'status')
+
+def clean_todo_fields(data, partial=False):
+    """할 일 입력값 검증 (partial이면 들어온 필드만), 잘못된 값은 ValueError"""
+    fields = {}
+    for name in TODO_EDITABLE_FIELDS:
+        if name not in data:
+            continue
+        value = data[name]
+        if name == 'title':
+            value = str(value or '').strip()
+            if not value or len(value) > 200:
+                raise ValueError('제목은 1~200자로 입력해주세요.')
+        elif name == 'due_date':
+            try:
+                value = datetime.strptime(str(value), '%Y-%m-%d').strftime('%Y-%m-%d')
+            except ValueError:
+                raise ValueError('마감일은 YYYY-MM-DD 형식이어야 합니다.')
+        elif name == 'priority' and value not in TODO_PRIORITIES:
+            raise ValueError(f"알 수 없는 우선순위입니다: {value}")
+        elif name == 'status' and value not in TODO_STATUSES:
+            raise ValueError(f"알 수 없는 상태입니다: {value}")
+        elif name in ('description', 'category'):
+            value = str(value or '')
+        fields[name] = value
+    
+    if not partial:
+        if 'title' not in fields or 'due_date' not in fields:
+            raise ValueError('제목과 마감일은 필수입니다.')
+        fields.setdefault('priority', 'medium')
+        fields.setdefault('status', 'pending')
+    if 'status' in fields:
+        fields['completed_at'] = datetime.now().isoformat() if fields['status'] == 'completed' else None
+    return fields
+
+def clean_roadmap_id(session, user_id, value):
+    """일괄 생성의 roadmap_id 검증 (없으면 None, 숫자가 아니거나 다른 사용자의 로드맵이면 ValueError)"""
+    if value is None:
+        return None
+    try:
+        roadmap_id = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"잘못된 로드맵 ID입니다: {value}")
+    if not storage.roadmaps.owns(user_id, roadmap_id, session=session):
+        raise ValueError(f"로드맵을 찾을 수 없습니다: {roadmap_id}")
+    return roadmap_id
+
+def todo_target(operation):
+    """일괄 작업 대상: id / ids 목록 / 목록 API와 같은 filter -> 저장소의 대상 지정"""
+    try:
+        if 'id' in operation:
+            return 'id', int(operation['id'])
+        if 'ids' in operation:
+            if not isinstance(operation['ids'], list):
+                raise ValueError('ids는 목록이어야 합니다.')
+            ids = [int(todo_id) for todo_id in operation['ids']]
+            if not ids or len(ids) > 1000:
+                raise ValueError('ids는 1~1000개여야 합니다.')
+            return 'ids', ids
+    except TypeError:
+        raise ValueError('할 일 ID는 숫자여야 합니다.')
+    if 'filter' in operation:
+        filters = operation['filter'] or {}
+        if not isinstance(filters, dict) or not all(isinstance(value, str) for value in filters.values()):
+            raise ValueError('filter는 문자열 값의 객체여야 합니다.')
+        return 'filter', parse_todo_filters(filters)
+    raise ValueError('id, ids, filter 중 하나로 대상을 지정해주세요.')
+
+def apply_todo_operation(session, user_id, operation):
+    """일괄 작업 하나 실행 (create / update / complete / delete), 결과 요약 반환"""
+    op = operation.get('op')
+    if op == 'create':
+        fields = clean_todo_fields(operation)
+        roadmap_id = clean_roadmap_id(session, user_id, operation.get('roadmap_id'))
+        return {'op': op, 'id': storage.todos.create(user_id, fields, roadmap_id, session=session)}
+    
+    if op == 'update':
+        fields = clean_todo_fields(operation, partial=True)
+        if not fields:
+            raise ValueError('변경할 필드가 없습니다.')
+    elif op == 'complete':
+        fields = clean_todo_fields({'status': 'completed'}, partial=True)
+    elif op != 'delete':
+        raise ValueError(f"알 수 없는 작업입니다: {op}")
+    
+    target = todo_target(operation)
+    today = datetime.now().strftime('%Y-%m-%d')
+    if op == 'delete':
+        affected = storage.todos.delete(user_id, target, today, session=session)
+    else:
+        affected = storage.todos.update(user_id, target, fields, today, only_open=op == 'complete', session=session)
+    return {'op': op, 'affected': affected}
+
+# Todo 추가 API
+@app.route('/todos/add', methods=['POST'])
+@login_required
+def add_todo():
+    try:
+        fields = clean_todo_fields(request.json or {})
+        todo_id = storage.todos.create(current_user.id, fields)
         
-        return jsonify({'success': True})
+        return jsonify({'success': True, 'id': todo_id})
         
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+# Todo 일괄 변경 API (여러 작업을 한 트랜잭션으로: 하나라도 실패하면 전부 취소)
+# 요청 예: {"operations": [{"op": "complete", "filter": {"category": "1개월"}},
+#                          {"op": "update", "ids": [3, 4], "priority": "high"},
+#                          {"op": "create", "title": "...", "due_date": "2025-01-31"},
+#                          {"op": "delete", "id": 7}]}
+@app.route('/todos/batch', methods=['POST'])
+@login_required
+def batch_todos():
+    operations = (request.json or {}).get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'success': False, 'error': 'operations 목록이 필요합니다.'}), 400
+    if len(operations) > TODO_BATCH_LIMIT:
+        return jsonify({'success': False, 'error': f'한 번에 최대 {TODO_BATCH_LIMIT}개 작업까지 가능합니다.'}), 400
+    
+    results = []
+    failed = None
+    try:
+        with storage.transaction() as session:
+            for index, operation in enumerate(operations):
+                try:
+                    results.append(apply_todo_operation(session, current_user.id, operation))
+                except (ValueError, TypeError, KeyError, AttributeError, StorageError) as e:
+                    # 트랜잭션을 빠져나가며 앞선 작업까지 모두 취소
+                    failed = (index, e)
+                    raise
+    except Exception as e:
+        if failed:
+            return jsonify({'success': False, 'error': str(failed[1]), 'failed_index': failed[0]}), 400
+        return jsonify({'success': False, 'error': str(e)})
+    return jsonify({'success': True, 'results': results})
+
+def notifications_etag():
+    """할 일/알림 버전 + 날짜"""
+    versions = user_data_versions(current_user.id, 'todos', 'notifications')
+    return version_etag('notifications', current_user.id, datetime.now().strftime('%Y-%m-%d'),
+                        versions['todos'], versions['notifications'])
+
 # 알림 확인 API
 @app.route('/notifications')
 @login_required
+@conditional(notifications_etag)
 def get_notifications():
     try:
-        conn = sqlite3.connect('database/iruda.db')
-        cursor = conn.cursor()
-        
-        # 오늘 마감인 할일
-        cursor.execute('''
-            SELECT id, title, due_date FROM todos 
-            WHERE user_id = ? AND DATE(due_date) = DATE('now') AND status != 'completed'
-        ''', (current_user.id,))
-        due_today = cursor.fetchall()
-        
-        # 연체된 할일
-        cursor.execute('''
-            SELECT id, title, due_date FROM todos 
-            WHERE user_id = ? AND DATE(due_date) < DATE('now') AND status != 'completed'
-        ''', (current_user.id,))
-        overdue = cursor.fetchall()
-        
-        # 3일 내 마감인 할일
-        cursor.execute('''
-            SELECT id, title, due_date FROM todos 
-            WHERE user_id = ? 
-            AND DATE(due_date) BETWEEN DATE('now', '+1 day') AND DATE('now', '+3 days')
-            AND status != 'completed'
-        ''', (current_user.id,))
-        upcoming = cursor.fetchall()
-        
-        conn.close()
-        
-        notifications = []
-        
-        for todo in overdue:
-            notifications.append({
-                'id': todo[0],
-                'title': todo[1],
-                'message': f'마감일이 지난 할일: {todo[1]}',
-                'type': 'error',
-                'due_date': todo[2]
-            })
-            
-        for todo in due_today:
-            notifications.append({
-                'id': todo[0], 
-                'title': todo[1],
-                'message': f'오늘 마감: {todo[1]}',
-                'type': 'warning',
-                'due_date': todo[2]
-            })
-            
-        for todo in upcoming:
-            notifications.append({
-                'id': todo[0],
-                'title': todo[1], 
-                'message': f'곧 마감: {todo[1]} ({todo[2]})',
-                'type': 'info',
-                'due_date': todo[2]
-            })
-        
-        return jsonify({
-            'success': True,
-            'notifications': notifications,
-            'counts': {
-                'overdue': len(overdue),
-                'due_today': len(due_today), 
-                'upcoming': len(upcoming)
-            }
-        })
-        
+        today = datetime.now().strftime('%Y-%m-%d')
+        horizon = (datetime.now() + timedelta(days=4)).strftime('%Y-%m-%d')
+        open_todos = storage.todos.open_due_before(current_user.id, horizon)
+        with local_backend.session() as session:
+            _, policy_alerts = read_user_alerts(session, current_user.id)
+        return jsonify({'success': True, **build_notifications(open_todos, policy_alerts, today)})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-# 연체 할일 재계획 API
+# 정책 알림 읽음 처리
+@app.route('/notifications/read', methods=['POST'])
+@login_required
+def mark_notifications_read():
+    try:
+        with local_backend.session(write=True) as session:
+            session.execute('''
+                UPDATE notifications SET is_read = 1
+                WHERE user_id = ? AND type = 'policy' AND is_read = 0
+            ''', (current_user.id,))
+        return jsonify({'success': True})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+# 연체 할일 재계획 API (async 요청이면 작업 큐로 실행)
 @app.route('/todos/reschedule-overdue', methods=['POST'])
 @login_required
 def reschedule_overdue_todos():
     try:
-        conn = sqlite3.connect('database/iruda.db')
-        cursor = conn.cursor()
-        
-        # 연체된 할일들 조회
-        cursor.execute('''
-            SELECT id, title, description, category FROM todos 
-            WHERE user_id = ? AND DATE(due_date) < DATE('now') AND status != 'completed'
-        ''', (current_user.id,))
-        overdue_todos = cursor.fetchall()
-        
-        if not overdue_todos:
-            return jsonify({'success': True, 'message': '연체된 할일이 없습니다.'})
-        
-        # AI를 통한 재계획 생성 (또는 기본 로직)
-        reschedule_plan = generate_reschedule_plan(overdue_todos)
-        
-        # 새로운 일정으로 업데이트
-        for todo_id, new_due_date in reschedule_plan.items():
-            cursor.execute('''
-                UPDATE todos SET due_date = ? WHERE id = ? AND user_id = ?
-            ''', (new_due_date, todo_id, current_user.id))
+        if wants_async():
+            job_id = job_queue.enqueue(
+                'reschedule_overdue',
+                {'user_id': current_user.id},
+                user_id=current_user.id,
+                dedupe_key=f"reschedule_overdue:{current_user.id}"
+            )
+            return queued_job_response(job_id)
         
-        conn.commit()
-        conn.close()
-        
-        return jsonify({
-            'success': True, 
-            'message': f'{len(reschedule_plan)}개의 할일이 재계획되었습니다.',
-            'reschedule_plan': reschedule_plan
-        })
+        return jsonify({'success': True, **reschedule_user_overdue_todos(current_user.id)})
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+def reschedule_user_overdue_todos(user_id):
+    """사용자의 연체된 할일 재계획 후 결과 메시지 반환"""
+    # 연체된 할일들 조회
+    overdue_todos = storage.todos.open_due_before(user_id, datetime.now().strftime('%Y-%m-%d'))
+    
+    if not overdue_todos:
+        return {'message': '연체된 할일이 없습니다.'}
+    
+    # AI를 통한 재계획 생성 (또는 기본 로직)
+    reschedule_plan = generate_reschedule_plan(overdue_todos)
+    
+    # 새로운 일정으로 업데이트
+    storage.todos.reschedule(user_id, reschedule_plan)
+    
+    return {
+        'message': f'{len(reschedule_plan)}개의 할일이 재계획되었습니다.',
+        'reschedule_plan': reschedule_plan
+    }
+
+def run_reschedule_job(payload):
+    """작업 큐: 연체 할일 재계획"""
+    return reschedule_user_overdue_todos(payload['user_id'])
+
 def generate_reschedule_plan(overdue_todos):
     """연체된 할일들을 위한 재계획 생성"""
     reschedule_plan = {}
@@ -961,111 +1460,306 @@ def generate_reschedule_plan(overdue_todos):
     
     for i, todo in enumerate(overdue_todos):
         # 우선순위와 카테고리를 고려한 재계획
-        if '긴급' in todo[1] or '신청' in todo[1]:
+        if '긴급' in todo['title'] or '신청' in todo['title']:
             # 긴급한 일은 3일 내
             new_date = (base_date + timedelta(days=3)).strftime('%Y-%m-%d')
-        elif '주거' in todo[2] or '생계' in todo[2]:
+        elif '주거' in (todo['description'] or '') or '생계' in (todo['description'] or ''):
             # 생존과 관련된 일은 1주 내
             new_date = (base_date + timedelta(days=7)).strftime('%Y-%m-%d')
         else:
             # 일반적인 일은 2주 내
             new_date = (base_date + timedelta(days=14)).strftime('%Y-%m-%d')
         
-        reschedule_plan[todo[0]] = new_date
+        reschedule_plan[todo['id']] = new_date
     
     return reschedule_plan
 
-# 정책 검색 페이지 (기존 유지하되 개선)
+# 정책 검색 페이지 (첫 페이지만 포함, 나머지는 목록 API로 지연 로드)
 @app.route('/policies')
 @login_required  
 def policies():
-    # 검색 파라미터 가져오기
-    search_query = request.args.get('search', '').strip()
-    category_filter = request.args.get('category', '').strip()
-    recommended = request.args.get('recommended', False)
+    page = build_policy_page(request.args, cursor=None, limit=POLICY_PAGE_SIZE)
+    return render_template('policies.html', first_page=page)
+
+def policy_list_etag():
+    """카탈로그 버전 + 추천 순서/북마크 표시에 쓰이는 사용자 데이터 버전 + 검색 조건"""
+    get_policy_catalog()
+    versions = user_data_versions(current_user.id, 'bookmarks', 'recommendations', 'profile')
+    return version_etag('policies', current_user.id, policy_catalog_version, versions['bookmarks'],
+                        versions['recommendations'], versions['profile'], sorted(request.args.items(multi=True)))
+
+def policy_detail_etag(policy_id):
+    get_policy_catalog()
+    return version_etag('policy', policy_id, policy_catalog_version)
+
+def bookmarks_etag():
+    get_policy_catalog()
+    versions = user_data_versions(current_user.id, 'bookmarks')
+    return version_etag('bookmarks', current_user.id, policy_catalog_version, versions['bookmarks'])
+
+# 정책 목록 API (커서 기반 페이지네이션, 카드에 필요한 필드만 반환)
+@app.route('/api/policies')
+@login_required
+@conditional(policy_list_etag)
+def list_policies_api():
+    try:
+        limit = max(1, min(request.args.get('limit', POLICY_PAGE_SIZE, type=int), 50))
+        page = build_policy_page(request.args, cursor=request.args.get('cursor'), limit=limit)
+        return jsonify({'success': True, **page})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+# 정책 상세 API (모달에서 전체 내용 조회)
+@app.route('/api/policies/<policy_id>')
+@login_required
+@conditional(policy_detail_etag)
+def policy_detail_api(policy_id):
+    get_policy_catalog()
+    policy = policy_catalog_by_id.get(policy_id)
+    if not policy:
+        return jsonify({'success': False, 'error': '정책을 찾을 수 없습니다.'}), 404
+    # 묶인 변형 정책 (다른 기관/시트의 같은 사업)은 요약만
+    variants = [slim_policy(variant) for variant in policy.get('_variants', [])]
+    return jsonify({'success': True, 'policy': {**policy, '_variants': variants}})
+
+# 북마크 목록 API (정책 카드 형식, 최근 북마크 순)
+@app.route('/api/bookmarks')
+@login_required
+@conditional(bookmarks_etag)
+def list_bookmarks_api():
+    try:
+        return jsonify({'success': True, 'policies': [
+            {**slim_policy(policy), 'bookmarked': True} for policy in get_bookmarked_policies(current_user.id)
+        ]})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+# 북마크 추가/삭제 API (정책 ID만 저장, 내용은 카탈로그에서)
+@app.route('/api/bookmarks/<policy_id>', methods=['POST', 'DELETE'])
+@login_required
+def toggle_bookmark_api(policy_id):
+    try:
+        if request.method == 'DELETE':
+            removed = storage.bookmarks.remove(current_user.id, policy_id)
+            return jsonify({'success': True, 'bookmarked': False, 'changed': removed})
+
+        get_policy_catalog()
+        policy = policy_catalog_by_id.get(policy_id)
+        if not policy:
+            return jsonify({'success': False, 'error': '정책을 찾을 수 없습니다.'}), 404
+        added = storage.bookmarks.add(current_user.id, policy_id, policy.get('서비스명', ''),
+                                      policy.get('기관명', ''), policy.get('구분', ''))
+        return jsonify({'success': True, 'bookmarked': True, 'changed': added})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+# 유사 중복 정리 결과 (압축률, 묶인 그룹)
+@app.route('/api/policies/dedup-report')
+@login_required
+def policy_dedup_report_api():
+    get_policy_catalog()
+    return jsonify({'success': True, 'report': policy_dedup_report})
+
+def encode_policy_cursor(kind, position):
+    return base64.urlsafe_b64encode(f"{kind}:{position}".encode()).decode().rstrip('=')
+
+def decode_policy_cursor(cursor):
+    """커서 -> (종류, 위치). 종류 'c'는 카탈로그 위치, 'r'은 순위 목록 위치"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        kind, position = base64.urlsafe_b64decode(padded.encode()).decode().split(':')
+        return kind, int(position)
+    except Exception:
+        raise ValueError('잘못된 커서입니다.')
+
+def slim_policy(policy):
+    """정책 카드 표시에 필요한 필드만 (긴 본문은 잘라서 전송)"""
+    def clip(value, length):
+        text = str(value or '')
+        return text if len(text) <= length else text[:length] + '…'
     
+    card = {
+        'id': policy.get('_id') or make_policy_id(policy),
+        '서비스명': policy.get('서비스명', ''),
+        '구분': policy.get('구분', ''),
+        '기관명': policy.get('기관명', ''),
+        '연락처': policy.get('연락처', ''),
+        '지원대상': clip(policy.get('지원대상'), 160),
+        '지원내용': clip(policy.get('지원내용'), 120),
+        '신청방법': clip(policy.get('신청방법'), 120)
+    }
+    if policy.get('_match_info'):
+        card['_match_info'] = policy['_match_info']
+    if policy.get('_variants'):
+        card['variant_count'] = len(policy['_variants'])
+    if policy.get('_unavailable'):
+        card['unavailable'] = True
+    return card
+
+def build_policy_page(args, cursor=None, limit=POLICY_PAGE_SIZE):
+    """검색 조건에 맞는 정책 한 페이지와 다음 커서 계산"""
+    search_query = args.get('search', '').strip()
+    category_filter = args.get('category', '').strip()
+    recommended = args.get('recommended', False)
+    bookmarked = args.get('bookmarked', False)
+    
+    kind, position = decode_policy_cursor(cursor) if cursor else (None, -1)
+    catalog = get_policy_catalog()
+    ranked = None
+    
+    if bookmarked:
+        ranked = get_bookmarked_policies(current_user.id)
+        if search_query:
+            ranked = apply_keyword_filter(ranked, search_query)
+        if category_filter:
+            ranked = apply_category_filter(ranked, category_filter)
     # Enhanced Matcher가 사용 가능하고 의미있는 검색어가 있을 때
-    if enhanced_matcher and search_query and len(search_query) > 2:
+    elif enhanced_matcher and search_query and len(search_query) > 2:
         try:
-            user_profile = get_user_profile(current_user.id)
-            filtered_policies = enhanced_matcher.semantic_search(
-                query=search_query,
-                user_profile=user_profile,
-                top_k=20
-            )
+            # 다음 페이지 요청마다 다시 인코딩하지 않도록 잠시 보관
+            cache_key = (current_user.id, search_query)
+            ranked = semantic_search_results.get(cache_key)
+            if ranked is None:
+                user_profile = get_user_profile(current_user.id)
+                ranked = enhanced_matcher.semantic_search(
+                    query=search_query,
+                    user_profile=user_profile,
+                    top_k=20,
+                    diversity=SEARCH_DIVERSITY
+                )
+                semantic_search_results.put(cache_key, ranked)
         except Exception as e:
             print(f"의미적 검색 실패, 기존 방식 사용: {e}")
-            # 기존 방식으로 fallback
-            all_policies = load_government_policies()
-            filtered_policies = all_policies.copy()
-            if search_query:
-                filtered_policies = apply_keyword_filter(filtered_policies, search_query)
-    else:
-        # 기존 검색 방식 유지
-        all_policies = load_government_policies()
-        filtered_policies = all_policies.copy()
-        
+            category_filter = ''
+    elif recommended:
+        ranked = get_recommended_policies(current_user.id)
         if search_query:
-            filtered_policies = apply_keyword_filter(filtered_policies, search_query)
-        
+            ranked = apply_keyword_filter(ranked, search_query)
         if category_filter:
-            filtered_policies = apply_category_filter(filtered_policies, category_filter)
-        
-        if recommended:
-            filtered_policies = get_recommended_policies(filtered_policies)
+            ranked = apply_category_filter(ranked, category_filter)
     
-    return render_template('policies.html', policies=filtered_policies)
+    if ranked is not None:
+        # 순위가 있는 결과는 순위 위치를 커서로 사용
+        start = position + 1 if kind == 'r' else 0
+        items = ranked[start:start + limit]
+        has_more = start + limit < len(ranked)
+        next_cursor = encode_policy_cursor('r', start + len(items) - 1) if has_more else None
+    else:
+        # 카탈로그 순서 기준 keyset: 커서 다음 위치부터 조건에 맞는 항목만 limit개 수집
+        start = position + 1 if kind == 'c' else 0
+        items = []
+        last_index = start - 1
+        for index in range(start, len(catalog)):
+            policy = catalog[index]
+            if search_query and not apply_keyword_filter([policy], search_query):
+                continue
+            if category_filter and policy.get('구분', '') != category_filter:
+                continue
+            if len(items) == limit:
+                break
+            items.append(policy)
+            last_index = index
+        else:
+            last_index = None
+        next_cursor = encode_policy_cursor('c', last_index) if last_index is not None else None
+    
+    bookmarked_ids = storage.bookmarks.ids(current_user.id)
+    cards = [slim_policy(policy) for policy in items]
+    for card in cards:
+        card['bookmarked'] = card['id'] in bookmarked_ids
+    return {
+        'policies': cards,
+        'next_cursor': next_cursor
+    }
 
-def get_recommended_policies(policies):
-    """사용자 프로필 기반 정책 추천"""
+def get_bookmarked_policies(user_id):
+    """북마크한 정책 (최근 순) - 카탈로그에 있으면 캐시된 카탈로그 항목, 빠진 정책은 저장된 이름/기관만"""
+    get_policy_catalog()
+    policies = []
+    for bookmark in storage.bookmarks.list(user_id):
+        policy = policy_catalog_by_id.get(bookmark['policy_id'])
+        if policy is None:
+            policy = {
+                '_id': bookmark['policy_id'],
+                '서비스명': bookmark['name'],
+                '기관명': bookmark['agency'],
+                '구분': bookmark['category'],
+                '_unavailable': True
+            }
+        policies.append(policy)
+    return policies
+
+def get_recommended_policies(user_id):
+    """사전 계산된 추천 정책 (아직 계산된 적 없으면 이 사용자만 바로 계산)"""
     try:
-        user_profile = get_user_profile(current_user.id)
-        if not user_profile:
-            return policies[:10]  # 프로필 없으면 상위 10개 반환
-        
-        support_needs = user_profile.get('support_needs', [])
-        
-        recommended = []
-        for policy in policies:
-            score = 0
-            policy_text = (policy.get('서비스명', '') + ' ' + 
-                          policy.get('지원내용', '') + ' ' + 
-                          policy.get('지원대상', '')).lower()
-            
-            # 지원 요구사항 매칭
-            for need in support_needs:
-                if need == '주거지원' and ('주거' in policy_text or '임대' in policy_text):
-                    score += 3
-                elif need == '경제지원' and ('생계' in policy_text or '급여' in policy_text):
-                    score += 3
-                elif need == '취업지원' and ('취업' in policy_text or '일자리' in policy_text):
-                    score += 3
-                elif need == '교육지원' and ('교육' in policy_text or '학비' in policy_text):
-                    score += 3
-                elif need == '심리지원' and ('상담' in policy_text or '심리' in policy_text):
-                    score += 2
-            
-            # 자립준비청년 대상 정책 우선
-            if '자립' in policy_text or '청소년' in policy_text:
-                score += 2
-            
-            if score > 0:
-                recommended.append((policy, score))
-        
-        # 점수 순으로 정렬하고 상위 20개 반환
-        recommended.sort(key=lambda x: x[1], reverse=True)
-        return [policy for policy, score in recommended[:20]]
+        catalog = get_policy_catalog()
+        ranking = policy_recommender.get(user_id)
+        if ranking is None:
+            policy_recommender.refresh(catalog, enhanced_matcher, user_ids=[user_id])
+            ranking = policy_recommender.get(user_id) or []
+        return [policy_catalog_by_id[policy_id] for policy_id, _ in ranking
+                if policy_id in policy_catalog_by_id]
         
     except Exception as e:
-        print(f"추천 정책 생성 오류: {e}")
-        return policies[:10]
+        print(f"추천 정책 조회 오류: {e}")
+        return get_policy_catalog()[:10]
+
+def run_reverse_match_job(payload):
+    """작업 큐: 새로 들어온 정책을 전체 사용자와 매칭해 알림 저장"""
+    return reverse_matcher.run(get_policy_catalog(), enhanced_matcher)
 
-# 정책 추천 API
+def run_recommendation_job(payload):
+    """작업 큐: 추천 정책 재계산 (user_ids가 없으면 카탈로그가 바뀐 사용자 전체)"""
+    refreshed = policy_recommender.refresh(get_policy_catalog(), enhanced_matcher, payload.get('user_ids'))
+    return {'refreshed_users': refreshed}
+
+def run_archive_job(payload):
+    """작업 큐: 오래된 대화/완료한 할 일 보관 후 다음 날 실행 예약"""
+    stats = data_archiver.run()
+    next_run = datetime.now() + timedelta(days=1)
+    job_queue.enqueue('archive', {}, dedupe_key=f"archive:{next_run.strftime('%Y-%m-%d')}", delay=24 * 3600)
+    return stats
+
+def get_policy_search_index():
+    """정책 카탈로그로 자동완성 인덱스를 한 번만 생성"""
+    global policy_search_index
+    if policy_search_index is None:
+        with policy_search_index_lock:
+            if policy_search_index is None:
+                policy_search_index = PolicyPrefixIndex(expand_policy_variants(get_policy_catalog()))
+                print(f"정책 자동완성 인덱스 생성 완료 ({len(policy_search_index)}개)")
+    return policy_search_index
+
+# 정책 자동완성 API (신청서 페이지 입력창)
+@app.route('/policies/search')
+def search_policy_names():
+    query = request.args.get('q', '').strip()
+    limit = max(1, min(request.args.get('limit', 8, type=int), 20))
+    
+    if not query:
+        return jsonify({'success': True, 'policies': []})
+    
+    # 같은 질의는 5분간 캐시하고, 캐시에 없는 같은 질의가 동시에 몰리면 한 요청만 계산하고 나머지는 결과를 기다림
+    cache_key = (' '.join(query.lower().split()), limit)
+    results = policy_search_results.get_or_create(
+        cache_key, lambda: get_policy_search_index().search(query, limit=limit)
+    )
+    
+    response = jsonify({'success': True, 'policies': results})
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    return response
+
+# 정책 추천 API (사전 계산된 추천 조회)
 @app.route('/policies/recommend', methods=['POST'])
 @login_required
 def recommend_policies():
     try:
-        return jsonify({'success': True})
+        policies = get_recommended_policies(current_user.id)
+        return jsonify({
+            'success': True,
+            'count': len(policies),
+            'policies': [slim_policy(policy) for policy in policies]
+        })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -1074,37 +1768,8 @@ def recommend_policies():
 @login_required
 def mypage():
     # 사용자 정보와 프로필 가져오기
-    conn = sqlite3.connect('database/iruda.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT id, name, email, age FROM users WHERE id = ?', (current_user.id,))
-    user_data = cursor.fetchone()
-    
-    cursor.execute('''
-        SELECT housing_status, income_level, education_level, employment_status, support_needs
-        FROM user_profiles WHERE user_id = ?
-    ''', (current_user.id,))
-    profile_data = cursor.fetchone()
-    
-    conn.close()
-    
-    user = {
-        'id': user_data[0],
-        'name': user_data[1], 
-        'email': user_data[2],
-        'age': user_data[3]
-    }
-    
-    profile = {}
-    if profile_data:
-        profile = {
-            'housing_status': profile_data[0],
-            'income_level': profile_data[1],
-            'education_level': profile_data[2],
-            'employment_status': profile_data[3],
-            'support_needs': json.loads(profile_data[4]) if profile_data[4] else []
-        }
-    
+    user = storage.users.get(current_user.id)
+    profile = storage.profiles.details(current_user.id)
     return render_template('mypage.html', user=user, profile=profile)
 
 @app.route('/mypage', methods=['POST'])
@@ -1125,38 +1790,28 @@ def update_mypage():
         current_password = request.form.get('current_password')
         new_password = request.form.get('new_password')
         
-        conn = sqlite3.connect('database/iruda.db')
-        cursor = conn.cursor()
-        
-        # 사용자 기본 정보 업데이트
-        cursor.execute('''
-            UPDATE users SET name = ?, email = ?, age = ? WHERE id = ?
-        ''', (name, email, age, current_user.id))
-        
-        # 프로필 정보 업데이트
-        cursor.execute('''
-            UPDATE user_profiles 
-            SET housing_status = ?, income_level = ?, support_needs = ?
-            WHERE user_id = ?
-        ''', (housing_status, income_level, json.dumps(support_needs), current_user.id))
-        
-        # 비밀번호 변경 처리
+        # 비밀번호 변경 처리 (현재 비밀번호가 틀리면 아무것도 저장하지 않음)
+        new_hash = None
         if current_password and new_password:
-            cursor.execute('SELECT password_hash FROM users WHERE id = ?', (current_user.id,))
-            stored_hash = cursor.fetchone()[0]
-            
-            if check_password_hash(stored_hash, current_password):
+            if check_password_hash(storage.users.password_hash(current_user.id), current_password):
                 new_hash = generate_password_hash(new_password)
-                cursor.execute('UPDATE users SET password_hash = ? WHERE id = ?', 
-                             (new_hash, current_user.id))
-                flash('비밀번호가 변경되었습니다.', 'success')
             else:
                 flash('현재 비밀번호가 올바르지 않습니다.', 'error')
-                conn.close()
                 return redirect(url_for('mypage'))
         
-        conn.commit()
-        conn.close()
+        # 기본 정보/프로필/비밀번호를 한 트랜잭션으로 업데이트
+        storage.users.update(current_user.id, name, email, age, {
+            'housing_status': housing_status,
+            'income_level': income_level,
+            'support_needs': support_needs
+        }, password_hash=new_hash)
+        if new_hash:
+            flash('비밀번호가 변경되었습니다.', 'success')
+        invalidate_user_cache(current_user.id)
+        
+        # 바뀐 프로필로 추천 정책 재계산
+        job_queue.enqueue('recommendations', {'user_ids': [current_user.id]},
+                          user_id=current_user.id, priority=JOB_PRIORITY_NORMAL)
         
         flash('정보가 성공적으로 업데이트되었습니다.', 'success')
         return redirect(url_for('mypage'))
@@ -1179,7 +1834,126 @@ def mypage_todos():
 @app.route('/application-form')
 def application_form_page():
     policy_name = request.args.get('policy', '')
-    return render_template('application_form.html', policy_name=policy_name)
+    return render_template('application-form.html', policy_name=policy_name)
+
+def get_application_form_generator():
+    """정책별 신청서 템플릿을 한 번만 계산"""
+    global application_form_generator
+    if application_form_generator is None:
+        catalog = get_policy_catalog()
+        with policy_catalog_lock:
+            if application_form_generator is None:
+                application_form_generator = ApplicationFormGenerator(
+                    expand_policy_variants(catalog),
+                    ai_client=openai_client,
+                    cache=generation_cache
+                )
+    return application_form_generator
+
+# 신청서 생성 API (AI가 필요하면 작업 ID를 반환하고, 페이지는 작업이 끝나면 같은 입력과 job_id로 다시 요청)
+# 작업에는 정책명과 신청 사유 입력만 저장하고, 이름/연락처 등 신청인 정보는 응답 시점에만 병합
+@app.route('/generate-application-form', methods=['POST'])
+@login_required
+def generate_application_form():
+    try:
+        form_data = request.json or {}
+        generator = get_application_form_generator()
+        
+        template = generator.find_template(form_data.get('policy_name'))
+        if not template:
+            return jsonify({'success': False, 'error': '선택한 정책을 찾을 수 없습니다.'})
+        
+        if form_data.get('job_id'):
+            job = job_queue.get(form_data['job_id'], user_id=current_user.id)
+            if not job or job['kind'] != 'application_form' or job['status'] != 'done':
+                return jsonify({'success': False, 'error': '신청 사유 생성 작업을 찾을 수 없습니다.'})
+            reason_text = (job['result'] or {}).get('reason_text')
+            return jsonify({'success': True, 'status': 'done', **generator.generate(template, form_data, reason_text)})
+
+        if generator.needs_background(template, form_data):
+            job_id = job_queue.enqueue(
+                'application_form',
+                {'policy_name': template['policy_name'], **reason_inputs(form_data)},
+                user_id=current_user.id
+            )
+            return queued_job_response(job_id)
+        
+        return jsonify({'success': True, 'status': 'done', **generator.generate(template, form_data)})
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+def run_application_form_job(payload):
+    """작업 큐: 신청 사유 문단 생성 (신청인 정보 없이 사유 입력만 받음)"""
+    generator = get_application_form_generator()
+    template = generator.find_template(payload.get('policy_name'))
+    if not template:
+        raise ValueError('선택한 정책을 찾을 수 없습니다.')
+    return {'reason_text': generator.get_reason_text(template, payload)}
+
+# 임베딩 매처가 필요한 작업 (별도 워커 프로세스는 매처를 초기화하지 못하면 이 작업을 가져가지 않음)
+MATCHER_JOB_KINDS = ('recommendations', 'reverse_match')
+
+# 백그라운드 작업 등록 (종류, 처리 함수, 우선순위, 최대 시도 횟수)
+job_queue.register('detail_plan', run_detail_plan_job, JOB_PRIORITY_INTERACTIVE, max_attempts=2)
+job_queue.register('application_form', run_application_form_job, JOB_PRIORITY_INTERACTIVE, max_attempts=2)
+job_queue.register('roadmap', run_roadmap_job, JOB_PRIORITY_NORMAL)
+job_queue.register('reschedule_overdue', run_reschedule_job, JOB_PRIORITY_BATCH)
+job_queue.register('recommendations', run_recommendation_job, JOB_PRIORITY_BATCH)
+job_queue.register('reverse_match', run_reverse_match_job, JOB_PRIORITY_BATCH)
+job_queue.register('archive', run_archive_job, JOB_PRIORITY_BATCH)
+
+def wants_async():
+    """요청 본문 또는 쿼리에 async가 있으면 작업 큐로 실행"""
+    data = request.get_json(silent=True) or {}
+    return bool(data.get('async')) or request.args.get('async') == '1'
+
+def queued_job_response(job_id):
+    return jsonify({'success': True, 'status': 'queued', 'job_id': job_id})
+
+background_started = False
+
+@app.before_request
+def start_background_work():
+    """첫 요청 시 작업 워커 시작 (재시작 전 남은 작업도 이어서 처리)"""
+    global background_started
+    if background_started:
+        return
+    background_started = True
+    if JOB_WORKERS > 0:
+        job_queue.start(JOB_WORKERS)
+    # 카탈로그가 바뀌었으면 추천을 다시 계산 (버전이 같은 사용자는 작업 안에서 건너뜀)
+    job_queue.enqueue('recommendations', {'user_ids': None}, dedupe_key='recommendations:catalog')
+    job_queue.enqueue('reverse_match', {}, dedupe_key='reverse_match')
+    # 보관 작업은 날짜별 키로 하루 한 번 (재시작해도 이미 예약된 날의 작업과 겹치지 않음)
+    job_queue.enqueue('archive', {}, dedupe_key=f"archive:{datetime.now().strftime('%Y-%m-%d')}")
+
+# 작업 상태 조회 API (완료되면 결과를 함께 반환)
+@app.route('/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    job = job_queue.get(job_id, user_id=current_user.id)
+    if not job:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다.'}), 404
+    
+    response = {
+        'success': True,
+        'job_id': job_id,
+        'kind': job['kind'],
+        'status': job['status'],
+        'attempts': job['attempts']
+    }
+    if job['status'] == 'done':
+        response.update(job['result'] or {})
+    elif job['status'] == 'failed':
+        response['error'] = job['error']
+    return jsonify(response)
+
+# 작업 큐 현황 (상태별 작업 수)
+@app.route('/jobs/stats')
+@login_required
+def job_stats():
+    return jsonify({'success': True, 'jobs': job_queue.stats()})
 
 # 로그아웃
 @app.route('/logout')
@@ -1192,11 +1966,15 @@ if __name__ == '__main__':
     # 데이터베이스 초기화
     from database.init_db import init_database
     init_database()
+    # PostgreSQL 저장소면 사용자/할 일 테이블도 생성 (SQLite는 위 마이그레이션이 처리)
+    storage.init_schema()
     
     # 개선된 정책 매칭 시스템 초기화
     print("이루다 시스템 초기화 중...")
     if initialize_enhanced_matcher():
         print("✅ Enhanced Policy Matcher 준비 완료!")
+        if initialize_response_cache():
+            print("✅ 채팅 응답 캐시 준비 완료!")
     else:
         print("⚠️ 기본 시스템으로 시작 (Enhanced Matcher 비활성)")
     
@@ -0,0 +1,197 @@
+# application_form.py - 정책별 신청서 템플릿 및 생성기
+import hashlib
+import time
+from html import escape
+
+# 정책 본문 키워드 -> 필요 서류
+DOCUMENT_RULES = [
+    (('소득', '저소득', '차상위'), '소득금액증명원 또는 급여명세서'),
+    (('기초생활', '수급'), '기초생활수급자 증명서'),
+    (('임대', '월세', '전세', '주거'), '임대차계약서 사본'),
+    (('한부모',), '한부모가족증명서'),
+    (('장애',), '장애인증명서'),
+    (('학생', '학교', '장학', '재학'), '재학증명서'),
+    (('의료', '치료', '수술', '질환', '진료'), '진단서 및 진료비 영수증'),
+    (('자립', '보호종료', '보호아동', '위탁'), '보호종료확인서'),
+    (('취업', '구직', '고용'), '구직등록확인서'),
+]
+
+BASE_DOCUMENTS = ['신분증 사본', '주민등록등본', '통장 사본']
+
+# 신청인 정보 섹션 (폼 필드 -> 표시 이름)
+APPLICANT_FIELDS = [
+    ('user_name', '성명'),
+    ('birth_date', '생년월일'),
+    ('phone_number', '연락처'),
+    ('email', '이메일'),
+    ('address', '주소'),
+    ('monthly_income', '월 소득'),
+]
+
+# AI 신청 사유 문단에 쓰는 입력 (백그라운드 작업에는 이 필드만 저장하고 이름/연락처 등은 넘기지 않음)
+REASON_FIELDS = ('application_reason', 'current_status', 'monthly_income')
+
+
+def build_form_template(policy):
+    """정책 하나에 대한 신청서 골격, 필요 서류, 제출 안내를 미리 계산"""
+    policy_text = ' '.join(
+        str(policy.get(field) or '') for field in ('서비스명', '지원대상', '지원내용', '신청방법')
+    )
+    documents = list(BASE_DOCUMENTS)
+    for keywords, document in DOCUMENT_RULES:
+        if any(keyword in policy_text for keyword in keywords) and document not in documents:
+            documents.append(document)
+
+    submission_parts = []
+    if policy.get('신청방법'):
+        submission_parts.append(f"<p><strong>신청방법:</strong> {escape(str(policy['신청방법']))}</p>")
+    if policy.get('기관명'):
+        submission_parts.append(f"<p><strong>담당기관:</strong> {escape(str(policy['기관명']))}</p>")
+    if policy.get('연락처'):
+        submission_parts.append(f"<p><strong>문의:</strong> {escape(str(policy['연락처']))}</p>")
+
+    return {
+        'policy_name': str(policy.get('서비스명') or ''),
+        'agency': str(policy.get('기관명') or ''),
+        'summary': str(policy.get('지원내용') or '')[:300],
+        'target': str(policy.get('지원대상') or '')[:300],
+        'required_documents': documents,
+        'submission_info': ''.join(submission_parts) or '<p>담당 기관에 신청 방법을 문의해주세요.</p>'
+    }
+
+
+def reason_inputs(form_data):
+    """신청 사유 문단 생성에 필요한 입력만 추출"""
+    return {field: form_data.get(field) for field in REASON_FIELDS}
+
+
+def form_signature(form_data):
+    """AI 문장 생성에 영향을 주는 입력만 모은 서명 (이름/연락처 등 개인 식별 정보 제외)"""
+    reason = ' '.join(str(form_data.get('application_reason') or '').split())
+    return {
+        'monthly_income': form_data.get('monthly_income') or '',
+        'current_status': sorted(form_data.get('current_status') or []),
+        'reason_hash': hashlib.sha256(reason.encode('utf-8')).hexdigest()
+    }
+
+
+class ApplicationFormGenerator:
+    """카탈로그 기반 신청서 생성기
+
+    - 정책별 템플릿/필요 서류는 생성 시 한 번만 계산
+    - 신청인 정보는 로컬에서 병합하고 AI는 신청 사유 문단만 작성
+    - AI 문단은 (정책, 입력 서명) 단위로 캐시하고, 캐시에 없으면 호출 측에서 작업 큐로 실행
+    """
+
+    def __init__(self, catalog, ai_client=None, cache=None):
+        self.ai_client = ai_client
+        self.cache = cache
+        self.templates = {}
+        for policy in catalog:
+            name = ' '.join(str(policy.get('서비스명') or '').split())
+            if name and name not in self.templates:
+                self.templates[name] = build_form_template(policy)
+
+    def find_template(self, policy_name):
+        name = ' '.join(str(policy_name or '').split())
+        if name in self.templates:
+            return self.templates[name]
+        # 부분 일치 (예: 괄호 안 설명이 빠진 이름)
+        for template_name, template in self.templates.items():
+            if name and (name in template_name or template_name in name):
+                return template
+        return None
+
+    def request_ai_reason(self, template, form_data):
+        """AI로 신청 사유 문단 작성 (실패 시 예외)"""
+        reason = str(form_data.get('application_reason') or '').strip()
+        status = ', '.join(form_data.get('current_status') or [])
+        prompt = f"""
+        다음 정책의 신청서에 들어갈 '신청 사유' 문단을 정중한 공문서체로 작성해주세요.
+        정책명: {template['policy_name']}
+        지원대상: {template['target']}
+        지원내용: {template['summary']}
+        신청인 상황: {status or '미기재'} / 월 소득: {form_data.get('monthly_income') or '미기재'}
+        신청인이 작성한 사유: {reason}
+
+        이름, 연락처 등 개인 식별 정보는 쓰지 말고 5문장 이내로 작성해주세요.
+        """
+        return self.ai_client.chat_completion(
+            messages=[
+                {"role": "system", "content": "당신은 자립준비청년의 정부 지원 신청서 작성을 돕는 행정 전문가입니다."},
+                {"role": "user", "content": prompt}
+            ],
+            model="gpt-3.5-turbo",
+            temperature=0.4,
+            max_tokens=500
+        )
+
+    def fallback_reason_text(self, template, form_data):
+        """AI 없이 입력 내용을 정리한 기본 신청 사유 문단"""
+        reason = str(form_data.get('application_reason') or '').strip()
+        status = ', '.join(form_data.get('current_status') or [])
+        lines = []
+        if status:
+            lines.append(f"신청인은 현재 {status} 상황에 있습니다.")
+        if reason:
+            lines.append(reason)
+        lines.append(f"위와 같은 사유로 '{template['policy_name']}' 지원을 신청합니다.")
+        return '\n'.join(lines)
+
+    def _cache_key(self, template, form_data):
+        return self.cache.make_key('application_form', template['policy_name'], form_signature(form_data))
+
+    def get_reason_text(self, template, form_data):
+        """신청 사유 문단 (AI 결과만 캐시하고 실패 시 기본 문단 사용)"""
+        if not self.ai_client:
+            return self.fallback_reason_text(template, form_data)
+        try:
+            if self.cache:
+                return self.cache.get_or_create(
+                    'application_form', self._cache_key(template, form_data),
+                    lambda: self.request_ai_reason(template, form_data)
+                )
+            return self.request_ai_reason(template, form_data)
+        except Exception as e:
+            print(f"신청 사유 AI 생성 실패: {e}")
+            return self.fallback_reason_text(template, form_data)
+
+    def render(self, template, form_data, reason_text):
+        """템플릿 + 신청인 정보 + 신청 사유를 HTML 신청서로 병합"""
+        rows = []
+        for field, label in APPLICANT_FIELDS:
+            value = form_data.get(field) or ''
+            rows.append(
+                f"<tr><th class=\"text-left pr-4 py-1\">{label}</th>"
+                f"<td class=\"py-1\">{escape(str(value))}</td></tr>"
+            )
+        status = ', '.join(form_data.get('current_status') or [])
+        rows.append(f"<tr><th class=\"text-left pr-4 py-1\">현재 상황</th><td class=\"py-1\">{escape(status)}</td></tr>")
+
+        paragraphs = ''.join(
+            f"<p>{escape(line.strip())}</p>" for line in reason_text.split('\n') if line.strip()
+        )
+        return (
+            f"<h3>{escape(template['policy_name'])} 신청서</h3>"
+            f"<p class=\"text-sm text-gray-600\">담당기관: {escape(template['agency'])}</p>"
+            f"<h4>1. 신청인 정보</h4><table>{''.join(rows)}</table>"
+            f"<h4>2. 신청 사유</h4>{paragraphs}"
+            f"<h4>3. 신청 정책 요약</h4><p>{escape(template['summary'])}</p>"
+            f"<p class=\"mt-4\">작성일: {time.strftime('%Y-%m-%d')}</p>"
+        )
+
+    def generate(self, template, form_data, reason_text=None):
+        """신청서 생성 (reason_text가 있으면 작업 큐에서 미리 만든 신청 사유 문단 사용)"""
+        if reason_text is None:
+            reason_text = self.get_reason_text(template, form_data)
+        return {
+            'form_content': self.render(template, form_data, reason_text),
+            'required_documents': template['required_documents'],
+            'submission_info': template['submission_info']
+        }
+
+    def needs_background(self, template, form_data):
+        """AI 호출이 필요한 경우에만 백그라운드 작업으로 실행"""
+        if not self.ai_client:
+            return False
+        return not (self.cache and self.cache.get(self._cache_key(template, form_data)) is not None)
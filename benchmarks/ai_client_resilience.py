@@ -0,0 +1,249 @@
+# benchmarks/ai_client_resilience.py - 가짜 OpenAI 서버로 ResilientOpenAIClient 재시도/제한시간/서킷 브레이커/세마포어 확인
+#
+# 실행 (저장소 루트에서, API 키나 네트워크 필요 없음):
+#   python benchmarks/ai_client_resilience.py                  # 시나리오 전부 실행, 실패가 있으면 종료 코드 1
+#   python benchmarks/ai_client_resilience.py --serve 8099     # 가짜 서버만 실행 (항상 정상 응답)
+#       -> OPENAI_BASE_URL=http://127.0.0.1:8099/v1 로 앱을 띄워 로컬에서 채팅 확인
+#
+# 가짜 서버는 /v1/chat/completions 요청마다 미리 넣어 둔 동작(정상 / 지연 / 500 / 429 / 잘못된 응답)을
+# 순서대로 꺼내 응답하고, 받은 요청 수와 최대 동시 요청 수를 기록
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ai_client import (  # noqa: E402
+    AIClientBusyError, AIClientError, CircuitBreaker, CircuitOpenError, ResilientOpenAIClient
+)
+
+
+def completion_body(content='가짜 응답입니다.'):
+    return {
+        'id': 'chatcmpl-fake', 'object': 'chat.completion', 'created': int(time.time()), 'model': 'fake',
+        'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': content}}],
+        'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2}
+    }
+
+
+class FakeOpenAIServer:
+    """동작 목록을 순서대로 재생하는 chat completion 서버 (목록이 비면 정상 응답)
+
+    동작: ('ok',) / ('slow', 초) / ('status', 코드) / ('rate_limit', Retry-After 초) / ('malformed',)
+    """
+
+    def __init__(self, port=0):
+        self.actions = deque()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                with server._lock:
+                    server.requests += 1
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                    action = server.actions.popleft() if server.actions else ('ok',)
+                try:
+                    self.respond(action)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # 클라이언트가 제한시간으로 먼저 끊음
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def respond(self, action):
+                kind = action[0]
+                headers = {}
+                if kind == 'slow':
+                    time.sleep(action[1])
+                    status, body = 200, completion_body()
+                elif kind == 'status':
+                    status, body = action[1], {'error': {'message': f'가짜 오류 {action[1]}', 'type': 'server_error'}}
+                elif kind == 'rate_limit':
+                    status, body = 429, {'error': {'message': '요청이 너무 많습니다.', 'type': 'rate_limit'}}
+                    headers['Retry-After'] = str(action[1])
+                elif kind == 'malformed':
+                    status, body = 200, {**completion_body(), 'choices': []}
+                else:
+                    status, body = 200, completion_body()
+
+                data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f'http://127.0.0.1:{self.httpd.server_address[1]}/v1'
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def reset(self, *actions):
+        # 이전 시나리오에서 클라이언트가 먼저 끊은 느린 요청이 끝날 때까지 기다림 (동시 요청 수 측정용)
+        waited_until = time.monotonic() + 5
+        while self.in_flight and time.monotonic() < waited_until:
+            time.sleep(0.05)
+        with self._lock:
+            self.actions = deque(actions)
+            self.requests = 0
+            self.max_in_flight = 0
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def make_client(server, **options):
+    settings = {'timeout': 2.0, 'deadline': 5.0, 'max_retries': 2, 'backoff_base': 0.05, 'backoff_cap': 0.2,
+                'max_concurrency': 4, 'failure_threshold': 5, 'reset_timeout': 30}
+    settings.update(options)
+    return ResilientOpenAIClient(api_key='fake-key', base_url=server.base_url, **settings)
+
+
+def call(client, **kwargs):
+    """(결과 또는 예외, 걸린 초)"""
+    started = time.monotonic()
+    try:
+        result = client.chat_completion([{'role': 'user', 'content': '안녕'}], **kwargs)
+    except AIClientError as e:
+        result = e
+    return result, time.monotonic() - started
+
+
+def scenario_retry(server):
+    """500, 429(Retry-After) 뒤 정상 -> 재시도 2번 후 성공"""
+    server.reset(('status', 500), ('rate_limit', 0.1))
+    client = make_client(server)
+    result, _ = call(client)
+    stats = client.stats()
+    return isinstance(result, str) and stats['retries'] == 2 and server.requests == 3, \
+        f"결과={result!r}, 재시도={stats['retries']}, 요청={server.requests}"
+
+
+def scenario_retry_exhausted(server):
+    """계속 500 -> max_retries + 1번 요청 후 실패"""
+    server.reset(*[('status', 500)] * 5)
+    client = make_client(server, max_retries=2)
+    result, _ = call(client)
+    return isinstance(result, AIClientError) and server.requests == 3, \
+        f"결과={type(result).__name__}, 요청={server.requests}"
+
+
+def scenario_client_error(server):
+    """400은 재시도하지 않고 브레이커도 실패로 세지 않음"""
+    server.reset(('status', 400))
+    client = make_client(server, failure_threshold=1)
+    result, _ = call(client)
+    return isinstance(result, AIClientError) and server.requests == 1 and client.breaker.state == CircuitBreaker.CLOSED, \
+        f"결과={type(result).__name__}, 요청={server.requests}, 서킷={client.breaker.state}"
+
+
+def scenario_deadline(server):
+    """응답이 느리면 재시도를 포함해 deadline 안에 실패"""
+    server.reset(*[('slow', 1.5)] * 5)
+    client = make_client(server, timeout=0.4, deadline=1.0)
+    result, elapsed = call(client)
+    return isinstance(result, AIClientError) and elapsed < 1.5, \
+        f"결과={type(result).__name__}, {elapsed:.2f}초, 요청={server.requests}"
+
+
+def scenario_breaker(server):
+    """연속 실패로 열림 -> 서버 호출 없이 차단 -> half-open 시험 호출이 잘못된 응답이어도 다시 열림 -> 성공하면 닫힘"""
+    client = make_client(server, max_retries=0, failure_threshold=2, reset_timeout=0.3)
+    server.reset(('status', 500), ('status', 500))
+    call(client)
+    call(client)
+    opened = client.breaker.state == CircuitBreaker.OPEN
+
+    server.reset()
+    rejected, _ = call(client)
+    blocked = isinstance(rejected, CircuitOpenError) and server.requests == 0
+
+    time.sleep(0.35)
+    server.reset(('malformed',))
+    trial, _ = call(client)
+    reopened = isinstance(trial, AIClientError) and client.breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.35)
+    server.reset()
+    recovered, _ = call(client)
+    closed = isinstance(recovered, str) and client.breaker.state == CircuitBreaker.CLOSED
+    return opened and blocked and reopened and closed, \
+        f"열림={opened}, 차단={blocked}, 잘못된 시험 응답 후 다시 열림={reopened}, 복구={closed}"
+
+
+def scenario_concurrency(server):
+    """동시 호출은 max_concurrency개까지만 서버에 도달하고, 슬롯을 못 얻으면 AIClientBusyError"""
+    server.reset(*[('slow', 0.6)] * 4)
+    client = make_client(server, max_concurrency=2)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(call(client)[0])) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    busy, _ = call(client, deadline=0.2)
+    for thread in threads:
+        thread.join()
+    succeeded = sum(isinstance(result, str) for result in results)
+    return server.max_in_flight == 2 and succeeded == 4 and isinstance(busy, AIClientBusyError), \
+        f"최대 동시 요청={server.max_in_flight}, 성공={succeeded}/4, 대기 초과={type(busy).__name__}"
+
+
+SCENARIOS = [
+    ('재시도 (500, 429)', scenario_retry),
+    ('재시도 소진', scenario_retry_exhausted),
+    ('4xx 재시도 안 함', scenario_client_error),
+    ('전체 제한시간', scenario_deadline),
+    ('서킷 브레이커', scenario_breaker),
+    ('동시 호출 제한', scenario_concurrency),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='가짜 OpenAI 서버로 AI 클라이언트 복원력 확인')
+    parser.add_argument('--serve', type=int, metavar='PORT', help='시나리오 대신 가짜 서버만 실행')
+    args = parser.parse_args()
+
+    if args.serve:
+        server = FakeOpenAIServer(args.serve)
+        print(f"가짜 OpenAI 서버: OPENAI_BASE_URL={server.base_url} (Ctrl+C로 종료)")
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            server.stop()
+        return
+
+    server = FakeOpenAIServer().start()
+    failed = 0
+    try:
+        for name, scenario in SCENARIOS:
+            passed, detail = scenario(server)
+            failed += not passed
+            print(f"{'통과' if passed else '실패'}  {name}: {detail}")
+    finally:
+        server.stop()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
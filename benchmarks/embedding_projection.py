@@ -0,0 +1,93 @@
+# benchmarks/embedding_projection.py - 차원 축소 (PCA / 랜덤 투영) 후 상위 k개 순위가 원래 차원과 얼마나 일치하는지 측정
+#
+# 실행 (저장소 루트에서):
+#   python benchmarks/embedding_projection.py                      # 합성 임베딩 (기본 5000개 x 1024차원)
+#   python benchmarks/embedding_projection.py --dims 64 128 256 512
+#   python benchmarks/embedding_projection.py --real               # 정책 엑셀 + 실제 임베딩 모델
+#
+# 투영은 정책 임베딩으로만 학습하고, 일치율은 학습에 쓰지 않은 질의로 측정
+# 일치율@k: 원래 차원 상위 k개 중 축소 차원 상위 k개에 포함된 비율
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_projection import PROJECTION_METHODS, EmbeddingProjection  # noqa: E402
+from embedding_storage import real_embeddings, recall_at_k, synthetic_embeddings  # noqa: E402
+from embedding_store import build_embedding_store, normalize_rows  # noqa: E402
+
+
+def run(vectors, queries, dims, k, repeat):
+    queries = normalize_rows(queries)
+    baseline = build_embedding_store(vectors, 'float32')
+    exact = baseline.scores(queries)
+    k = min(k, len(baseline))
+
+    rows = []
+    for method in PROJECTION_METHODS:
+        for dim in dims:
+            started = time.perf_counter()
+            projection = EmbeddingProjection.fit(vectors, method, dim)
+            fit_seconds = time.perf_counter() - started
+
+            store = build_embedding_store(projection.transform(vectors), 'float32')
+            projected_queries = normalize_rows(projection.transform(queries))
+            started = time.perf_counter()
+            for _ in range(repeat):
+                for query in projected_queries:
+                    store.scores(query)
+            query_ms = (time.perf_counter() - started) / (repeat * len(queries)) * 1000
+
+            approx = store.scores(projected_queries)
+            rows.append({
+                'label': f"{method} {projection.output_dim}",
+                'bytes': store.nbytes,
+                'agreement_1': recall_at_k(exact, approx, 1),
+                'agreement': recall_at_k(exact, approx, k),
+                'query_ms': query_ms,
+                'fit_s': fit_seconds
+            })
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            baseline.scores(query)
+    baseline_ms = (time.perf_counter() - started) / (repeat * len(queries)) * 1000
+    rows.insert(0, {'label': f"원래 차원 {vectors.shape[1]}", 'bytes': baseline.nbytes, 'agreement_1': 1.0,
+                    'agreement': 1.0, 'query_ms': baseline_ms, 'fit_s': 0.0})
+    return rows, k
+
+
+def print_table(rows, k, count):
+    print(f"\n정책 {count}개, 일치율 기준 원래 차원 정확 검색\n")
+    print(f"| 투영 | 정책 임베딩 메모리 | 일치율@1 | 일치율@{k} | 질의당 점수 계산 | 학습 시간 |")
+    print("|---|---:|---:|---:|---:|---:|")
+    for row in rows:
+        print(f"| {row['label']} | {row['bytes'] / 1024 / 1024:.2f}MB | {row['agreement_1']:.3f} | "
+              f"{row['agreement']:.3f} | {row['query_ms']:.2f}ms | {row['fit_s']:.2f}s |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='정책 임베딩 차원 축소 평가')
+    parser.add_argument('--real', action='store_true', help='정책 엑셀과 실제 임베딩 모델 사용')
+    parser.add_argument('--count', type=int, default=5000, help='합성 정책 수')
+    parser.add_argument('--dim', type=int, default=1024, help='합성 임베딩 차원 (klue/roberta-large: 1024)')
+    parser.add_argument('--dims', type=int, nargs='+', default=[128, 256, 512], help='목표 차원')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.real:
+        vectors, queries = real_embeddings(args.queries)
+    else:
+        vectors, queries = synthetic_embeddings(args.count, args.queries, args.dim)
+
+    rows, k = run(vectors, queries, args.dims, args.k, args.repeat)
+    print_table(rows, k, len(vectors))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+# benchmarks/embedding_storage.py - 정책 임베딩 압축 저장 방식별 메모리/재현율/검색 시간 측정
+#
+# 실행 (저장소 루트에서):
+#   python benchmarks/embedding_storage.py                 # 합성 임베딩 (기본 5000개 x 1024차원)
+#   python benchmarks/embedding_storage.py --count 20000
+#   python benchmarks/embedding_storage.py --real          # 정책 엑셀 + 실제 임베딩 모델
+#
+# 재현율@k: float32 정확 검색 상위 k개 중 압축 저장소 상위 k개에 포함된 비율
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_store import STORE_TYPES, build_embedding_store, normalize_rows  # noqa: E402
+
+
+def synthetic_embeddings(count, queries, dim, clusters=200, seed=0):
+    """문장 임베딩과 비슷한 분포 - 공통 방향 성분(이방성) + 주제 군집 + 거듭제곱으로 줄어드는 고유값 스펙트럼"""
+    rng = np.random.RandomState(seed)
+    rotation, _ = np.linalg.qr(rng.normal(size=(dim, dim)))
+    spectrum = (np.arange(dim) + 1.0) ** -0.8
+    centers = rng.normal(size=(clusters, dim)) * spectrum * 4
+    labels = rng.randint(clusters, size=count + queries)
+    vectors = (centers[labels] + rng.normal(size=(count + queries, dim)) * spectrum) @ rotation
+    common = rng.normal(size=dim)
+    vectors += common / np.linalg.norm(common) * np.linalg.norm(vectors, axis=1).mean() * 0.8
+    vectors = vectors.astype(np.float32)
+    return vectors[:count], vectors[count:]
+
+
+def real_embeddings(queries):
+    """정책 엑셀 + 매처 임베딩 모델 (질의는 정책 본문 앞부분을 변형해 사용)"""
+    from policy_matcher import EnhancedPolicyMatcher
+
+    os.environ['POLICY_EMBEDDING_STORAGE'] = 'float32'
+    os.environ['POLICY_EMBEDDING_PROJECTION'] = ''
+    matcher = EnhancedPolicyMatcher()
+    vectors = matcher.embedding_store.take(range(len(matcher.policies)))
+    rng = np.random.RandomState(0)
+    picked = rng.choice(len(matcher.policy_texts), size=min(queries, len(matcher.policy_texts)), replace=False)
+    query_texts = [matcher.policy_texts[i][:40] + ' 지원 문의' for i in picked]
+    query_vectors = matcher.model.encode(query_texts, batch_size=32, convert_to_numpy=True)
+    return vectors, query_vectors
+
+
+def recall_at_k(exact, approx, k):
+    exact_top = np.argpartition(-exact, k - 1, axis=1)[:, :k]
+    approx_top = np.argpartition(-approx, k - 1, axis=1)[:, :k]
+    hits = [len(set(a) & set(b)) for a, b in zip(exact_top, approx_top)]
+    return float(np.mean(hits)) / k
+
+
+def run(vectors, queries, k, repeat, pq_subspaces):
+    queries = normalize_rows(queries)
+    baseline = build_embedding_store(vectors, 'float32')
+    exact = baseline.scores(queries)
+    k = min(k, len(baseline))
+
+    configs = [(kind, kind, {}) for kind in STORE_TYPES if kind != 'pq']
+    configs += [(f'pq (m={m})', 'pq', {'subspaces': m}) for m in pq_subspaces]
+
+    rows = []
+    for label, kind, options in configs:
+        started = time.perf_counter()
+        store = build_embedding_store(vectors, kind, **options)
+        build_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for query in queries:
+                store.scores(query)
+        query_ms = (time.perf_counter() - started) / (repeat * len(queries)) * 1000
+
+        approx = store.scores(queries)
+        rows.append({
+            'label': label,
+            'bytes': store.nbytes,
+            'ratio': baseline.nbytes / store.nbytes,
+            'recall': recall_at_k(exact, approx, k),
+            'recall_1': recall_at_k(exact, approx, 1),
+            'query_ms': query_ms,
+            'build_s': build_seconds
+        })
+    return rows, k
+
+
+def print_table(rows, k, count, dim):
+    print(f"\n정책 {count}개 x {dim}차원, 재현율 기준 float32 정확 검색\n")
+    print(f"| 저장 방식 | 메모리 | 압축률 | 재현율@1 | 재현율@{k} | 질의당 점수 계산 | 구축 시간 |")
+    print("|---|---:|---:|---:|---:|---:|---:|")
+    for row in rows:
+        print(f"| {row['label']} | {row['bytes'] / 1024 / 1024:.2f}MB | {row['ratio']:.1f}x | "
+              f"{row['recall_1']:.3f} | {row['recall']:.3f} | {row['query_ms']:.2f}ms | {row['build_s']:.2f}s |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='정책 임베딩 압축 저장 벤치마크')
+    parser.add_argument('--real', action='store_true', help='정책 엑셀과 실제 임베딩 모델 사용')
+    parser.add_argument('--count', type=int, default=5000, help='합성 정책 수')
+    parser.add_argument('--dim', type=int, default=1024, help='합성 임베딩 차원 (klue/roberta-large: 1024)')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--pq-subspaces', type=int, nargs='+', default=[128, 256],
+                        help='곱 양자화 부분공간 수 (정책당 바이트 수)')
+    args = parser.parse_args()
+
+    if args.real:
+        vectors, queries = real_embeddings(args.queries)
+    else:
+        vectors, queries = synthetic_embeddings(args.count, args.queries, args.dim)
+
+    rows, k = run(vectors, queries, args.k, args.repeat, args.pq_subspaces)
+    print_table(rows, k, len(vectors), vectors.shape[1])
+
+
+if __name__ == '__main__':
+    main()
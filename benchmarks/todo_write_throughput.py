@@ -0,0 +1,142 @@
+# benchmarks/todo_write_throughput.py - todos 변경 쓰기 처리량: updated_at 트리거(이전) vs UPDATE 문에서 직접 설정(현재)
+#
+# 실행 (저장소 루트에서):
+#   python benchmarks/todo_write_throughput.py                  # 할 일 20만 개
+#   python benchmarks/todo_write_throughput.py --rows 1000000 --updates 5000
+#
+# 임시 디렉토리에 init_database()로 실제 스키마(인덱스, 요약 트리거 포함)를 만든 뒤
+# 이전 방식은 예전 AFTER UPDATE 트리거를 다시 만들고 updated_at 없는 UPDATE를,
+# 현재 방식은 트리거 없이 updated_at = CURRENT_TIMESTAMP를 함께 넣은 UPDATE를 실행
+import argparse
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database.init_db import init_database  # noqa: E402
+
+LEGACY_TRIGGER = '''
+    CREATE TRIGGER update_todos_timestamp
+    AFTER UPDATE ON todos
+    FOR EACH ROW
+    BEGIN
+        UPDATE todos SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+    END
+'''
+
+
+def build_database(directory, rows, users):
+    """임시 디렉토리에 스키마 생성 후 사용자 users명에게 할 일 rows개를 나눠 넣음"""
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            init_database()
+    finally:
+        os.chdir(cwd)
+
+    path = os.path.join(directory, 'database', 'iruda.db')
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.executemany(
+        'INSERT INTO users (name, email, password_hash) VALUES (?, ?, ?)',
+        [(f'bench{i}', f'bench{i}@iruda.com', 'x') for i in range(users)]
+    )
+    user_ids = [row[0] for row in cursor.execute('SELECT id FROM users')]
+    rng = random.Random(0)
+    statuses = ('pending', 'in_progress', 'completed')
+    cursor.executemany(
+        'INSERT INTO todos (user_id, title, due_date, priority, status) VALUES (?, ?, ?, ?, ?)',
+        ((rng.choice(user_ids), f'할 일 {i}', f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+          rng.choice(('high', 'medium', 'low')), rng.choice(statuses)) for i in range(rows))
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def targets(path, count, seed):
+    conn = sqlite3.connect(path)
+    rows = conn.execute('SELECT id, user_id FROM todos').fetchall()
+    conn.close()
+    return random.Random(seed).sample(rows, min(count, len(rows)))
+
+
+def run_workloads(path, legacy, updates, bulk_users):
+    """(작업 이름, 초당 처리 행 수, 총 변경 행 수) 목록"""
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.execute('DROP TRIGGER IF EXISTS update_todos_timestamp')
+    if legacy:
+        cursor.execute(LEGACY_TRIGGER)
+    conn.commit()
+    stamp = '' if legacy else ', updated_at = CURRENT_TIMESTAMP'
+    picked = targets(path, updates, seed=1)
+    results = []
+
+    # 1) 상태 변경 API처럼 한 행씩 변경 후 바로 커밋
+    started = time.perf_counter()
+    for index, (todo_id, user_id) in enumerate(picked):
+        status = 'completed' if index % 2 else 'pending'
+        cursor.execute(f'UPDATE todos SET status = ?, completed_at = ?{stamp} WHERE id = ? AND user_id = ?',
+                       (status, None, todo_id, user_id))
+        conn.commit()
+    results.append(('한 행씩 커밋 (상태 변경)', len(picked) / (time.perf_counter() - started), len(picked)))
+
+    # 2) 일괄 API처럼 한 트랜잭션 안에서 여러 행 수정
+    started = time.perf_counter()
+    for todo_id, user_id in picked:
+        cursor.execute(f'UPDATE todos SET title = ?, priority = ?{stamp} WHERE id = ? AND user_id = ?',
+                       ('수정된 할 일', 'high', todo_id, user_id))
+    conn.commit()
+    results.append(('한 트랜잭션 여러 행 (내용 수정)', len(picked) / (time.perf_counter() - started), len(picked)))
+
+    # 3) 필터 일괄 완료 (사용자별 미완료 전체)
+    user_ids = [row[0] for row in cursor.execute('SELECT id FROM users ORDER BY id LIMIT ?', (bulk_users,))]
+    changed = 0
+    started = time.perf_counter()
+    for user_id in user_ids:
+        cursor.execute(f"UPDATE todos SET status = 'completed'{stamp} WHERE user_id = ? AND status != 'completed'",
+                       (user_id,))
+        changed += cursor.rowcount
+    conn.commit()
+    results.append(('사용자별 일괄 완료', changed / max(time.perf_counter() - started, 1e-9), changed))
+
+    conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='todos 쓰기 처리량 벤치마크 (updated_at 트리거 제거 전/후)')
+    parser.add_argument('--rows', type=int, default=200000, help='할 일 수')
+    parser.add_argument('--users', type=int, default=500, help='사용자 수')
+    parser.add_argument('--updates', type=int, default=2000, help='한 행 변경 작업 횟수')
+    parser.add_argument('--bulk-users', type=int, default=50, help='일괄 완료할 사용자 수')
+    args = parser.parse_args()
+
+    table = {}
+    for label, legacy in (('이전 (AFTER UPDATE 트리거)', True), ('현재 (UPDATE 문에서 설정)', False)):
+        # 두 방식이 같은 데이터에서 시작하도록 매번 새로 생성
+        with tempfile.TemporaryDirectory() as directory:
+            path = build_database(directory, args.rows, args.users)
+            table[label] = run_workloads(path, legacy, args.updates, args.bulk_users)
+
+    labels = list(table)
+    print(f"\n할 일 {args.rows}개, 사용자 {args.users}명 (초당 변경 행 수)\n")
+    print(f"| 작업 | {' | '.join(labels)} | 배율 |")
+    print("|---|---:|---:|---:|")
+    for index, (name, _, changed) in enumerate(table[labels[0]]):
+        before = table[labels[0]][index][1]
+        after = table[labels[1]][index][1]
+        print(f"| {name} ({changed}행) | {before:,.0f} | {after:,.0f} | {after / before:.2f}x |")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# data_archiver.py - 오래된 대화/완료한 할 일을 사용자-월 단위 압축 묶음으로 옮기고 빈 공간 반환
+#
+# 작업 큐의 'archive' 작업이 하루 한 번 실행하며, 직접 실행할 수도 있음 (저장소 루트에서):
+#   python data_archiver.py --dry-run              # 옮길 행 수만 출력
+#   python data_archiver.py                        # 보관 + incremental VACUUM
+#   python data_archiver.py --enable-auto-vacuum   # 예전 DB를 incremental auto_vacuum으로 전환 (전체 VACUUM 한 번)
+#
+# 보관 기준은 (오늘 - 보관 일수)가 속한 달의 1일: 그 이전 달 전체를 옮기므로 월 묶음은 보통 한 번만 만들어짐
+import argparse
+import os
+import time
+from datetime import date, timedelta
+
+from storage import create_storage
+
+
+def month_start_before(days, today=None):
+    """오늘부터 days일 전이 속한 달의 1일 (YYYY-MM-DD)"""
+    day = (today or date.today()) - timedelta(days=days)
+    return day.replace(day=1).isoformat()
+
+
+class DataArchiver:
+    def __init__(self, storage, chat_days=180, todo_days=90, codec='zlib', vacuum_pages=2000):
+        self.storage = storage
+        self.chat_days = chat_days
+        self.todo_days = todo_days
+        self.codec = codec
+        # 실행 한 번에 반환할 최대 페이지 수 (0이면 전부), 많이 지운 날에도 잠금 시간을 나눠서 처리
+        self.vacuum_pages = vacuum_pages
+
+    def plan(self, today=None):
+        """보관 대상 {'chat': {user_id: 행 수}, 'todos': {...}}"""
+        return {
+            'chat': self.storage.archive.chat_users(month_start_before(self.chat_days, today)),
+            'todos': self.storage.archive.todo_users(month_start_before(self.todo_days, today))
+        }
+
+    def run(self, today=None):
+        """사용자별로 한 트랜잭션씩 옮긴 뒤 비운 페이지를 반환하고 처리 통계 반환"""
+        started = time.perf_counter()
+        archive = self.storage.archive
+        chat_cutoff = month_start_before(self.chat_days, today)
+        todo_cutoff = month_start_before(self.todo_days, today)
+        stats = {'chat_rows': 0, 'todo_rows': 0, 'raw_bytes': 0, 'stored_bytes': 0}
+
+        for user_id in archive.chat_users(chat_cutoff):
+            moved, raw_bytes, stored_bytes = archive.archive_chat(user_id, chat_cutoff, self.codec)
+            stats['chat_rows'] += moved
+            stats['raw_bytes'] += raw_bytes
+            stats['stored_bytes'] += stored_bytes
+
+        for user_id in archive.todo_users(todo_cutoff):
+            moved, raw_bytes, stored_bytes = archive.archive_todos(user_id, todo_cutoff, self.codec)
+            stats['todo_rows'] += moved
+            stats['raw_bytes'] += raw_bytes
+            stats['stored_bytes'] += stored_bytes
+
+        stats['vacuum'] = self.storage.backend.compact(self.vacuum_pages)
+        stats['seconds'] = round(time.perf_counter() - started, 3)
+        if stats['chat_rows'] or stats['todo_rows']:
+            print(f"보관 완료: 대화 {stats['chat_rows']}개, 할 일 {stats['todo_rows']}개 "
+                  f"({stats['raw_bytes']:,}B -> {stats['stored_bytes']:,}B), "
+                  f"반환 페이지 {stats['vacuum']['released_pages']}개")
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='오래된 대화/완료한 할 일 보관')
+    parser.add_argument('--chat-days', type=int, default=int(os.getenv('ARCHIVE_CHAT_DAYS', 180)))
+    parser.add_argument('--todo-days', type=int, default=int(os.getenv('ARCHIVE_TODO_DAYS', 90)))
+    parser.add_argument('--codec', choices=('zlib', 'zstd'), default=os.getenv('ARCHIVE_CODEC', 'zlib'))
+    parser.add_argument('--vacuum-pages', type=int, default=int(os.getenv('ARCHIVE_VACUUM_PAGES', 2000)))
+    parser.add_argument('--dry-run', action='store_true', help='옮길 행 수만 출력')
+    parser.add_argument('--enable-auto-vacuum', action='store_true',
+                        help='incremental auto_vacuum이 꺼진 예전 SQLite DB를 전체 VACUUM으로 한 번 전환')
+    args = parser.parse_args()
+
+    storage = create_storage()
+    archiver = DataArchiver(storage, args.chat_days, args.todo_days, args.codec, args.vacuum_pages)
+    if args.dry_run:
+        plan = archiver.plan()
+        print(f"대화: {sum(plan['chat'].values())}개 (사용자 {len(plan['chat'])}명, "
+              f"{month_start_before(args.chat_days)} 이전)")
+        print(f"완료한 할 일: {sum(plan['todos'].values())}개 (사용자 {len(plan['todos'])}명, "
+              f"{month_start_before(args.todo_days)} 이전)")
+        return
+    if args.enable_auto_vacuum:
+        print(f"auto_vacuum 전환: {storage.backend.compact(enable=True)}")
+    print(archiver.run())
+
+
+if __name__ == '__main__':
+    main()
@@ -2,162 +2,23 @@ import sqlite3
 import os
 from datetime import datetime
 
+try:
+    from database.migrations import DB_PATH, migrate
+except ImportError:  # python database/init_db.py 로 직접 실행한 경우
+    from migrations import DB_PATH, migrate
+
 def init_database():
     """이루다 데이터베이스 초기화"""
     
     # database 디렉토리가 없으면 생성
     os.makedirs('database', exist_ok=True)
     
-    conn = sqlite3.connect('database/iruda.db')
+    conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
     try:
-        # 1. 사용자 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                age INTEGER DEFAULT 20,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # 2. 사용자 프로필 테이블 (개선)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_profiles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                housing_status TEXT,
-                income_level TEXT,
-                education_level TEXT DEFAULT '',
-                employment_status TEXT DEFAULT '',
-                support_needs TEXT DEFAULT '[]',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-            )
-        ''')
-        
-        # 3. 로드맵 테이블 (개선)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS roadmaps (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                title TEXT NOT NULL,
-                description TEXT,
-                priority_areas TEXT DEFAULT '[]',
-                timeline TEXT DEFAULT '{}',
-                status TEXT DEFAULT 'active',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-            )
-        ''')
-        
-        # 4. 새로운 Todos 테이블 (핵심 기능)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS todos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                roadmap_id INTEGER,
-                title TEXT NOT NULL,
-                description TEXT DEFAULT '',
-                due_date DATE NOT NULL,
-                priority TEXT DEFAULT 'medium',
-                status TEXT DEFAULT 'pending',
-                category TEXT DEFAULT '',
-                completed_at TIMESTAMP NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
-                FOREIGN KEY (roadmap_id) REFERENCES roadmaps (id) ON DELETE SET NULL
-            )
-        ''')
-        
-        # 5. 알림 테이블 (새로 추가)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS notifications (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                todo_id INTEGER,
-                title TEXT NOT NULL,
-                message TEXT NOT NULL,
-                type TEXT DEFAULT 'info',
-                is_read BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
-                FOREIGN KEY (todo_id) REFERENCES todos (id) ON DELETE CASCADE
-            )
-        ''')
-        
-        # 6. 기존 progress_tracking 테이블 (호환성 유지)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS progress_tracking (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                roadmap_id INTEGER,
-                task_name TEXT NOT NULL,
-                task_category TEXT,
-                status TEXT DEFAULT 'pending',
-                priority INTEGER DEFAULT 3,
-                completed_at TIMESTAMP NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
-                FOREIGN KEY (roadmap_id) REFERENCES roadmaps (id) ON DELETE SET NULL
-            )
-        ''')
-        
-        # 7. 대화 히스토리 테이블 (새로 추가)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS chat_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                user_message TEXT NOT NULL,
-                ai_response TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-            )
-        ''')
-        
-        # 8. 정책 북마크 테이블 (새로 추가)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS policy_bookmarks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                policy_name TEXT NOT NULL,
-                policy_data TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-            )
-        ''')
-        
-        # 인덱스 생성 (성능 향상)
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_todos_user_id ON todos(user_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_todos_due_date ON todos(due_date)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_todos_status ON todos(status)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_notifications_user_id ON notifications(user_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_roadmaps_user_id ON roadmaps(user_id)')
-        
-        # 트리거 생성 (updated_at 자동 업데이트)
-        cursor.execute('''
-            CREATE TRIGGER IF NOT EXISTS update_todos_timestamp 
-            AFTER UPDATE ON todos
-            FOR EACH ROW
-            BEGIN
-                UPDATE todos SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
-            END
-        ''')
-        
-        cursor.execute('''
-            CREATE TRIGGER IF NOT EXISTS update_user_profiles_timestamp
-            AFTER UPDATE ON user_profiles
-            FOR EACH ROW  
-            BEGIN
-                UPDATE user_profiles SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
-            END
-        ''')
+        # 스키마는 번호 순서대로 마이그레이션 (database/migrations.py, 이미 적용한 번호는 건너뜀)
+        migrate(DB_PATH)
         
         # 기본 데이터 삽입 (개발용)
         cursor.execute('SELECT COUNT(*) FROM users')
@@ -0,0 +1,635 @@
+# database/migrations.py - 번호가 붙은 스키마 마이그레이션과 실행기 (schema_version 테이블로 적용 이력 관리)
+#
+# 실행 (저장소 루트에서):
+#   python database/migrations.py              # 대기 중인 마이그레이션 적용
+#   python database/migrations.py --dry-run    # 적용할 마이그레이션과 SQL만 출력
+#   python database/migrations.py --status     # 적용 이력 (적용 시각, 소요 시간)
+#   python database/migrations.py --target 3   # 3번까지만 적용
+#
+# 스키마를 바꿀 때는 MIGRATIONS 끝에 다음 번호로 추가 (이미 배포된 마이그레이션은 고치지 않음)
+import argparse
+import hashlib
+import sqlite3
+import textwrap
+import time
+
+DB_PATH = 'database/iruda.db'
+
+
+class Migration:
+    """번호, 이름, 순서대로 실행할 SQL 목록
+
+    기본은 마이그레이션 전체를 한 트랜잭션으로 실행하고 실패하면 전부 되돌림
+    online=True는 문장마다 별도 트랜잭션으로 실행 - 큰 테이블의 인덱스 생성처럼 오래 걸리는 작업이
+    쓰기 잠금을 문장 하나 동안만 잡도록 함 (중간에 멈춰도 IF NOT EXISTS라 다시 실행하면 이어서 진행)
+    """
+
+    def __init__(self, version, name, statements, online=False):
+        self.version = version
+        self.name = name
+        self.statements = [textwrap.dedent(statement).strip() for statement in statements]
+        self.online = online
+
+
+def _summary_trigger_body(row, sign, due_counts=True):
+    """할 일 요약 트리거 본문: 행(NEW/OLD)의 기여분을 사용자/로드맵 요약에 더하거나 뺌
+
+    due_counts=False면 전체/완료 개수만 유지 (마이그레이션 8번부터, 연체/오늘 마감은 조회 시 계산)
+    """
+    statements = []
+    for table, key in (('todo_summary', 'user_id'), ('roadmap_todo_summary', 'roadmap_id')):
+        if sign > 0:
+            statements.append(f"INSERT OR IGNORE INTO {table} ({key}) SELECT {row}.{key} WHERE {row}.{key} IS NOT NULL;")
+        op = '+' if sign > 0 else '-'
+        due = f''',
+                overdue = overdue {op} IFNULL({row}.status != 'completed' AND {row}.due_date < as_of, 0),
+                due_today = due_today {op} IFNULL({row}.status != 'completed' AND {row}.due_date = as_of, 0)'''
+        statements.append(f'''
+            UPDATE {table} SET
+                total = total {op} 1,
+                completed = completed {op} IFNULL({row}.status = 'completed', 0){due if due_counts else ''}
+            WHERE {key} = {row}.{key};''')
+    return '\n'.join(statements)
+
+
+MIGRATIONS = [
+    Migration(1, '기본 테이블과 인덱스', [
+        # 사용자
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            age INTEGER DEFAULT 20,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # 사용자 프로필
+        '''
+        CREATE TABLE IF NOT EXISTS user_profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            housing_status TEXT,
+            income_level TEXT,
+            education_level TEXT DEFAULT '',
+            employment_status TEXT DEFAULT '',
+            support_needs TEXT DEFAULT '[]',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+        ''',
+        # 로드맵
+        '''
+        CREATE TABLE IF NOT EXISTS roadmaps (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT,
+            priority_areas TEXT DEFAULT '[]',
+            timeline TEXT DEFAULT '{}',
+            status TEXT DEFAULT 'active',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+        ''',
+        # 할 일
+        '''
+        CREATE TABLE IF NOT EXISTS todos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            roadmap_id INTEGER,
+            title TEXT NOT NULL,
+            description TEXT DEFAULT '',
+            due_date DATE NOT NULL,
+            priority TEXT DEFAULT 'medium',
+            status TEXT DEFAULT 'pending',
+            category TEXT DEFAULT '',
+            completed_at TIMESTAMP NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+            FOREIGN KEY (roadmap_id) REFERENCES roadmaps (id) ON DELETE SET NULL
+        )
+        ''',
+        # 알림
+        '''
+        CREATE TABLE IF NOT EXISTS notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            todo_id INTEGER,
+            title TEXT NOT NULL,
+            message TEXT NOT NULL,
+            type TEXT DEFAULT 'info',
+            is_read BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+            FOREIGN KEY (todo_id) REFERENCES todos (id) ON DELETE CASCADE
+        )
+        ''',
+        # 기존 progress_tracking (호환성 유지)
+        '''
+        CREATE TABLE IF NOT EXISTS progress_tracking (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            roadmap_id INTEGER,
+            task_name TEXT NOT NULL,
+            task_category TEXT,
+            status TEXT DEFAULT 'pending',
+            priority INTEGER DEFAULT 3,
+            completed_at TIMESTAMP NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+            FOREIGN KEY (roadmap_id) REFERENCES roadmaps (id) ON DELETE SET NULL
+        )
+        ''',
+        # 대화 히스토리
+        '''
+        CREATE TABLE IF NOT EXISTS chat_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            user_message TEXT NOT NULL,
+            ai_response TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+        ''',
+        # 정책 북마크
+        '''
+        CREATE TABLE IF NOT EXISTS policy_bookmarks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            policy_name TEXT NOT NULL,
+            policy_data TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+        ''',
+        # 생성 결과 캐시 (로드맵/상세 계획)
+        '''
+        CREATE TABLE IF NOT EXISTS generation_cache (
+            cache_key TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+        ''',
+        # 백그라운드 작업 큐
+        '''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            user_id INTEGER,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'done', 'failed')),
+            priority INTEGER NOT NULL DEFAULT 5,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 3,
+            dedupe_key TEXT,
+            result TEXT,
+            error TEXT,
+            run_after REAL NOT NULL,
+            locked_by TEXT,
+            lease_expires_at REAL,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+        ''',
+        # 사용자별 추천 정책 (사전 계산, 순위 순서로 저장)
+        '''
+        CREATE TABLE IF NOT EXISTS policy_recommendations (
+            user_id INTEGER NOT NULL,
+            rank INTEGER NOT NULL,
+            policy_id TEXT NOT NULL,
+            score REAL NOT NULL,
+            PRIMARY KEY (user_id, rank),
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+        ''',
+        # 추천 계산 상태 (계산에 쓴 카탈로그 버전, 추천 개수)
+        '''
+        CREATE TABLE IF NOT EXISTS recommendation_state (
+            user_id INTEGER PRIMARY KEY,
+            catalog_version TEXT NOT NULL,
+            policy_count INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+        ''',
+        # 사용자 프로필 질의 임베딩 (새 정책 역매칭용, float32 바이트)
+        '''
+        CREATE TABLE IF NOT EXISTS profile_embeddings (
+            user_id INTEGER PRIMARY KEY,
+            query_hash TEXT NOT NULL,
+            dim INTEGER NOT NULL,
+            embedding BLOB NOT NULL,
+            updated_at REAL NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+        ''',
+        # 이미 알림 대상 확인을 마친 정책 (카탈로그에 새로 들어온 정책 판별용)
+        '''
+        CREATE TABLE IF NOT EXISTS known_policies (
+            policy_id TEXT PRIMARY KEY,
+            policy_name TEXT,
+            first_seen_at REAL NOT NULL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_todos_user_id ON todos(user_id)',
+        'CREATE INDEX IF NOT EXISTS idx_todos_due_date ON todos(due_date)',
+        'CREATE INDEX IF NOT EXISTS idx_todos_status ON todos(status)',
+        'CREATE INDEX IF NOT EXISTS idx_notifications_user_id ON notifications(user_id)',
+        'CREATE INDEX IF NOT EXISTS idx_roadmaps_user_id ON roadmaps(user_id)',
+        'CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(status, priority, created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs(dedupe_key, status)',
+    ]),
+
+    # 할 일 목록 keyset 페이지네이션용 복합 인덱스 (상태별 / 미완료 전체)
+    Migration(2, '할 일 keyset 페이지네이션 인덱스', [
+        'CREATE INDEX IF NOT EXISTS idx_todos_user_status_due ON todos(user_id, status, due_date, id)',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_todos_user_open_due ON todos(user_id, due_date, id)
+        WHERE status != 'completed'
+        ''',
+    ], online=True),
+
+    # 진행률 카운터: todos 트리거가 추가/삭제/변경된 행의 기여분만 반영, 연체/오늘 마감은 요약 행의 as_of 날짜 기준
+    Migration(3, '할 일 진행률 요약 테이블과 트리거', [
+        '''
+        CREATE TABLE IF NOT EXISTS todo_summary (
+            user_id INTEGER PRIMARY KEY,
+            total INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            overdue INTEGER NOT NULL DEFAULT 0,
+            due_today INTEGER NOT NULL DEFAULT 0,
+            as_of TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS roadmap_todo_summary (
+            roadmap_id INTEGER PRIMARY KEY,
+            total INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            overdue INTEGER NOT NULL DEFAULT 0,
+            due_today INTEGER NOT NULL DEFAULT 0,
+            as_of TEXT,
+            FOREIGN KEY (roadmap_id) REFERENCES roadmaps (id) ON DELETE CASCADE
+        )
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS todos_summary_insert
+        AFTER INSERT ON todos
+        FOR EACH ROW
+        BEGIN
+            {_summary_trigger_body('NEW', 1)}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS todos_summary_delete
+        AFTER DELETE ON todos
+        FOR EACH ROW
+        BEGIN
+            {_summary_trigger_body('OLD', -1)}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS todos_summary_update
+        AFTER UPDATE OF status, due_date, user_id, roadmap_id ON todos
+        FOR EACH ROW
+        BEGIN
+            {_summary_trigger_body('OLD', -1)}
+            {_summary_trigger_body('NEW', 1)}
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS roadmaps_summary_delete
+        AFTER DELETE ON roadmaps
+        FOR EACH ROW
+        BEGIN
+            DELETE FROM roadmap_todo_summary WHERE roadmap_id = OLD.id;
+        END
+        ''',
+        # 기존 할 일 전체 집계로 채움 (연체/오늘 마감은 as_of가 비어 있어 첫 조회 때 계산)
+        'DELETE FROM todo_summary',
+        'DELETE FROM roadmap_todo_summary',
+        '''
+        INSERT INTO todo_summary (user_id, total, completed)
+        SELECT user_id, COUNT(*), SUM(status = 'completed') FROM todos GROUP BY user_id
+        ''',
+        '''
+        INSERT INTO roadmap_todo_summary (roadmap_id, total, completed)
+        SELECT roadmap_id, COUNT(*), SUM(status = 'completed') FROM todos
+        WHERE roadmap_id IS NOT NULL GROUP BY roadmap_id
+        ''',
+    ]),
+
+    # updated_at은 애플리케이션의 UPDATE 문에서 함께 설정 (AFTER UPDATE 트리거는 같은 행을 한 번 더 써서 제거)
+    Migration(4, 'updated_at 재귀 트리거 제거', [
+        'DROP TRIGGER IF EXISTS update_todos_timestamp',
+        'DROP TRIGGER IF EXISTS update_user_profiles_timestamp',
+    ]),
+
+    # 오래된 대화/완료한 할 일 보관: 사용자-월 단위 압축 JSON 묶음 (data_archiver.py가 옮기고 읽을 때 이어 붙임)
+    Migration(5, '대화/완료 할 일 보관 테이블', [
+        '''
+        CREATE TABLE IF NOT EXISTS chat_archive (
+            user_id INTEGER NOT NULL,
+            month TEXT NOT NULL,
+            codec TEXT NOT NULL,
+            row_count INTEGER NOT NULL,
+            payload BLOB NOT NULL,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, month),
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS todo_archive (
+            user_id INTEGER NOT NULL,
+            month TEXT NOT NULL,
+            codec TEXT NOT NULL,
+            row_count INTEGER NOT NULL,
+            payload BLOB NOT NULL,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, month),
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+        ''',
+        # 보관한 완료 할 일 수 (진행률 요약에 더함, 로드맵 없는 할 일은 roadmap_id = 0)
+        '''
+        CREATE TABLE IF NOT EXISTS todo_archive_counts (
+            user_id INTEGER NOT NULL,
+            roadmap_id INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, roadmap_id),
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+        ''',
+    ]),
+
+    # 북마크는 정책 ID만 저장하고 표시할 내용은 카탈로그에서 (정책 전체 JSON 사본 제거, 같은 정책 중복 북마크 정리)
+    Migration(6, '정책 카탈로그 테이블과 ID 기반 북마크', [
+        '''
+        CREATE TABLE IF NOT EXISTS policies (
+            policy_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            agency TEXT DEFAULT '',
+            category TEXT DEFAULT '',
+            active INTEGER NOT NULL DEFAULT 1,
+            synced_at TEXT
+        )
+        ''',
+        # 기존 북마크의 policy_data에서 ID 계산 (저장된 _id가 없으면 서비스명/기관명으로, JSON이 깨졌으면 policy_name만)
+        '''
+        CREATE TEMP TABLE bookmark_policy_ids AS
+        SELECT id, user_id, created_at, name, agency, category,
+               COALESCE(stored_id, policy_id(name, agency)) AS policy_id
+        FROM (
+            SELECT id, user_id, created_at,
+                   CASE WHEN json_valid(policy_data) THEN json_extract(policy_data, '$._id') END AS stored_id,
+                   COALESCE(CASE WHEN json_valid(policy_data) THEN json_extract(policy_data, '$."서비스명"') END,
+                            policy_name) AS name,
+                   COALESCE(CASE WHEN json_valid(policy_data) THEN json_extract(policy_data, '$."기관명"') END, '') AS agency,
+                   COALESCE(CASE WHEN json_valid(policy_data) THEN json_extract(policy_data, '$."구분"') END, '') AS category
+            FROM policy_bookmarks
+        )
+        ''',
+        '''
+        INSERT OR IGNORE INTO policies (policy_id, name, agency, category)
+        SELECT policy_id, name, agency, category FROM bookmark_policy_ids ORDER BY id DESC
+        ''',
+        '''
+        CREATE TABLE policy_bookmarks_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            policy_id TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (user_id, policy_id),
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+            FOREIGN KEY (policy_id) REFERENCES policies (policy_id)
+        )
+        ''',
+        # 같은 사용자가 같은 정책을 여러 번 북마크했으면 처음 북마크한 행 하나만
+        '''
+        INSERT INTO policy_bookmarks_new (user_id, policy_id, created_at)
+        SELECT user_id, policy_id, MIN(created_at) FROM bookmark_policy_ids
+        GROUP BY user_id, policy_id
+        ORDER BY MIN(id)
+        ''',
+        'DROP TABLE bookmark_policy_ids',
+        'DROP TABLE policy_bookmarks',
+        'ALTER TABLE policy_bookmarks_new RENAME TO policy_bookmarks',
+        'CREATE INDEX IF NOT EXISTS idx_policy_bookmarks_policy_id ON policy_bookmarks(policy_id)',
+    ]),
+
+    # 사용자별 데이터 버전 카운터 (ETag용): 할 일/북마크/프로필은 storage.py 쓰기 트랜잭션에서,
+    # 다른 프로세스(작업 워커)도 쓰는 알림/추천은 트리거로 올림
+    Migration(7, 'ETag용 데이터 버전 카운터', [
+        '''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            user_id INTEGER NOT NULL,
+            scope TEXT NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, scope)
+        ) WITHOUT ROWID
+        ''',
+        *[
+            f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_version_{event.split()[0].lower()}
+            AFTER {event} ON {table}
+            FOR EACH ROW
+            BEGIN
+                INSERT INTO data_versions (user_id, scope, version) VALUES ({row}.user_id, '{scope}', 1)
+                ON CONFLICT (user_id, scope) DO UPDATE SET version = version + 1;
+            END
+            '''
+            for table, scope in (('notifications', 'notifications'), ('recommendation_state', 'recommendations'))
+            for event, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD'))
+        ],
+    ]),
+
+    # 연체/오늘 마감은 날짜가 바뀌면 값이 달라져 읽기 경로에서 다시 저장해야 했으므로, 요약 테이블에는
+    # 전체/완료 개수만 두고 연체/오늘 마감은 조회 때 미완료 부분 인덱스 범위로 셈 (overdue/due_today/as_of 열은 더 쓰지 않음)
+    Migration(8, '할 일 요약 트리거에서 연체/오늘 마감 제거', [
+        'DROP TRIGGER IF EXISTS todos_summary_insert',
+        'DROP TRIGGER IF EXISTS todos_summary_delete',
+        'DROP TRIGGER IF EXISTS todos_summary_update',
+        f'''
+        CREATE TRIGGER todos_summary_insert
+        AFTER INSERT ON todos
+        FOR EACH ROW
+        BEGIN
+            {_summary_trigger_body('NEW', 1, due_counts=False)}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER todos_summary_delete
+        AFTER DELETE ON todos
+        FOR EACH ROW
+        BEGIN
+            {_summary_trigger_body('OLD', -1, due_counts=False)}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER todos_summary_update
+        AFTER UPDATE OF status, due_date, user_id, roadmap_id ON todos
+        FOR EACH ROW
+        BEGIN
+            {_summary_trigger_body('OLD', -1, due_counts=False)}
+            {_summary_trigger_body('NEW', 1, due_counts=False)}
+        END
+        ''',
+        'UPDATE todo_summary SET overdue = 0, due_today = 0, as_of = NULL',
+        'UPDATE roadmap_todo_summary SET overdue = 0, due_today = 0, as_of = NULL',
+    ]),
+]
+
+
+def _policy_id(name, agency):
+    """app.make_policy_id와 같은 규칙의 정책 ID (마이그레이션 SQL에서 policy_id(서비스명, 기관명)으로 사용)"""
+    return hashlib.sha1(f"{name or ''}|{agency or ''}".encode('utf-8')).hexdigest()[:12]
+
+
+def ensure_version_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            duration_ms REAL NOT NULL
+        )
+    ''')
+
+
+def current_version(conn):
+    try:
+        return conn.execute('SELECT MAX(version) FROM schema_version').fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        # schema_version이 아직 없는 DB (마이그레이션 도입 전 또는 새 DB)
+        return 0
+
+
+def pending_migrations(conn, target=None):
+    version = current_version(conn)
+    return [
+        migration for migration in MIGRATIONS
+        if migration.version > version and (target is None or migration.version <= target)
+    ]
+
+
+def _summarize(statement):
+    first_line = statement.splitlines()[0]
+    return first_line if len(first_line) <= 80 else first_line[:77] + '...'
+
+
+def _run_transaction(conn, statements, record=None):
+    """문장들을 한 트랜잭션으로 실행 (record가 있으면 같은 트랜잭션에서 schema_version에 기록)"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        for statement in statements:
+            conn.execute(statement)
+        if record:
+            conn.execute('INSERT INTO schema_version (version, name, duration_ms) VALUES (?, ?, ?)', record())
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
+
+
+def apply_migration(conn, migration):
+    """마이그레이션 하나를 적용하고 schema_version에 기록, 소요 시간(ms) 반환"""
+    started = time.perf_counter()
+
+    def record():
+        return migration.version, migration.name, round((time.perf_counter() - started) * 1000, 1)
+
+    if migration.online:
+        for statement in migration.statements:
+            statement_started = time.perf_counter()
+            _run_transaction(conn, [statement])
+            print(f"    {_summarize(statement)} ({(time.perf_counter() - statement_started) * 1000:.1f}ms)")
+        _run_transaction(conn, [], record)
+    else:
+        # 본문과 버전 기록을 같은 트랜잭션으로 (실패하면 둘 다 반영되지 않음)
+        _run_transaction(conn, migration.statements, record)
+    return (time.perf_counter() - started) * 1000
+
+
+def migrate(db_path=DB_PATH, target=None, dry_run=False):
+    """대기 중인 마이그레이션을 번호 순서대로 적용하고 적용한(dry_run이면 적용할) 목록 반환"""
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.create_function('policy_id', 2, _policy_id, deterministic=True)
+    try:
+        pending = pending_migrations(conn, target)
+        if not pending:
+            print(f"스키마 최신 상태 (버전 {current_version(conn)})")
+            return []
+
+        if dry_run:
+            for migration in pending:
+                mode = '문장별 트랜잭션' if migration.online else '단일 트랜잭션'
+                print(f"[dry-run] {migration.version}. {migration.name} ({mode}, {len(migration.statements)}개 문장)")
+                for statement in migration.statements:
+                    print(textwrap.indent(statement, '    ') + ';')
+            return pending
+
+        # 빈 DB 파일이면 첫 테이블을 만들기 전에 incremental auto_vacuum을 켜 둠
+        # (보관 작업이 지운 페이지를 전체 VACUUM 없이 조금씩 반환, 기존 DB는 data_archiver.py --enable-auto-vacuum)
+        if conn.execute('PRAGMA page_count').fetchone()[0] == 0:
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        ensure_version_table(conn)
+        journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+        if journal_mode != 'wal' and any(migration.online for migration in pending):
+            print(f"참고: journal_mode={journal_mode} - WAL 모드가 아니면 인덱스 생성 중에는 읽기도 잠시 대기합니다.")
+
+        total_started = time.perf_counter()
+        for migration in pending:
+            print(f"마이그레이션 {migration.version}. {migration.name} 적용 중...")
+            duration_ms = apply_migration(conn, migration)
+            print(f"  완료 ({duration_ms:.1f}ms)")
+        # 새 인덱스의 통계를 갱신해 쿼리 플래너가 바로 사용하도록
+        conn.execute('PRAGMA optimize')
+        print(f"✅ 마이그레이션 {len(pending)}개 적용 완료 "
+              f"(버전 {current_version(conn)}, {(time.perf_counter() - total_started) * 1000:.1f}ms)")
+        return pending
+    finally:
+        conn.close()
+
+
+def print_status(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path)
+    try:
+        try:
+            rows = conn.execute(
+                'SELECT version, name, applied_at, duration_ms FROM schema_version ORDER BY version'
+            ).fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        for version, name, applied_at, duration_ms in rows:
+            print(f"{version:>3}. {name} - {applied_at} ({duration_ms}ms)")
+        for migration in pending_migrations(conn):
+            print(f"{migration.version:>3}. {migration.name} - 대기 중")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='이루다 DB 스키마 마이그레이션')
+    parser.add_argument('--db', default=DB_PATH, help='SQLite DB 경로')
+    parser.add_argument('--dry-run', action='store_true', help='적용하지 않고 대기 중인 SQL만 출력')
+    parser.add_argument('--target', type=int, help='이 번호까지만 적용')
+    parser.add_argument('--status', action='store_true', help='적용 이력과 대기 중인 마이그레이션 출력')
+    args = parser.parse_args()
+
+    if args.status:
+        print_status(args.db)
+    else:
+        migrate(args.db, target=args.target, dry_run=args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
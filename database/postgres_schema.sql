@@ -0,0 +1,122 @@
+-- database/postgres_schema.sql - STORAGE_BACKEND=postgres 일 때 storage.py가 쓰는 테이블
+-- 적용: python storage.py init-schema (IF NOT EXISTS라 여러 번 실행해도 안전)
+-- SQLite 스키마(database/migrations.py)와 컬럼을 맞춰 둠. 작업 큐/추천/캐시 테이블은 계속 SQLite에 있음
+
+CREATE TABLE IF NOT EXISTS users (
+    id BIGSERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    age INTEGER DEFAULT 20,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS user_profiles (
+    id BIGSERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    housing_status TEXT,
+    income_level TEXT,
+    education_level TEXT DEFAULT '',
+    employment_status TEXT DEFAULT '',
+    support_needs TEXT DEFAULT '[]',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS roadmaps (
+    id BIGSERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    title TEXT NOT NULL,
+    description TEXT,
+    priority_areas TEXT DEFAULT '[]',
+    timeline TEXT DEFAULT '{}',
+    status TEXT DEFAULT 'active',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS todos (
+    id BIGSERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    roadmap_id BIGINT REFERENCES roadmaps (id) ON DELETE SET NULL,
+    title TEXT NOT NULL,
+    description TEXT DEFAULT '',
+    due_date DATE NOT NULL,
+    priority TEXT DEFAULT 'medium',
+    status TEXT DEFAULT 'pending',
+    category TEXT DEFAULT '',
+    completed_at TIMESTAMP NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS chat_history (
+    id BIGSERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    user_message TEXT NOT NULL,
+    ai_response TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 정책 카탈로그 (북마크가 참조하는 정책 ID와 최소 정보, 카탈로그 로드 시 동기화)
+CREATE TABLE IF NOT EXISTS policies (
+    policy_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    agency TEXT DEFAULT '',
+    category TEXT DEFAULT '',
+    active INTEGER NOT NULL DEFAULT 1,
+    synced_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS policy_bookmarks (
+    id BIGSERIAL PRIMARY KEY,
+    user_id BIGINT NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    policy_id TEXT NOT NULL REFERENCES policies (policy_id),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (user_id, policy_id)
+);
+
+-- 사용자별 데이터 버전 카운터 (ETag용, storage.py 쓰기 트랜잭션에서 증가)
+CREATE TABLE IF NOT EXISTS data_versions (
+    user_id BIGINT NOT NULL,
+    scope TEXT NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, scope)
+);
+
+-- 오래된 대화/완료한 할 일 보관 (사용자-월 단위 압축 JSON 묶음, data_archiver.py)
+CREATE TABLE IF NOT EXISTS chat_archive (
+    user_id BIGINT NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    month TEXT NOT NULL,
+    codec TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    payload BYTEA NOT NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, month)
+);
+
+CREATE TABLE IF NOT EXISTS todo_archive (
+    user_id BIGINT NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    month TEXT NOT NULL,
+    codec TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    payload BYTEA NOT NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, month)
+);
+
+CREATE TABLE IF NOT EXISTS todo_archive_counts (
+    user_id BIGINT NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    roadmap_id BIGINT NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, roadmap_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_user_profiles_user_id ON user_profiles (user_id);
+CREATE INDEX IF NOT EXISTS idx_roadmaps_user_id ON roadmaps (user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_todos_roadmap_id ON todos (roadmap_id);
+-- 할 일 목록 keyset 페이지네이션 (상태별 / 미완료 전체), 개수 집계도 같은 인덱스 사용
+CREATE INDEX IF NOT EXISTS idx_todos_user_status_due ON todos (user_id, status, due_date, id);
+CREATE INDEX IF NOT EXISTS idx_todos_user_open_due ON todos (user_id, due_date, id) WHERE status != 'completed';
+CREATE INDEX IF NOT EXISTS idx_chat_history_user_id ON chat_history (user_id, id);
+CREATE INDEX IF NOT EXISTS idx_policy_bookmarks_policy_id ON policy_bookmarks (policy_id);
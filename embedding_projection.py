@@ -0,0 +1,91 @@
+# embedding_projection.py - 정책 임베딩 차원 축소 (PCA / 랜덤 투영, 정책 임베딩으로 한 번 학습해 파일로 저장)
+import os
+import zlib
+
+import numpy as np
+
+from embedding_store import normalize_rows
+
+PROJECTION_METHODS = ('pca', 'random')
+
+
+class EmbeddingProjection:
+    """(목표 차원 x 원래 차원) 투영 행렬 하나로 정책/질의 임베딩을 같은 저차원 공간으로 옮김
+
+    - pca: 정책 임베딩의 절단 SVD 상위 성분. 평균을 빼지 않음 - 코사인 점수에는 문장 임베딩의
+      공통 방향 성분도 들어가므로 내적을 가장 잘 보존하는 부분공간을 그대로 사용
+    - random: 직교화한 가우시안 랜덤 투영 (학습 데이터가 적거나 카탈로그가 자주 바뀔 때)
+    인덱스 구축과 질의 모두 transform을 거친 뒤 다시 정규화해 코사인 유사도로 비교
+    """
+
+    def __init__(self, method, components):
+        self.method = method
+        self.components = np.asarray(components, dtype=np.float32)
+
+    @property
+    def input_dim(self):
+        return self.components.shape[1]
+
+    @property
+    def output_dim(self):
+        return self.components.shape[0]
+
+    @property
+    def key(self):
+        """투영 식별자 (투영이 바뀌면 저장해 둔 질의 임베딩을 다시 계산하는 데 사용)"""
+        checksum = zlib.crc32(self.components.tobytes())
+        return f"{self.method}-{self.input_dim}x{self.output_dim}-{checksum:08x}"
+
+    @classmethod
+    def fit(cls, vectors, method='pca', dim=256, seed=0):
+        if method not in PROJECTION_METHODS:
+            raise ValueError(f"지원하지 않는 차원 축소 방식입니다: {method} (가능: {', '.join(PROJECTION_METHODS)})")
+        vectors = normalize_rows(vectors)
+        input_dim = vectors.shape[1]
+        if method == 'pca':
+            # 성분 수는 정책 수를 넘을 수 없음 (정책이 적으면 가능한 만큼만)
+            dim = min(dim, input_dim, len(vectors))
+            _, _, vt = np.linalg.svd(vectors, full_matrices=False)
+            components = vt[:dim]
+        else:
+            dim = min(dim, input_dim)
+            rng = np.random.RandomState(seed)
+            q, _ = np.linalg.qr(rng.normal(size=(input_dim, dim)))
+            components = q.T
+        return cls(method, components)
+
+    def transform(self, vectors):
+        return normalize_rows(vectors) @ self.components.T
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez(path, method=self.method, components=self.components)
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return cls(str(data['method']), data['components'])
+
+
+def load_or_fit_projection(path, vectors, method='pca', dim=256):
+    """저장된 투영이 설정(방식/입력 차원/목표 차원)과 맞으면 재사용, 아니면 학습 후 저장"""
+    try:
+        projection = EmbeddingProjection.load(path)
+    except Exception as e:
+        print(f"저장된 차원 축소 투영 로드 실패, 다시 학습합니다: {e}")
+        projection = None
+
+    expected_dim = min(dim, vectors.shape[1], len(vectors)) if method == 'pca' else min(dim, vectors.shape[1])
+    if (projection is not None and projection.method == method
+            and projection.input_dim == vectors.shape[1] and projection.output_dim == expected_dim):
+        return projection
+
+    projection = EmbeddingProjection.fit(vectors, method, dim)
+    try:
+        projection.save(path)
+        print(f"차원 축소 투영 학습 후 저장: {path} ({projection.key})")
+    except OSError as e:
+        print(f"차원 축소 투영 저장 실패: {e}")
+    return projection
@@ -0,0 +1,188 @@
+# embedding_store.py - 정책 임베딩 압축 저장 (int8 스칼라 양자화 / 곱 양자화) 및 압축 상태 그대로 점수 계산
+import numpy as np
+
+
+def normalize_rows(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=-1, keepdims=True), 1e-12)
+
+
+class Float32Store:
+    """압축하지 않은 기준 저장소 (행 단위 정규화한 float32)
+
+    모든 저장소는 같은 인터페이스를 가짐:
+    - scores(queries): 정규화된 질의 (d,) 또는 (q, d) -> 코사인 유사도 (n,) 또는 (q, n)
+    - take(indices): 해당 행을 float32로 복원 (MMR/역매칭처럼 일부 행만 필요한 경우)
+    """
+
+    kind = 'float32'
+    chunk_size = 1024  # 압축 저장소가 한 번에 복원하는 행 수 (임시 float32 메모리 상한)
+
+    def __init__(self, vectors):
+        self.data = normalize_rows(vectors)
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    @property
+    def dim(self):
+        return self.data.shape[1]
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def _decode(self, start, stop):
+        return self.data[start:stop]
+
+    def scores(self, queries):
+        queries = np.asarray(queries, dtype=np.float32)
+        single = queries.ndim == 1
+        queries = np.atleast_2d(queries)
+        result = np.empty((queries.shape[0], len(self)), dtype=np.float32)
+        for start in range(0, len(self), self.chunk_size):
+            stop = min(start + self.chunk_size, len(self))
+            result[:, start:stop] = queries @ self._decode(start, stop).T
+        return result[0] if single else result
+
+    def take(self, indices):
+        return np.array(self.data[np.asarray(indices, dtype=np.int64)], dtype=np.float32)
+
+    def describe(self):
+        return {'kind': self.kind, 'count': len(self), 'dim': self.dim, 'bytes': int(self.nbytes)}
+
+
+class Int8Store(Float32Store):
+    """평균을 뺀 잔차의 차원별 스케일 int8 스칼라 양자화 (메모리 1/4)
+
+    x ~= mean + codes * scale 이므로 q . x = q . mean + codes . (q * scale) -
+    질의 쪽에 스케일을 곱해 두면 정책 행렬은 복원하지 않고 정수 코드 그대로 곱함
+    (문장 임베딩은 공통 방향 성분이 커서 평균을 빼야 코드 범위를 잔차에 온전히 쓸 수 있음)
+    """
+
+    kind = 'int8'
+
+    def __init__(self, vectors):
+        normalized = normalize_rows(vectors)
+        self.mean = normalized.mean(axis=0)
+        residual = normalized - self.mean
+        self.scale = np.maximum(np.abs(residual).max(axis=0), 1e-12) / 127.0
+        self.data = np.clip(np.rint(residual / self.scale), -127, 127).astype(np.int8)
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + self.scale.nbytes + self.mean.nbytes
+
+    def scores(self, queries):
+        queries = np.asarray(queries, dtype=np.float32)
+        offset = queries @ self.mean
+        return super().scores(queries * self.scale) + np.expand_dims(offset, -1)
+
+    def _decode(self, start, stop):
+        return self.data[start:stop].astype(np.float32)
+
+    def take(self, indices):
+        return self.data[np.asarray(indices, dtype=np.int64)].astype(np.float32) * self.scale + self.mean
+
+
+def _kmeans(points, k, iterations=20, seed=0):
+    """곱 양자화 코드북 학습용 간단한 k-means (서로 다른 점 k개로 초기화)"""
+    rng = np.random.RandomState(seed)
+    centroids = points[rng.choice(len(points), size=k, replace=False)].copy()
+    point_norms = (points ** 2).sum(axis=1, keepdims=True)
+    for _ in range(iterations):
+        distances = point_norms - 2 * points @ centroids.T + (centroids ** 2).sum(axis=1)
+        assignment = distances.argmin(axis=1)
+        counts = np.bincount(assignment, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, points)
+        filled = counts > 0
+        updated = centroids.copy()
+        updated[filled] = sums[filled] / counts[filled, np.newaxis]
+        if np.allclose(updated, centroids):
+            break
+        centroids = updated
+    return centroids
+
+
+class PQStore(Float32Store):
+    """곱 양자화 (PQ): 벡터를 m개 부분공간으로 나눠 부분공간마다 최대 256개 중심점 번호(1바이트)만 저장
+
+    점수는 비대칭 거리 계산(ADC) - 질의마다 (m x 중심점) 내적표를 한 번 만들고
+    정책별로 코드가 가리키는 값만 더함 (정책 행렬 복원 없음). int8과 같이 평균을 뺀 잔차를 양자화
+    """
+
+    kind = 'pq'
+
+    def __init__(self, vectors, subspaces=None, iterations=20, seed=0):
+        normalized = normalize_rows(vectors)
+        count, dim = normalized.shape
+        self.mean = normalized.mean(axis=0)
+        self.subspaces = self._pick_subspaces(dim, subspaces)
+        self.sub_dim = dim // self.subspaces
+        clusters = max(1, min(256, count))
+
+        parts = (normalized - self.mean).reshape(count, self.subspaces, self.sub_dim)
+        self.codebooks = np.zeros((self.subspaces, clusters, self.sub_dim), dtype=np.float32)
+        self.data = np.zeros((count, self.subspaces), dtype=np.uint8)
+        for s in range(self.subspaces):
+            self.codebooks[s] = _kmeans(parts[:, s], clusters, iterations, seed + s)
+            distances = (self.codebooks[s] ** 2).sum(axis=1) - 2 * parts[:, s] @ self.codebooks[s].T
+            self.data[:, s] = distances.argmin(axis=1)
+        self._dim = dim
+
+    @staticmethod
+    def _pick_subspaces(dim, subspaces):
+        """차원을 나누어떨어지게 하는 부분공간 수 (기본: 부분공간당 8차원 내외)"""
+        target = subspaces or max(1, dim // 8)
+        for candidate in range(min(target, dim), 0, -1):
+            if dim % candidate == 0:
+                return candidate
+        return 1
+
+    @property
+    def dim(self):
+        return self._dim
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + self.codebooks.nbytes + self.mean.nbytes
+
+    def scores(self, queries):
+        queries = np.asarray(queries, dtype=np.float32)
+        single = queries.ndim == 1
+        queries = np.atleast_2d(queries)
+        # (질의, 부분공간, 중심점) 내적표
+        tables = np.einsum('qsd,scd->qsc', queries.reshape(len(queries), self.subspaces, self.sub_dim), self.codebooks)
+        subspace_index = np.arange(self.subspaces)
+        offsets = queries @ self.mean
+        result = np.empty((len(queries), len(self)), dtype=np.float32)
+        for start in range(0, len(self), self.chunk_size):
+            codes = self.data[start:start + self.chunk_size]
+            for row, table in enumerate(tables):
+                result[row, start:start + len(codes)] = table[subspace_index, codes].sum(axis=1) + offsets[row]
+        return result[0] if single else result
+
+    def take(self, indices):
+        codes = self.data[np.asarray(indices, dtype=np.int64)]
+        return self.codebooks[np.arange(self.subspaces), codes].reshape(len(codes), self.dim) + self.mean
+
+
+STORE_TYPES = {store.kind: store for store in (Float32Store, Int8Store, PQStore)}
+# 제거한 저장 방식 -> 사유 (설정에 남아 있으면 float32로 대체)
+# float16: numpy에는 반정밀도 BLAS가 없어 변환하든(astype) 반정밀도로 바로 곱하든 float32보다 10배 이상 느림
+REMOVED_STORE_TYPES = {'float16': '반정밀도 점수 계산이 float32보다 10배 이상 느림, 메모리를 줄이려면 int8 사용'}
+
+
+def build_embedding_store(vectors, kind='float32', **options):
+    """kind: float32 / int8 / pq (pq만 subspaces 등 옵션 사용)"""
+    kind = (kind or 'float32').lower()
+    if kind in REMOVED_STORE_TYPES:
+        print(f"임베딩 저장 방식 {kind}은(는) 더 이상 지원하지 않아 float32를 사용합니다 ({REMOVED_STORE_TYPES[kind]})")
+        kind = 'float32'
+    store_type = STORE_TYPES.get(kind)
+    if store_type is None:
+        raise ValueError(f"지원하지 않는 임베딩 저장 방식입니다: {kind} (가능: {', '.join(STORE_TYPES)})")
+    if store_type is PQStore:
+        return store_type(vectors, **options)
+    return store_type(vectors)
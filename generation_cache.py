@@ -0,0 +1,210 @@
+# generation_cache.py - 로드맵/상세 계획 생성 결과 캐시 (메모리 LRU + SQLite)
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class KeyedLock:
+    """키별 잠금 (같은 키를 기다리는 요청이 하나도 남지 않았을 때만 항목 삭제)
+
+    생성이 실패해도 대기 중인 요청과 새로 온 요청이 같은 잠금을 공유하므로 다시 생성할 때도 한 번에 하나만 실행
+    """
+
+    def __init__(self):
+        self._locks = {}  # 키 -> [잠금, 사용 중인 요청 수]
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def hold(self, key):
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    def __len__(self):
+        return len(self._locks)
+
+
+class LRUCache:
+    """스레드 안전한 LRU 캐시 (선택적으로 항목별 유효시간 적용)"""
+
+    def __init__(self, max_entries=256, ttl_seconds=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = KeyedLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            value, stored_at = item
+            if self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds:
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def get_or_create(self, key, factory):
+        """캐시에 있으면 반환하고, 없으면 같은 키의 동시 요청 중 하나만 factory()로 계산해 저장"""
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._key_locks.hold(key):
+            # 대기하는 동안 다른 요청이 계산했을 수 있음
+            value = self.get(key)
+            if value is None:
+                value = factory()
+                self.put(key, value)
+        return value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+            return item[0] if item else default
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def age_band(age):
+    """나이를 정책 대상 구간으로 변환"""
+    try:
+        age = int(age)
+    except (TypeError, ValueError):
+        return 'unknown'
+    if age < 18:
+        return 'under18'
+    if age <= 24:
+        return '18-24'
+    if age <= 29:
+        return '25-29'
+    if age <= 34:
+        return '30-34'
+    if age <= 39:
+        return '35-39'
+    return '40+'
+
+
+def profile_signature(user_profile):
+    """생성 결과에 영향을 주는 프로필 항목만 정규화한 서명"""
+    user_profile = user_profile or {}
+    support_needs = sorted(set(user_profile.get('support_needs') or []))
+    return json.dumps({
+        'support_needs': support_needs,
+        'housing_status': (user_profile.get('housing_status') or '').strip(),
+        'income_level': (user_profile.get('income_level') or '').strip(),
+        'age_band': age_band(user_profile.get('age'))
+    }, ensure_ascii=False, sort_keys=True)
+
+
+class GenerationCache:
+    """생성 결과 공유 캐시
+
+    1차: 프로세스 메모리 LRU, 2차: SQLite generation_cache 테이블.
+    같은 키를 동시에 요청하면 한 번만 생성하고 나머지는 결과를 기다린다.
+    """
+
+    def __init__(self, db_path='database/iruda.db', memory_size=256, ttl_seconds=7 * 24 * 3600):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.memory = LRUCache(memory_size, ttl_seconds)
+        self._key_locks = KeyedLock()
+        self.stats = {'memory_hits': 0, 'db_hits': 0, 'generated': 0}
+
+    @staticmethod
+    def make_key(kind, *parts):
+        raw = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+        return f"{kind}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+    def _db_get(self, key):
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT payload FROM generation_cache
+                WHERE cache_key = ? AND created_at >= ?
+            ''', (key, time.time() - self.ttl_seconds))
+            row = cursor.fetchone()
+            conn.close()
+            return json.loads(row[0]) if row else None
+        except Exception as e:
+            print(f"생성 캐시 조회 실패: {e}")
+            return None
+
+    def _db_put(self, key, kind, value):
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO generation_cache (cache_key, kind, payload, created_at)
+                VALUES (?, ?, ?, ?)
+            ''', (key, kind, json.dumps(value, ensure_ascii=False), time.time()))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"생성 캐시 저장 실패: {e}")
+
+    def get(self, key):
+        """캐시된 값의 복사본 반환 (호출 측에서 수정해도 캐시는 그대로)"""
+        value = self.memory.get(key)
+        if value is not None:
+            self.stats['memory_hits'] += 1
+            return copy.deepcopy(value)
+        value = self._db_get(key)
+        if value is not None:
+            self.stats['db_hits'] += 1
+            self.memory.put(key, value)
+            return copy.deepcopy(value)
+        return None
+
+    def put(self, key, kind, value, persist=True):
+        self.memory.put(key, value)
+        if persist:
+            self._db_put(key, kind, value)
+
+    def get_or_create(self, kind, key, factory, persist=True):
+        """캐시에 있으면 반환하고, 없으면 factory()로 한 번만 생성해 저장"""
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._key_locks.hold(key):
+            # 대기하는 동안 다른 요청이 생성했을 수 있음
+            value = self.get(key)
+            if value is not None:
+                return value
+            value = factory()
+            self.stats['generated'] += 1
+            self.put(key, kind, value, persist)
+        return copy.deepcopy(value)
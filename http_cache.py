@@ -0,0 +1,181 @@
+# http_cache.py - 응답 압축(gzip/brotli), 버전 카운터 기반 ETag/304, 내용 해시가 붙은 정적 파일 URL
+#
+# - 압축: Accept-Encoding에 따라 brotli(brotli 패키지가 있을 때) 또는 gzip, min_size 미만이면 그대로
+# - ETag: conditional(etag_for) 데코레이터가 본문을 만들기 전에 버전 값으로 ETag를 계산해
+#         클라이언트 캐시와 같으면 바로 304 (압축한 응답의 ETag에는 "-gzip"/"-br"을 붙여 강한 ETag 유지)
+# - 정적 파일: url_for('static', ...)에 ?v=<내용 해시>를 붙이고 그 URL은 1년 immutable 캐시
+import gzip
+import hashlib
+import os
+import threading
+from functools import wraps
+
+from flask import make_response, request
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/javascript', 'application/javascript',
+    'application/json', 'image/svg+xml'
+}
+ENCODINGS = ('br', 'gzip')
+STATIC_MAX_AGE = 365 * 24 * 3600
+
+
+def version_etag(*parts):
+    """버전 카운터/날짜 같은 값들로 만드는 ETag (본문을 해시하지 않음)"""
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:24]
+
+
+def _matching_etag(etag):
+    """If-None-Match에 이 ETag(또는 압축본 ETag)가 있으면 그 값"""
+    for candidate in [etag] + [f'{etag}-{encoding}' for encoding in ENCODINGS]:
+        if request.if_none_match.contains_weak(candidate):
+            return candidate
+    return None
+
+
+def conditional(etag_for):
+    """etag_for(뷰 인자)로 ETag를 먼저 계산해 바뀌지 않았으면 본문을 만들지 않고 304
+
+    실패 응답({'success': False})에는 ETag를 붙이지 않음. 사용자별 데이터라 Cache-Control은 private, no-cache
+    (브라우저가 매번 If-None-Match로 재검증)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = etag_for(*args, **kwargs)
+            matched = _matching_etag(etag)
+            if matched:
+                response = make_response('', 304)
+                response.set_etag(matched)
+                response.headers['Cache-Control'] = 'private, no-cache'
+                response.vary.add('Accept-Encoding')
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            payload = response.get_json(silent=True) if response.is_json else None
+            if response.status_code == 200 and not (isinstance(payload, dict) and payload.get('success') is False):
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+class HttpCache:
+    """Flask 앱에 응답 압축과 정적 파일 캐시 헤더를 등록"""
+
+    def __init__(self, app, min_size=1024, gzip_level=6, brotli_quality=5):
+        self.app = app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        # 정적 파일 내용 해시 {파일명: (수정 시각, 해시)}, 압축본 {(파일명, 수정 시각, 인코딩): 바이트}
+        self._static_versions = {}
+        self._static_compressed = {}
+        self._lock = threading.Lock()
+        app.url_defaults(self.add_static_version)
+        app.after_request(self.after_request)
+
+    def _static_path(self, filename):
+        path = safe_join(self.app.static_folder, filename)
+        return path if path and os.path.isfile(path) else None
+
+    def static_version(self, filename):
+        """정적 파일 내용 해시 앞 10자리 (파일이 바뀌면 수정 시각으로 감지해 다시 계산)"""
+        path = self._static_path(filename)
+        if not path:
+            return None
+        mtime = os.path.getmtime(path)
+        cached = self._static_versions.get(filename)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()[:10]
+        with self._lock:
+            self._static_versions[filename] = (mtime, digest)
+        return digest
+
+    def add_static_version(self, endpoint, values):
+        """url_for('static', filename=...)에 ?v=<내용 해시> 추가"""
+        if endpoint == 'static' and 'filename' in values and 'v' not in values:
+            version = self.static_version(values['filename'])
+            if version:
+                values['v'] = version
+
+    def choose_encoding(self):
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level)
+
+    def _static_body(self, filename, encoding):
+        """정적 파일 압축본 (파일 버전별로 한 번만 압축)"""
+        path = self._static_path(filename)
+        if not path:
+            return None
+        key = (filename, os.path.getmtime(path), encoding)
+        body = self._static_compressed.get(key)
+        if body is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+            if len(data) < self.min_size:
+                return None
+            body = self.compress(data, encoding)
+            with self._lock:
+                self._static_compressed = {k: v for k, v in self._static_compressed.items() if k[0] != filename}
+                self._static_compressed[key] = body
+        return body
+
+    def after_request(self, response):
+        is_static = request.endpoint == 'static'
+        if is_static and response.status_code in (200, 304):
+            filename = (request.view_args or {}).get('filename')
+            if request.args.get('v') and request.args.get('v') == self.static_version(filename):
+                # 내용 해시가 URL에 있으므로 파일이 바뀌면 URL도 바뀜
+                response.headers['Cache-Control'] = f'public, max-age={STATIC_MAX_AGE}, immutable'
+
+        if (response.status_code != 200 or response.mimetype not in COMPRESSIBLE_TYPES
+                or 'Content-Encoding' in response.headers or response.is_streamed and not is_static):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = self.choose_encoding()
+        if encoding is None:
+            return response
+
+        if is_static:
+            body = self._static_body(request.view_args['filename'], encoding)
+            if body is None:
+                return response
+            if hasattr(response.response, 'close'):
+                response.response.close()
+            response.direct_passthrough = False
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            body = self.compress(data, encoding)
+
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            # 압축본은 바이트가 다르므로 강한 ETag를 인코딩별로 구분
+            response.set_etag(f'{etag}-{encoding}', weak=weak)
+            if request.if_none_match.contains_weak(response.get_etag()[0]):
+                response.set_data(b'')
+                response.status_code = 304
+                del response.headers['Content-Encoding']
+        return response
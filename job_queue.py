@@ -0,0 +1,352 @@
+# job_queue.py - SQLite 기반 백그라운드 작업 큐 (외부 브로커 없이 로드맵/상세 계획/재계획/신청서 처리)
+import json
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class JobQueue:
+    """jobs 테이블을 큐로 쓰는 작업 처리기
+
+    - 작업은 DB에 저장되므로 서버를 재시작해도 남아 있고, 실행 중 죽은 작업은 임대 시간이 지나면 다시 대기열로 돌아감
+    - 우선순위 숫자가 작을수록 먼저 실행 (같으면 먼저 등록된 작업)
+    - 실패하면 지터가 있는 지수 백오프 후 max_attempts까지 재시도
+    - 작업 선점은 BEGIN IMMEDIATE 트랜잭션으로 처리해 여러 프로세스가 같은 DB를 공유해도 중복 실행하지 않음
+    - 실행 중에는 임대 시간의 1/3마다 임대를 연장하고, 결과는 임대를 가진 워커(locked_by)만 기록
+      (임대가 끝나 다른 워커가 다시 가져간 작업의 늦은 결과는 버림)
+    """
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    def __init__(self, db_path='database/iruda.db', poll_interval=1.0, lease_seconds=300,
+                 retry_base=5.0, retry_cap=300.0, result_ttl=24 * 3600):
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+        self.result_ttl = result_ttl
+
+        self._handlers = {}  # kind -> (handler, 기본 우선순위, 기본 최대 시도 횟수)
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._kinds = None  # 이 프로세스가 처리할 작업 종류 (None이면 전부)
+        self._start_lock = threading.Lock()
+        self._worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    def _connect(self):
+        # isolation_level=None: 트랜잭션을 직접 BEGIN/COMMIT으로 관리
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def register(self, kind, handler, priority=5, max_attempts=3):
+        """작업 종류별 처리 함수 등록 (handler(payload) -> JSON으로 저장 가능한 결과)"""
+        self._handlers[kind] = (handler, priority, max_attempts)
+
+    def kinds(self):
+        """등록된 작업 종류"""
+        return list(self._handlers)
+
+    def enqueue(self, kind, payload, user_id=None, priority=None, max_attempts=None,
+                dedupe_key=None, delay=0):
+        """작업 등록 후 작업 ID 반환
+
+        dedupe_key가 같은 작업이 아직 대기/실행 중이면 새로 만들지 않고 그 작업 ID를 반환
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"등록되지 않은 작업 종류입니다: {kind}")
+        _, default_priority, default_attempts = self._handlers[kind]
+        now = time.time()
+        job_id = uuid.uuid4().hex
+
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            if dedupe_key:
+                row = conn.execute('''
+                    SELECT id FROM jobs
+                    WHERE dedupe_key = ? AND status IN ('queued', 'running')
+                    LIMIT 1
+                ''', (dedupe_key,)).fetchone()
+                if row:
+                    conn.execute('COMMIT')
+                    return row[0]
+            conn.execute('''
+                INSERT INTO jobs (id, kind, user_id, payload, status, priority, attempts,
+                                  max_attempts, dedupe_key, run_after, created_at, updated_at)
+                VALUES (?, ?, ?, ?, 'queued', ?, 0, ?, ?, ?, ?, ?)
+            ''', (
+                job_id, kind, user_id, json.dumps(payload, ensure_ascii=False),
+                default_priority if priority is None else priority,
+                max_attempts or default_attempts, dedupe_key, now + delay, now, now
+            ))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id, user_id=None):
+        """작업 상태 조회 (user_id를 주면 본인 작업만)"""
+        conn = self._connect()
+        try:
+            row = conn.execute('''
+                SELECT id, kind, user_id, status, priority, attempts, max_attempts,
+                       result, error, created_at, updated_at
+                FROM jobs WHERE id = ?
+            ''', (job_id,)).fetchone()
+        finally:
+            conn.close()
+
+        if not row or (user_id is not None and row[2] != user_id):
+            return None
+        return {
+            'id': row[0],
+            'kind': row[1],
+            'status': row[3],
+            'priority': row[4],
+            'attempts': row[5],
+            'max_attempts': row[6],
+            'result': json.loads(row[7]) if row[7] else None,
+            'error': row[8],
+            'created_at': row[9],
+            'updated_at': row[10]
+        }
+
+    def claim(self, worker_id, kinds=None):
+        """실행할 작업 하나를 선점 (kinds가 있으면 그 종류만, 없으면 None)"""
+        now = time.time()
+        kind_filter, kind_params = '', ()
+        if kinds is not None:
+            kinds = sorted(kinds)
+            kind_filter = f" AND kind IN ({','.join('?' * len(kinds))})"
+            kind_params = tuple(kinds)
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            # 임대 시간이 지난 실행 중 작업 (워커가 죽었거나 서버 재시작) 회수
+            conn.execute('''
+                UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+                                error = '작업 임대 시간 초과', locked_by = NULL, updated_at = ?
+                WHERE status = 'running' AND lease_expires_at < ?
+            ''', (now, now))
+            row = conn.execute(f'''
+                SELECT id, kind, payload, attempts, max_attempts FROM jobs
+                WHERE status = 'queued' AND run_after <= ?{kind_filter}
+                ORDER BY priority, created_at
+                LIMIT 1
+            ''', (now,) + kind_params).fetchone()
+            if row:
+                conn.execute('''
+                    UPDATE jobs SET status = 'running', attempts = attempts + 1,
+                                    locked_by = ?, lease_expires_at = ?, updated_at = ?
+                    WHERE id = ?
+                ''', (worker_id, now + self.lease_seconds, now, row[0]))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+        if not row:
+            return None
+        return {'id': row[0], 'kind': row[1], 'payload': json.loads(row[2]),
+                'attempts': row[3] + 1, 'max_attempts': row[4], 'worker_id': worker_id}
+
+    def extend_lease(self, job):
+        """실행 중인 작업의 임대 연장 (이미 다른 워커에게 넘어갔으면 False)"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            return conn.execute('''
+                UPDATE jobs SET lease_expires_at = ?, updated_at = ?
+                WHERE id = ? AND locked_by = ? AND status = 'running'
+            ''', (now + self.lease_seconds, now, job['id'], job['worker_id'])).rowcount > 0
+        finally:
+            conn.close()
+
+    def _keep_lease(self, job, done):
+        """작업이 끝날 때까지 임대 시간의 1/3마다 연장 (워커 프로세스가 죽으면 연장이 멈춰 회수됨)"""
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                if not self.extend_lease(job):
+                    print(f"작업 임대를 잃음 ({job['kind']} {job['id']}), 결과는 기록하지 않음")
+                    return
+            except sqlite3.Error as e:
+                print(f"작업 임대 연장 실패 ({job['id']}): {e}")
+
+    def _finish(self, job, status, result=None, error=None, run_after=None):
+        """작업 결과 기록 (임대를 가진 워커일 때만, 기록했으면 True)"""
+        conn = self._connect()
+        try:
+            updated = conn.execute('''
+                UPDATE jobs SET status = ?, result = ?, error = ?, locked_by = NULL,
+                                lease_expires_at = NULL, run_after = COALESCE(?, run_after), updated_at = ?
+                WHERE id = ? AND locked_by = ?
+            ''', (
+                status,
+                json.dumps(result, ensure_ascii=False) if result is not None else None,
+                error, run_after, time.time(), job['id'], job['worker_id']
+            )).rowcount
+        finally:
+            conn.close()
+        if not updated:
+            print(f"임대가 끝난 작업의 결과 무시 ({job['kind']} {job['id']}, {job['worker_id']})")
+        return updated > 0
+
+    def _retry_delay(self, attempts):
+        return random.uniform(self.retry_base / 2, min(self.retry_cap, self.retry_base * (2 ** (attempts - 1))))
+
+    def run_job(self, job):
+        """선점한 작업 실행 후 결과/재시도/실패 기록"""
+        handler = self._handlers.get(job['kind'], (None,))[0]
+        if handler is None:
+            self._record(job, self.STATUS_FAILED, error=f"처리 함수가 없는 작업 종류: {job['kind']}")
+            return
+
+        # 결과를 기록할 때까지 임대 유지 (기록이 늦어져도 다른 워커가 가져가 다시 실행하지 않도록)
+        done = threading.Event()
+        threading.Thread(target=self._keep_lease, args=(job, done), daemon=True).start()
+        try:
+            # 처리 함수 오류만 재시도 대상 (결과 기록 오류로 이미 실행한 작업을 다시 실행하지 않음)
+            try:
+                result = handler(job['payload'])
+            except Exception as e:
+                print(f"작업 실패 ({job['kind']} {job['id']}, {job['attempts']}/{job['max_attempts']}회): {e}")
+                if job['attempts'] < job['max_attempts']:
+                    self._record(job, self.STATUS_QUEUED, error=str(e),
+                                 run_after=time.time() + self._retry_delay(job['attempts']))
+                else:
+                    self._record(job, self.STATUS_FAILED, error=str(e))
+                return
+            self._record(job, self.STATUS_DONE, result=result)
+        finally:
+            done.set()
+
+    def _record(self, job, status, attempts=5, **fields):
+        """작업 결과 기록 (DB 잠금 같은 저장 오류는 잠시 뒤 다시 시도하고, 끝내 실패하면 로그만 남김)"""
+        for attempt in range(1, attempts + 1):
+            try:
+                return self._finish(job, status, **fields)
+            except (TypeError, ValueError) as e:
+                # JSON으로 저장할 수 없는 결과
+                status, fields = self.STATUS_FAILED, {'error': f"작업 결과를 저장할 수 없습니다: {e}"}
+            except sqlite3.Error as e:
+                print(f"작업 결과 기록 실패 ({job['kind']} {job['id']}, {attempt}/{attempts}회): {e}")
+                if attempt < attempts:
+                    time.sleep(min(2 ** attempt, 30))
+        print(f"작업 결과를 기록하지 못함 ({job['kind']} {job['id']}), 임대가 끝나면 다시 대기열로 돌아감")
+        return False
+
+    def _worker_loop(self, worker_id):
+        last_purge = 0.0
+        while not self._stopping.is_set():
+            try:
+                job = self.claim(worker_id, self._kinds)
+            except sqlite3.Error as e:
+                print(f"작업 선점 실패 ({worker_id}): {e}")
+                job = None
+
+            if job:
+                try:
+                    self.run_job(job)
+                except Exception as e:
+                    # 어떤 오류에도 워커 스레드는 계속 동작
+                    print(f"작업 처리 중 예기치 않은 오류 ({worker_id}, {job['kind']} {job['id']}): {e}")
+                continue
+
+            if time.time() - last_purge > 3600:
+                try:
+                    self.purge()
+                except sqlite3.Error as e:
+                    print(f"지난 작업 정리 실패 ({worker_id}): {e}")
+                last_purge = time.time()
+
+            # 새 작업이 등록되면 바로 깨어나고, 아니면 주기적으로 확인 (다른 프로세스가 등록한 작업/재시도 대기)
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def start(self, num_workers=2, kinds=None):
+        """워커 스레드 시작 (여러 번 호출해도 한 번만 시작, kinds가 있으면 그 작업 종류만 처리)"""
+        with self._start_lock:
+            if self._threads:
+                return
+            self._stopping.clear()
+            self._kinds = set(kinds) if kinds is not None else None
+            for i in range(num_workers):
+                worker_id = f"{self._worker_prefix}:{i}"
+                thread = threading.Thread(target=self._worker_loop, args=(worker_id,),
+                                          name=f'job-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        print(f"✅ 백그라운드 작업 워커 {num_workers}개 시작")
+
+    def is_running(self):
+        return bool(self._threads)
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def purge(self):
+        """유효시간이 지난 완료/실패 작업 삭제"""
+        try:
+            conn = self._connect()
+            conn.execute('''
+                DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?
+            ''', (time.time() - self.result_ttl,))
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"작업 정리 실패: {e}")
+
+    def stats(self):
+        """상태별 작업 수"""
+        conn = self._connect()
+        try:
+            rows = conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        finally:
+            conn.close()
+        counts = {status: 0 for status in ('queued', 'running', 'done', 'failed')}
+        counts.update(dict(rows))
+        counts['workers'] = len(self._threads)
+        return counts
+
+
+if __name__ == '__main__':
+    # 웹 서버와 별도로 작업 워커만 실행: python job_queue.py [워커 수]
+    # (app.py를 불러와 작업 처리 함수를 등록한 큐를 그대로 사용)
+    # 추천/역매칭은 임베딩 매처가 있어야 하므로 웹 서버와 같이 초기화하고, 실패하면 그 작업은 웹 서버 워커에 맡김
+    # (매처 없이 실행하면 키워드 추천이 저장되고 새 정책이 임베딩 매칭 없이 '본 정책'으로 기록됨)
+    import sys
+    import app
+
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else int(os.getenv('JOB_WORKERS', 2))
+    kinds = None
+    if app.initialize_enhanced_matcher():
+        print("✅ Enhanced Policy Matcher 준비 완료!")
+    else:
+        kinds = set(app.job_queue.kinds()) - set(app.MATCHER_JOB_KINDS)
+        print(f"⚠️ 매처 없이 실행: {', '.join(sorted(app.MATCHER_JOB_KINDS))} 작업은 처리하지 않음 "
+              f"(웹 서버 워커(JOB_WORKERS > 0)가 처리)")
+    app.job_queue.start(workers, kinds)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("작업 워커 종료 중...")
+        app.job_queue.stop()
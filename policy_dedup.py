@@ -0,0 +1,182 @@
+# policy_dedup.py - 유사 중복 정책 묶기 (MinHash/LSH, 선택적으로 임베딩 코사인)
+import re
+import zlib
+
+import numpy as np
+
+# 중복 판단에 쓰는 필드 (기관명은 제외: 같은 사업이 여러 기관 이름으로 올라오는 경우가 대부분)
+DEDUP_FIELDS = ('서비스명', '지원대상', '지원내용')
+
+# MinHash 해시 계산용 메르센 소수
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def shingle_text(policy):
+    """공백/문장부호를 걷어낸 비교용 본문"""
+    text = ' '.join(str(policy.get(field) or '') for field in DEDUP_FIELDS)
+    return re.sub(r'[\s\W_]+', '', text.lower())
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def make_shingles(text, size=3):
+    """글자 n-gram 집합 (짧은 본문은 통째로 하나)"""
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class _UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, x):
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            # 번호가 작은 (먼저 로드된) 쪽을 대표로
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+class PolicyDeduplicator:
+    """MinHash 서명 + LSH 밴딩으로 후보 쌍만 골라 자카드 유사도를 확인하고 그룹으로 묶음
+
+    - 서명: 글자 3-gram 해시에 무작위 선형 해시 num_perm개를 적용한 최솟값 (numpy 벡터 연산)
+    - LSH: 서명을 bands개 구간으로 나눠 한 구간이라도 같으면 후보 (전체 쌍 비교 없이 후보만 확인)
+    - 본문이 복사된 다른 사업을 묶지 않도록 서비스명 2-gram 유사도도 name_threshold 이상이어야 함
+    - 그룹 대표는 본문이 가장 충실한 정책, 나머지는 대표의 '_variants'로 보관
+    """
+
+    def __init__(self, threshold=0.8, name_threshold=0.5, num_perm=64, bands=16, shingle_size=3, seed=42):
+        if num_perm % bands:
+            raise ValueError("num_perm은 bands로 나누어떨어져야 합니다.")
+        self.threshold = threshold
+        self.name_threshold = name_threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+
+    def signature(self, shingles):
+        if not shingles:
+            return np.full(self.num_perm, MERSENNE_PRIME, dtype=np.uint64)
+        hashes = np.array([zlib.crc32(s.encode('utf-8')) for s in shingles], dtype=np.uint64)
+        # (a * h + b) mod p 를 (num_perm, shingle 수) 행렬로 한 번에 계산
+        permuted = (np.outer(self._a, hashes) + self._b[:, np.newaxis]) % MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def candidate_pairs(self, signatures):
+        """LSH 밴드가 하나라도 같은 정책 쌍"""
+        pairs = set()
+        for band in range(self.bands):
+            buckets = {}
+            start = band * self.rows
+            for index, signature in enumerate(signatures):
+                key = signature[start:start + self.rows].tobytes()
+                buckets.setdefault(key, []).append(index)
+            for members in buckets.values():
+                for i in range(len(members)):
+                    for j in range(i + 1, len(members)):
+                        pairs.add((members[i], members[j]))
+        return pairs
+
+    @staticmethod
+    def _richness(policy):
+        return sum(len(str(policy.get(field) or '')) for field in ('지원대상', '지원내용', '신청방법', '연락처'))
+
+    def _build_groups(self, policies, union_find):
+        groups = {}
+        for index in range(len(policies)):
+            groups.setdefault(union_find.find(index), []).append(index)
+
+        canonical = []
+        report_groups = []
+        for members in groups.values():
+            best = max(members, key=lambda i: (self._richness(policies[i]), -i))
+            representative = policies[best]
+            variants = [policies[i] for i in members if i != best]
+            # 이전 단계에서 묶인 변형도 함께 보관
+            for policy in [representative] + variants:
+                for nested in policy.pop('_variants', []):
+                    variants.append(nested)
+            representative['_variants'] = variants
+            canonical.append((min(members), representative))
+            if variants:
+                report_groups.append({
+                    'canonical': representative.get('서비스명'),
+                    'variants': [
+                        f"{variant.get('서비스명')} ({variant.get('기관명') or '-'})" for variant in variants
+                    ]
+                })
+        # 원래 로드 순서 유지
+        canonical.sort(key=lambda item: item[0])
+        return [policy for _, policy in canonical], report_groups
+
+    def deduplicate(self, policies):
+        """유사 중복을 묶은 대표 정책 목록과 압축 보고서 반환"""
+        shingle_sets = [make_shingles(shingle_text(policy), self.shingle_size) for policy in policies]
+        name_sets = [
+            make_shingles(re.sub(r'[\s\W_]+', '', str(policy.get('서비스명') or '').lower()), 2)
+            for policy in policies
+        ]
+        signatures = [self.signature(shingles) for shingles in shingle_sets]
+
+        union_find = _UnionFind(len(policies))
+        candidates = self.candidate_pairs(signatures)
+        merged_pairs = 0
+        for i, j in candidates:
+            # 후보 쌍만 실제 자카드 유사도로 확인
+            if (jaccard(shingle_sets[i], shingle_sets[j]) >= self.threshold
+                    and jaccard(name_sets[i], name_sets[j]) >= self.name_threshold):
+                union_find.union(i, j)
+                merged_pairs += 1
+
+        canonical, groups = self._build_groups(policies, union_find)
+        return canonical, compression_report(len(policies), canonical, groups,
+                                             candidate_pairs=len(candidates), merged_pairs=merged_pairs)
+
+    def merge_by_embedding(self, policies, embeddings, cosine_threshold=0.97):
+        """임베딩 코사인 유사도가 임계값 이상인 대표 정책을 한 번 더 묶음
+
+        (남은 정책 목록, 남긴 행 번호) 반환 - 호출 측에서 임베딩 행렬을 같은 행 번호로 축소
+        """
+        normalized = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        union_find = _UnionFind(len(policies))
+        rows, cols = np.nonzero(np.triu(normalized @ normalized.T >= cosine_threshold, k=1))
+        for i, j in zip(rows, cols):
+            union_find.union(int(i), int(j))
+
+        groups = {}
+        for index in range(len(policies)):
+            groups.setdefault(union_find.find(index), []).append(index)
+
+        # 대표는 그룹의 첫 정책 (임베딩 행을 그대로 재사용)
+        keep = sorted(groups)
+        for root in keep:
+            representative = policies[root]
+            for index in groups[root][1:]:
+                representative.setdefault('_variants', []).append(policies[index])
+                representative['_variants'].extend(policies[index].pop('_variants', []))
+        return [policies[root] for root in keep], keep
+
+
+def compression_report(original_count, canonical, groups, **extra):
+    kept = len(canonical)
+    return {
+        'original': original_count,
+        'canonical': kept,
+        'removed': original_count - kept,
+        'compression_ratio': round(kept / original_count, 3) if original_count else 1.0,
+        'groups': groups,
+        **extra
+    }
@@ -1,12 +1,14 @@
 # policy_matcher.py - 의미적 검색 시스템
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 import json
 import os
 import re
 from datetime import datetime
 import pandas as pd
+from policy_dedup import PolicyDeduplicator
+from embedding_store import build_embedding_store, normalize_rows
+from embedding_projection import load_or_fit_projection
 
 class EnhancedPolicyMatcher:
     def __init__(self):
@@ -22,8 +24,10 @@ class EnhancedPolicyMatcher:
         
         # 정책 데이터 및 임베딩 초기화
         self.policies = []
-        self.policy_embeddings = None
+        self.embedding_store = None  # 정규화된 정책 임베딩 (POLICY_EMBEDDING_STORAGE 방식으로 압축 저장)
+        self.projection = None  # 선택: 차원 축소 투영 (POLICY_EMBEDDING_PROJECTION)
         self.policy_texts = []
+        self.dedup_report = None
         self.initialize_policy_embeddings()
         
         print(f"정책 매칭 시스템 준비 완료 ({len(self.policies)}개 정책)")
@@ -38,6 +42,12 @@ class EnhancedPolicyMatcher:
                 print("경고: 정책 데이터가 없습니다.")
                 return
             
+            # 여러 시트에 겹쳐 올라온 유사 중복 정책은 대표 하나만 인덱스에 남김
+            if os.getenv('POLICY_DEDUP', '1') == '1':
+                deduplicator = PolicyDeduplicator(threshold=float(os.getenv('POLICY_DEDUP_THRESHOLD', 0.8)))
+                self.policies, self.dedup_report = deduplicator.deduplicate(self.policies)
+                print(f"유사 중복 정책 정리: {self.dedup_report['original']}개 -> {self.dedup_report['canonical']}개")
+            
             # 정책별 검색용 텍스트 생성
             self.policy_texts = []
             for policy in self.policies:
@@ -46,19 +56,46 @@ class EnhancedPolicyMatcher:
             
             # 일괄 벡터화 (배치 처리로 성능 향상)
             print("정책 데이터 벡터화 중...")
-            self.policy_embeddings = self.model.encode(
+            policy_embeddings = self.model.encode(
                 self.policy_texts, 
                 show_progress_bar=True,
                 batch_size=16,
                 convert_to_numpy=True
             )
             
-            print(f"정책 임베딩 생성 완료: {self.policy_embeddings.shape}")
+            # 선택: 임베딩이 거의 같은 정책을 한 번 더 묶어 행렬 축소 (예: POLICY_DEDUP_COSINE=0.97)
+            cosine_threshold = os.getenv('POLICY_DEDUP_COSINE')
+            if cosine_threshold and self.dedup_report:
+                self.policies, keep = PolicyDeduplicator().merge_by_embedding(
+                    self.policies, policy_embeddings, float(cosine_threshold)
+                )
+                policy_embeddings = policy_embeddings[keep]
+                self.policy_texts = [self.policy_texts[i] for i in keep]
+                self.dedup_report['canonical'] = len(self.policies)
+                self.dedup_report['removed'] = self.dedup_report['original'] - len(self.policies)
+                self.dedup_report['compression_ratio'] = round(len(self.policies) / self.dedup_report['original'], 3)
+                self.dedup_report['cosine_threshold'] = float(cosine_threshold)
+            
+            # 선택: 정책 임베딩으로 학습한 투영으로 차원 축소 (질의도 encode_queries에서 같은 투영 적용)
+            projection_method = os.getenv('POLICY_EMBEDDING_PROJECTION', '').lower()
+            if projection_method:
+                self.projection = load_or_fit_projection(
+                    os.getenv('POLICY_PROJECTION_PATH', 'database/policy_projection.npz'),
+                    policy_embeddings, projection_method, int(os.getenv('POLICY_EMBEDDING_DIM', 256))
+                )
+                policy_embeddings = self.projection.transform(policy_embeddings)
+            
+            # 원본 float32 행렬은 버리고 압축 저장소만 보관 (float32 / int8 / pq)
+            self.embedding_store = build_embedding_store(
+                policy_embeddings, os.getenv('POLICY_EMBEDDING_STORAGE', 'float32')
+            )
+            print(f"정책 임베딩 생성 완료: {policy_embeddings.shape} "
+                  f"({self.embedding_store.kind}, {self.embedding_store.nbytes / 1024:.0f}KB)")
             
         except Exception as e:
             print(f"정책 임베딩 초기화 실패: {e}")
             self.policies = []
-            self.policy_embeddings = None
+            self.embedding_store = None
     
     def create_policy_search_text(self, policy):
         """정책 데이터를 검색에 최적화된 텍스트로 변환"""
@@ -91,9 +128,12 @@ class EnhancedPolicyMatcher:
         
         return " ".join(text_parts)
     
-    def semantic_search(self, query, user_profile=None, top_k=10):
-        """의미적 유사도 기반 정책 검색"""
-        if self.policy_embeddings is None:
+    def semantic_search(self, query, user_profile=None, top_k=10, diversity=0.0):
+        """의미적 유사도 기반 정책 검색
+
+        diversity > 0 이면 MMR로 재정렬해 비슷한 정책이 상위에 몰리지 않게 함 (0~1, 클수록 다양성 우선)
+        """
+        if self.embedding_store is None:
             print("경고: 정책 임베딩이 없어 기존 방식 사용")
             return self.fallback_to_keyword_search(query)
         
@@ -102,10 +142,10 @@ class EnhancedPolicyMatcher:
             enhanced_query = self.enhance_search_query(query, user_profile)
             
             # 2단계: 쿼리 벡터화
-            query_embedding = self.model.encode([enhanced_query])
+            query_embedding = self.encode_queries([enhanced_query])[0]
             
-            # 3단계: 코사인 유사도 계산
-            similarities = cosine_similarity(query_embedding, self.policy_embeddings)[0]
+            # 3단계: 코사인 유사도 계산 (압축된 저장소에서 바로 계산)
+            similarities = self.embedding_store.scores(query_embedding)
             
             # 4단계: 상위 후보 선택 (더 많이 선택해서 규칙 기반 필터링)
             top_indices = np.argsort(similarities)[::-1][:top_k * 3]
@@ -129,13 +169,16 @@ class EnhancedPolicyMatcher:
                 
                 candidates.append({
                     'policy': policy,
+                    'index': idx,
                     'semantic_score': float(similarities[idx]),
                     'eligibility': eligibility,
                     'combined_score': combined_score
                 })
             
-            # 6단계: 종합 점수로 재정렬
+            # 6단계: 종합 점수로 재정렬 (선택: MMR로 다양성 반영)
             candidates.sort(key=lambda x: x['combined_score'], reverse=True)
+            if diversity and len(candidates) > 1:
+                candidates = self.rerank_mmr(candidates, diversity, top_k)
             
             # 7단계: 상위 결과만 반환 (매칭 정보 포함)
             final_results = []
@@ -155,6 +198,43 @@ class EnhancedPolicyMatcher:
             print(f"의미적 검색 오류: {e}")
             return self.fallback_to_keyword_search(query)
     
+    @property
+    def embedding_key(self):
+        """질의 임베딩 공간 식별자 (차원 축소 설정이 바뀌면 달라짐)"""
+        return self.projection.key if self.projection is not None else 'full'
+    
+    def encode_queries(self, texts):
+        """질의 임베딩 - 정책 인덱스와 같은 투영을 적용하고 정규화한 float32 행렬"""
+        embeddings = self.model.encode(texts, batch_size=32, convert_to_numpy=True)
+        if self.projection is not None:
+            embeddings = self.projection.transform(embeddings)
+        return normalize_rows(embeddings)
+    
+    def rerank_mmr(self, candidates, diversity, top_k):
+        """최대 한계 관련성(MMR) 재정렬
+
+        이미 계산된 후보 임베딩만 사용 (추가 인코딩 없음): 후보 수 m에 대해 (m x m) 유사도 행렬 한 번,
+        선택할 때마다 '이미 고른 정책과의 최대 유사도' 벡터만 갱신
+        """
+        vectors = normalize_rows(self.embedding_store.take([candidate['index'] for candidate in candidates]))
+        pairwise = vectors @ vectors.T
+        relevance = np.array([candidate['combined_score'] for candidate in candidates], dtype=np.float32)
+
+        selected = [int(np.argmax(relevance))]
+        available = np.ones(len(candidates), dtype=bool)
+        available[selected[0]] = False
+        max_similarity = pairwise[selected[0]].copy()
+
+        while len(selected) < min(top_k, len(candidates)):
+            mmr_scores = (1 - diversity) * relevance - diversity * max_similarity
+            mmr_scores[~available] = -np.inf
+            best = int(np.argmax(mmr_scores))
+            selected.append(best)
+            available[best] = False
+            np.maximum(max_similarity, pairwise[best], out=max_similarity)
+
+        return [candidates[i] for i in selected]
+    
     def enhance_search_query(self, query, user_profile):
         """사용자 프로필을 바탕으로 검색 쿼리 확장"""
         enhanced_parts = [query]
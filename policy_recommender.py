@@ -0,0 +1,219 @@
+# policy_recommender.py - 사용자별 추천 정책 사전 계산 (프로필/카탈로그 변경 시 일괄 갱신)
+import hashlib
+import json
+import sqlite3
+import time
+
+import numpy as np
+
+# 지원 필요 영역 -> (정책 본문 키워드, 점수)
+NEED_KEYWORDS = {
+    '주거지원': (('주거', '임대'), 3),
+    '경제지원': (('생계', '급여'), 3),
+    '취업지원': (('취업', '일자리'), 3),
+    '교육지원': (('교육', '학비'), 3),
+    '심리지원': (('상담', '심리'), 2),
+}
+
+# 추천용 기본 질의 (프로필 항목을 덧붙여 사용자별 질의로 확장)
+BASE_QUERY = '자립준비청년 지원 정책'
+
+
+def keyword_score(policy, support_needs):
+    """지원 필요 영역 키워드 점수 (자립준비청년 대상 정책 가산)"""
+    policy_text = ' '.join(
+        str(policy.get(field) or '') for field in ('서비스명', '지원내용', '지원대상')
+    ).lower()
+    score = 0
+    for need in support_needs:
+        keywords, weight = NEED_KEYWORDS.get(need, ((), 0))
+        if any(keyword in policy_text for keyword in keywords):
+            score += weight
+    if '자립' in policy_text or '청소년' in policy_text:
+        score += 2
+    return score
+
+
+def catalog_version(catalog):
+    """카탈로그 내용 해시 (정책 추가/삭제/수정 시 바뀜)"""
+    digest = hashlib.sha1()
+    for policy in catalog:
+        fields = {key: value for key, value in policy.items() if not key.startswith('_')}
+        digest.update(json.dumps(fields, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def matcher_covers_catalog(catalog, matcher):
+    """매처 임베딩을 카탈로그에 쓸 수 있는지 (카탈로그가 매처의 정책 목록과 같아야 행 번호가 일치)"""
+    return (matcher is not None and matcher.embedding_store is not None
+            and len(matcher.policies) == len(catalog))
+
+
+def load_user_profiles(db_path, user_ids=None):
+    """사용자 프로필 일괄 조회 {user_id: 프로필 또는 None}"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    query = '''
+        SELECT u.id, up.housing_status, up.income_level, up.support_needs, u.age
+        FROM users u
+        LEFT JOIN user_profiles up ON up.user_id = u.id
+    '''
+    if user_ids is None:
+        cursor.execute(query)
+    else:
+        cursor.execute(query + f" WHERE u.id IN ({','.join('?' * len(user_ids))})", list(user_ids))
+    rows = cursor.fetchall()
+    conn.close()
+
+    profiles = {}
+    for user_id, housing_status, income_level, support_needs, age in rows:
+        if housing_status is None and income_level is None and support_needs is None:
+            profiles[user_id] = None
+            continue
+        profiles[user_id] = {
+            'housing_status': housing_status or '',
+            'income_level': income_level or '',
+            'support_needs': json.loads(support_needs) if support_needs else [],
+            'age': age
+        }
+    return profiles
+
+
+class PolicyRecommender:
+    """추천 결과를 policy_recommendations 테이블에 미리 저장해 두고 읽기만 하는 추천기
+
+    - 의미적 매처가 있으면 사용자 질의를 한 번에 인코딩해 (사용자 x 정책) 유사도를 행렬 곱으로 계산
+    - 상위 후보만 자격 요건 규칙으로 재정렬 (semantic_search와 같은 가중치)
+    - 매처가 없으면 지원 필요 영역 키워드 점수로 계산
+    - profile_loader: 사용자/프로필이 다른 저장소(PostgreSQL)에 있을 때 load_user_profiles 대신 쓸 함수
+    """
+
+    def __init__(self, db_path='database/iruda.db', limit=20, batch_size=256, profile_loader=None):
+        self.db_path = db_path
+        self.limit = limit
+        self.batch_size = batch_size
+        self.profile_loader = profile_loader
+
+    def version(self, catalog, matcher=None):
+        method = 'semantic' if matcher_covers_catalog(catalog, matcher) else 'keyword'
+        return f"{catalog_version(catalog)}-{method}"
+
+    def load_profiles(self, user_ids=None):
+        if self.profile_loader is not None:
+            return self.profile_loader(user_ids)
+        return load_user_profiles(self.db_path, user_ids)
+
+    def stale_user_ids(self, version):
+        """추천이 없거나 다른 카탈로그 버전으로 계산된 사용자"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        if self.profile_loader is not None:
+            # 사용자 목록은 외부 저장소, 추천 상태는 이 파일에 있으므로 조인 대신 비교
+            cursor.execute('SELECT user_id, catalog_version FROM recommendation_state')
+            states = dict(cursor.fetchall())
+            conn.close()
+            return [user_id for user_id in self.profile_loader(None) if states.get(user_id) != version]
+        cursor.execute('''
+            SELECT u.id FROM users u
+            LEFT JOIN recommendation_state rs ON rs.user_id = u.id
+            WHERE rs.catalog_version IS NULL OR rs.catalog_version != ?
+        ''', (version,))
+        user_ids = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        return user_ids
+
+    def _rank_keywords(self, profile, catalog):
+        scored = []
+        for policy in catalog:
+            score = keyword_score(policy, profile.get('support_needs') or [])
+            if score > 0:
+                scored.append((policy['_id'], float(score)))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:self.limit]
+
+    def _rank_semantic(self, profiles, catalog, matcher):
+        """프로필 여러 개를 한 번에 인코딩하고 행렬 곱으로 유사도 계산"""
+        queries = [matcher.enhance_search_query(BASE_QUERY, profile) for _, profile in profiles]
+        query_embeddings = matcher.encode_queries(queries)
+        similarities = matcher.embedding_store.scores(query_embeddings)
+
+        candidate_count = min(self.limit * 3, len(catalog))
+        rankings = {}
+        for row, (user_id, profile) in enumerate(profiles):
+            scores = similarities[row]
+            top_indices = np.argpartition(-scores, candidate_count - 1)[:candidate_count]
+            candidates = []
+            for idx in top_indices:
+                if scores[idx] < 0.1:
+                    continue
+                policy = catalog[idx]
+                eligibility = matcher.check_eligibility(profile, policy)
+                bonus = min(keyword_score(policy, profile.get('support_needs') or []) / 10, 1.0)
+                combined = float(scores[idx]) * 0.6 + eligibility['confidence'] * 0.3 + bonus * 0.1
+                candidates.append((policy['_id'], round(combined, 4)))
+            candidates.sort(key=lambda item: item[1], reverse=True)
+            rankings[user_id] = candidates[:self.limit]
+        return rankings
+
+    def rank(self, profiles, catalog, matcher=None):
+        """{user_id: 프로필} -> {user_id: [(정책 ID, 점수), ...]}"""
+        rankings = {}
+        with_profile = []
+        for user_id, profile in profiles.items():
+            if profile is None:
+                # 프로필이 없으면 카탈로그 앞부분 10개
+                rankings[user_id] = [(policy['_id'], 0.0) for policy in catalog[:10]]
+            else:
+                with_profile.append((user_id, profile))
+
+        if with_profile and matcher_covers_catalog(catalog, matcher):
+            rankings.update(self._rank_semantic(with_profile, catalog, matcher))
+        else:
+            for user_id, profile in with_profile:
+                rankings[user_id] = self._rank_keywords(profile, catalog)
+        return rankings
+
+    def save(self, rankings, version):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        now = time.time()
+        for user_id, ranking in rankings.items():
+            cursor.execute('DELETE FROM policy_recommendations WHERE user_id = ?', (user_id,))
+            cursor.executemany('''
+                INSERT INTO policy_recommendations (user_id, rank, policy_id, score)
+                VALUES (?, ?, ?, ?)
+            ''', [(user_id, rank, policy_id, score) for rank, (policy_id, score) in enumerate(ranking)])
+            cursor.execute('''
+                INSERT OR REPLACE INTO recommendation_state (user_id, catalog_version, policy_count, updated_at)
+                VALUES (?, ?, ?, ?)
+            ''', (user_id, version, len(ranking), now))
+        conn.commit()
+        conn.close()
+
+    def refresh(self, catalog, matcher=None, user_ids=None):
+        """추천 재계산 후 저장 (user_ids가 없으면 오래된 사용자 전체), 갱신한 사용자 수 반환"""
+        version = self.version(catalog, matcher)
+        if user_ids is None:
+            user_ids = self.stale_user_ids(version)
+
+        refreshed = 0
+        for start in range(0, len(user_ids), self.batch_size):
+            profiles = self.load_profiles(user_ids[start:start + self.batch_size])
+            self.save(self.rank(profiles, catalog, matcher), version)
+            refreshed += len(profiles)
+        return refreshed
+
+    def get(self, user_id):
+        """저장된 추천 [(정책 ID, 점수), ...] (계산된 적 없으면 None)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT pr.policy_id, pr.score FROM recommendation_state rs
+            LEFT JOIN policy_recommendations pr ON pr.user_id = rs.user_id
+            WHERE rs.user_id = ? ORDER BY pr.rank
+        ''', (user_id,))
+        rows = cursor.fetchall()
+        conn.close()
+        if not rows:
+            return None
+        return [(policy_id, score) for policy_id, score in rows if policy_id is not None]
@@ -0,0 +1,155 @@
+# policy_search_index.py - 정책명/기관명 자동완성용 접두사 인덱스
+import bisect
+import re
+from collections import defaultdict
+
+# 한글 음절 분해용 자모 테이블 (호환 자모)
+CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+JUNGSEONG = 'ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ'
+JONGSEONG = ['', 'ㄱ', 'ㄲ', 'ㄳ', 'ㄴ', 'ㄵ', 'ㄶ', 'ㄷ', 'ㄹ', 'ㄺ', 'ㄻ', 'ㄼ', 'ㄽ',
+             'ㄾ', 'ㄿ', 'ㅀ', 'ㅁ', 'ㅂ', 'ㅄ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+
+# 겹받침/겹모음은 입력 도중 낱자로 들어오므로 낱자로 풀어서 비교
+COMPOUND_JAMO = {
+    'ㄳ': 'ㄱㅅ', 'ㄵ': 'ㄴㅈ', 'ㄶ': 'ㄴㅎ', 'ㄺ': 'ㄹㄱ', 'ㄻ': 'ㄹㅁ', 'ㄼ': 'ㄹㅂ',
+    'ㄽ': 'ㄹㅅ', 'ㄾ': 'ㄹㅌ', 'ㄿ': 'ㄹㅍ', 'ㅀ': 'ㄹㅎ', 'ㅄ': 'ㅂㅅ',
+    'ㅘ': 'ㅗㅏ', 'ㅙ': 'ㅗㅐ', 'ㅚ': 'ㅗㅣ', 'ㅝ': 'ㅜㅓ', 'ㅞ': 'ㅜㅔ', 'ㅟ': 'ㅜㅣ', 'ㅢ': 'ㅡㅣ',
+}
+
+HANGUL_BASE = 0xAC00
+HANGUL_LAST = 0xD7A3
+
+
+def decompose_jamo(text):
+    """한글 음절을 자모 단위로 분해 ('주거' -> 'ㅈㅜㄱㅓ')"""
+    result = []
+    for char in text:
+        code = ord(char)
+        if HANGUL_BASE <= code <= HANGUL_LAST:
+            offset = code - HANGUL_BASE
+            jamo = (CHOSEONG[offset // 588]
+                    + JUNGSEONG[(offset % 588) // 28]
+                    + JONGSEONG[offset % 28])
+        else:
+            jamo = char
+        result.append(''.join(COMPOUND_JAMO.get(j, j) for j in jamo))
+    return ''.join(result)
+
+
+def extract_choseong(text):
+    """초성만 추출 ('주거급여' -> 'ㅈㄱㄱㅇ')"""
+    result = []
+    for char in text:
+        code = ord(char)
+        if HANGUL_BASE <= code <= HANGUL_LAST:
+            result.append(CHOSEONG[(code - HANGUL_BASE) // 588])
+        else:
+            result.append(char)
+    return ''.join(result)
+
+
+def normalize_text(text):
+    return re.sub(r'\s+', ' ', str(text).strip().lower())
+
+
+class PolicyPrefixIndex:
+    """정책 카탈로그에서 한 번 만드는 메모리 자동완성 인덱스
+
+    - 접두사: 서비스명/기관명의 각 단어 시작 위치부터의 자모 문자열을 정렬해 두고 이진 탐색
+    - 초성: '주ㄱ', 'ㅈㄱㄱㅇ' 같은 입력도 매칭
+    - 음절 2-gram: 단어 중간 부분 일치 ('급여' -> '주거급여')
+    """
+
+    def __init__(self, policies, max_results=8):
+        self.max_results = max_results
+        self.entries = []          # (서비스명, 기관명)
+        self._prefix_keys = []     # 정렬된 (자모 키, entry id, 순위)
+        self._bigrams = defaultdict(set)
+        self._names_lower = []
+        self._build(policies)
+
+    def _build(self, policies):
+        seen = set()
+        prefix_keys = []
+        for policy in policies:
+            name = policy.get('서비스명')
+            if not isinstance(name, str) or not name.strip():
+                continue
+            agency = policy.get('기관명')
+            # 엑셀 셀 안의 줄바꿈 등 공백 정리
+            agency = ' '.join(agency.split()) if isinstance(agency, str) else ''
+            name = ' '.join(name.split())
+            if (name, agency) in seen:
+                continue
+            seen.add((name, agency))
+
+            entry_id = len(self.entries)
+            self.entries.append((name, agency))
+            name_lower = normalize_text(name)
+            self._names_lower.append(name_lower)
+
+            for field_rank, text in ((0, name_lower), (1, normalize_text(agency))):
+                if not text:
+                    continue
+                words = text.split(' ')
+                for position in range(len(words)):
+                    # 단어 시작부터 필드 끝까지 ('청년 월세 지원' -> '월세 지원' 도 접두사로 검색)
+                    suffix = ''.join(words[position:])
+                    rank = field_rank * 10 + min(position, 9)
+                    prefix_keys.append((decompose_jamo(suffix), entry_id, rank))
+                    prefix_keys.append((extract_choseong(suffix), entry_id, rank + 20))
+
+            compact = name_lower.replace(' ', '')
+            for i in range(len(compact) - 1):
+                self._bigrams[compact[i:i + 2]].add(entry_id)
+
+        prefix_keys.sort()
+        self._prefix_keys = prefix_keys
+        self._sorted_keys = [key for key, _, _ in prefix_keys]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _prefix_matches(self, jamo_query):
+        """자모 접두사가 같은 항목 -> {entry id: 최고 순위}"""
+        matches = {}
+        start = bisect.bisect_left(self._sorted_keys, jamo_query)
+        for i in range(start, len(self._sorted_keys)):
+            if not self._sorted_keys[i].startswith(jamo_query):
+                break
+            _, entry_id, rank = self._prefix_keys[i]
+            if rank < matches.get(entry_id, 99):
+                matches[entry_id] = rank
+        return matches
+
+    def _infix_matches(self, compact_query):
+        """음절 2-gram 교집합으로 서비스명 중간 부분 일치 검색"""
+        if len(compact_query) < 2:
+            return {}
+        postings = [self._bigrams.get(compact_query[i:i + 2], set())
+                    for i in range(len(compact_query) - 1)]
+        candidates = set.intersection(*postings) if postings else set()
+        return {
+            entry_id: 50 for entry_id in candidates
+            if compact_query in self._names_lower[entry_id].replace(' ', '')
+        }
+
+    def search(self, query, limit=None):
+        """자동완성 후보 반환 [{'name': 서비스명, 'agency': 기관명}, ...]"""
+        limit = limit or self.max_results
+        compact_query = normalize_text(query).replace(' ', '')
+        if not compact_query:
+            return []
+
+        matches = self._prefix_matches(decompose_jamo(compact_query))
+        if len(matches) < limit:
+            for entry_id, rank in self._infix_matches(compact_query).items():
+                matches.setdefault(entry_id, rank)
+
+        # 순위: 서비스명 앞부분 일치 > 단어 일치 > 기관명 > 초성 > 부분 일치, 같으면 짧은 이름 우선
+        ranked = sorted(matches.items(),
+                        key=lambda item: (item[1], len(self.entries[item[0]][0]), item[0]))
+        return [
+            {'name': self.entries[entry_id][0], 'agency': self.entries[entry_id][1]}
+            for entry_id, _ in ranked[:limit]
+        ]
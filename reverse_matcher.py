@@ -0,0 +1,256 @@
+# reverse_matcher.py - 새 정책이 맞는 사용자 찾기 (정책 -> 사용자 역매칭 후 알림 저장)
+import hashlib
+import json
+import re
+import sqlite3
+import time
+
+import numpy as np
+
+from embedding_store import normalize_rows
+from policy_recommender import (BASE_QUERY, NEED_KEYWORDS, load_user_profiles,
+                                matcher_covers_catalog)
+
+NEED_ORDER = list(NEED_KEYWORDS)
+
+# EnhancedPolicyMatcher.check_age_requirement와 같은 나이 범위 표현
+AGE_RANGE_PATTERN = re.compile(r'(\d+)세?\s*[~-이]\s*(\d+)세?')
+LOW_INCOME_WORDS = ('기초생활수급', '차상위', '저소득')
+
+
+def policy_features(policy):
+    """자격 요건 규칙을 벡터 연산에 쓸 수 있는 정책 특징으로 변환"""
+    target_text = str(policy.get('지원대상') or '') + str(policy.get('서비스명') or '')
+    income_text = str(policy.get('지원대상') or '') + str(policy.get('지원내용') or '')
+    policy_text = ' '.join(
+        str(policy.get(field) or '') for field in ('서비스명', '지원내용', '지원대상')
+    ).lower()
+
+    age_range = None
+    if '청년' in target_text:
+        age_range = (18, 39)
+    else:
+        match = AGE_RANGE_PATTERN.search(target_text)
+        if match:
+            age_range = tuple(map(int, match.groups()))
+
+    need_weights = np.array([
+        weight if any(keyword in policy_text for keyword in keywords) else 0
+        for keywords, weight in (NEED_KEYWORDS[need] for need in NEED_ORDER)
+    ], dtype=np.float32)
+
+    return {
+        'age_range': age_range,
+        'low_income_only': any(word in income_text for word in LOW_INCOME_WORDS),
+        'need_weights': need_weights,
+        'base_bonus': 2 if ('자립' in policy_text or '청소년' in policy_text) else 0
+    }
+
+
+class ReverseMatcher:
+    """카탈로그에 새로 들어온 정책을 전체 사용자와 한 번에 매칭
+
+    - 사용자 프로필 질의 임베딩은 profile_embeddings 테이블에 저장해 두고 프로필이 바뀐 사용자만 다시 인코딩
+    - 새 정책 임베딩 (k개)과 사용자 행렬 (N개)을 배치 단위 행렬 곱 한 번으로 비교
+    - 나이/소득 자격 요건과 지원 영역 보너스도 사용자 배열 전체에 대해 벡터 연산으로 계산
+    - 매칭된 사용자에게 notifications 테이블로 알림 저장
+    """
+
+    def __init__(self, db_path='database/iruda.db', threshold=0.6, min_similarity=0.3,
+                 max_per_user=3, batch_size=2048, profile_loader=None):
+        self.db_path = db_path
+        self.threshold = threshold
+        self.min_similarity = min_similarity
+        self.max_per_user = max_per_user
+        self.batch_size = batch_size
+        # 사용자/프로필이 다른 저장소(PostgreSQL)에 있을 때 load_user_profiles 대신 쓸 함수
+        self.profile_loader = profile_loader
+
+    def load_profiles(self):
+        if self.profile_loader is not None:
+            return self.profile_loader(None)
+        return load_user_profiles(self.db_path)
+
+    def known_policy_ids(self):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT policy_id FROM known_policies')
+        known = {row[0] for row in cursor.fetchall()}
+        conn.close()
+        return known
+
+    def remember_policies(self, policies):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT OR IGNORE INTO known_policies (policy_id, policy_name, first_seen_at)
+            VALUES (?, ?, ?)
+        ''', [(policy['_id'], policy.get('서비스명') or '', time.time()) for policy in policies])
+        conn.commit()
+        conn.close()
+
+    def sync_profile_embeddings(self, matcher):
+        """프로필 질의가 바뀌었거나 없는 사용자만 인코딩해 저장, 인코딩한 수 반환"""
+        dim = matcher.embedding_store.dim
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT user_id, query_hash, dim FROM profile_embeddings')
+        stored = {user_id: (query_hash, stored_dim) for user_id, query_hash, stored_dim in cursor.fetchall()}
+
+        pending = []
+        for user_id, profile in self.load_profiles().items():
+            if profile is None:
+                continue
+            query = matcher.enhance_search_query(BASE_QUERY, profile)
+            # 차원 축소 투영이 바뀌면 같은 질의라도 다시 인코딩
+            query_hash = hashlib.sha1(f"{matcher.embedding_key}:{query}".encode('utf-8')).hexdigest()
+            if stored.get(user_id) != (query_hash, dim):
+                pending.append((user_id, query, query_hash))
+
+        for start in range(0, len(pending), self.batch_size):
+            chunk = pending[start:start + self.batch_size]
+            embeddings = matcher.encode_queries([query for _, query, _ in chunk])
+            cursor.executemany('''
+                INSERT OR REPLACE INTO profile_embeddings (user_id, query_hash, dim, embedding, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [
+                (user_id, query_hash, dim, embedding.tobytes(), time.time())
+                for (user_id, _, query_hash), embedding in zip(chunk, embeddings)
+            ])
+            conn.commit()
+        conn.close()
+        return len(pending)
+
+    def _score_batch(self, rows, features, policy_embeddings):
+        """사용자 배치 x 새 정책 점수 행렬과 매칭 여부 계산"""
+        user_ids = [row[0] for row in rows]
+        ages = np.array([row[2] if row[2] is not None else np.nan for row in rows], dtype=np.float32)
+        incomes = [row[3] or '' for row in rows]
+        has_income = np.array([bool(income) for income in incomes])
+        low_income = np.array([('50만원 이하' in income or '없음' in income) for income in incomes])
+        needs = np.zeros((len(rows), len(NEED_ORDER)), dtype=np.float32)
+        for i, row in enumerate(rows):
+            for need in (json.loads(row[4]) if row[4] else []):
+                if need in NEED_KEYWORDS:
+                    needs[i, NEED_ORDER.index(need)] = 1
+
+        if policy_embeddings is not None:
+            dim = policy_embeddings.shape[1]
+            users = np.zeros((len(rows), dim), dtype=np.float32)
+            has_vector = np.zeros(len(rows), dtype=bool)
+            for i, row in enumerate(rows):
+                if row[1] is not None and len(row[1]) == dim * 4:
+                    users[i] = np.frombuffer(row[1], dtype=np.float32)
+                    has_vector[i] = True
+            similarities = users @ policy_embeddings.T
+        else:
+            similarities = np.zeros((len(rows), len(features)), dtype=np.float32)
+
+        scores = np.zeros_like(similarities)
+        hits = np.zeros(similarities.shape, dtype=bool)
+        for j, feature in enumerate(features):
+            if feature['age_range']:
+                min_age, max_age = feature['age_range']
+                age_ok = np.isnan(ages) | ((ages >= min_age) & (ages <= max_age))
+            else:
+                age_ok = np.ones(len(rows), dtype=bool)
+            income_ok = ~has_income | low_income if feature['low_income_only'] else np.ones(len(rows), dtype=bool)
+            confidence = 0.3 * age_ok + 0.4 * income_ok + 0.3
+
+            need_score = needs @ feature['need_weights']
+            bonus = np.minimum((need_score + feature['base_bonus']) / 10, 1.0)
+            scores[:, j] = similarities[:, j] * 0.6 + confidence * 0.3 + bonus * 0.1
+
+            eligible = confidence >= 0.7
+            if policy_embeddings is not None:
+                hits[:, j] = (eligible & has_vector & (similarities[:, j] >= self.min_similarity)
+                              & (scores[:, j] >= self.threshold))
+            else:
+                # 임베딩이 없으면 지원 영역이 겹치는 정책만
+                hits[:, j] = eligible & (need_score > 0)
+        return user_ids, scores, hits
+
+    def match(self, new_policies, policy_embeddings=None):
+        """{user_id: [(점수, 정책), ...]} (사용자별 상위 max_per_user개)"""
+        features = [policy_features(policy) for policy in new_policies]
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        matches = {}
+        for rows in self._profile_batches(cursor):
+            user_ids, scores, hits = self._score_batch(rows, features, policy_embeddings)
+            for i in np.flatnonzero(hits.any(axis=1)):
+                columns = np.flatnonzero(hits[i])
+                ranked = sorted(columns, key=lambda j: scores[i, j], reverse=True)[:self.max_per_user]
+                matches[user_ids[i]] = [(float(scores[i, j]), new_policies[j]) for j in ranked]
+        conn.close()
+        return matches
+
+    def _profile_batches(self, cursor):
+        """(user_id, 임베딩, 나이, 소득, 지원 필요 영역 JSON) 행을 batch_size개씩"""
+        if self.profile_loader is None:
+            cursor.execute('''
+                SELECT up.user_id, pe.embedding, u.age, up.income_level, up.support_needs
+                FROM user_profiles up
+                JOIN users u ON u.id = up.user_id
+                LEFT JOIN profile_embeddings pe ON pe.user_id = up.user_id
+            ''')
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    return
+                yield rows
+
+        # 프로필은 외부 저장소에서 읽고 질의 임베딩만 이 파일에서 붙임
+        cursor.execute('SELECT user_id, embedding FROM profile_embeddings')
+        embeddings = dict(cursor.fetchall())
+        rows = [
+            (user_id, embeddings.get(user_id), profile['age'], profile['income_level'],
+             json.dumps(profile['support_needs']))
+            for user_id, profile in self.load_profiles().items() if profile is not None
+        ]
+        for start in range(0, len(rows), self.batch_size):
+            yield rows[start:start + self.batch_size]
+
+    def notify(self, matches):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO notifications (user_id, title, message, type)
+            VALUES (?, ?, ?, 'policy')
+        ''', [
+            (user_id, '새 맞춤 정책',
+             f"새로 등록된 '{' '.join(str(policy.get('서비스명') or '').split())}' 정책이 회원님의 상황에 맞을 수 있어요. 정책 페이지에서 확인해보세요.")
+            for user_id, hits in matches.items()
+            for _, policy in hits
+        ])
+        conn.commit()
+        conn.close()
+
+    def run(self, catalog, matcher=None):
+        """카탈로그에서 처음 보는 정책만 골라 매칭하고 알림 저장"""
+        known = self.known_policy_ids()
+        if not known:
+            # 첫 실행은 기존 카탈로그를 기준점으로만 기록 (전체 정책 알림 방지)
+            self.remember_policies(catalog)
+            return {'new_policies': 0, 'notified_users': 0, 'baseline': len(catalog)}
+
+        new_indices = [i for i, policy in enumerate(catalog) if policy['_id'] not in known]
+        if not new_indices:
+            return {'new_policies': 0, 'notified_users': 0}
+        new_policies = [catalog[i] for i in new_indices]
+
+        policy_embeddings = None
+        encoded_profiles = 0
+        if matcher_covers_catalog(catalog, matcher):
+            # 매처가 시작 시 만든 임베딩 행을 그대로 사용 (새 정책 행만 복원)
+            policy_embeddings = normalize_rows(matcher.embedding_store.take(new_indices))
+            encoded_profiles = self.sync_profile_embeddings(matcher)
+
+        matches = self.match(new_policies, policy_embeddings)
+        self.notify(matches)
+        self.remember_policies(new_policies)
+        return {
+            'new_policies': len(new_policies),
+            'notified_users': len(matches),
+            'encoded_profiles': encoded_profiles
+        }
@@ -0,0 +1,177 @@
+# semantic_cache.py - 채팅 응답 의미적 캐시
+import re
+import threading
+import time
+
+import numpy as np
+
+
+class SemanticResponseCache:
+    """비슷한 질문에 대한 AI 응답을 재사용하는 의미적 캐시
+
+    EnhancedPolicyMatcher가 이미 로드한 임베딩 모델로 질문을 벡터화하고,
+    유사도가 임계값 이상인 이전 응답을 그대로 돌려준다.
+    개인 정보가 담긴 질문이나 대화 맥락이 있는 질문은 캐시하지 않는다.
+    """
+
+    # 개인 상황이 드러나는 표현 (1인칭, 숫자, 연락처 등)
+    PERSONAL_PATTERN = re.compile(
+        r'(제가|저는|저의|저한테|제\s|내가|나는|나의|내\s|우리|제\s?이름|'
+        r'\d|@|전화|연락처|주소)'
+    )
+
+    def __init__(self, model, threshold=0.95, ttl_seconds=3600, max_entries=500):
+        self.model = model
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._keys = []          # 정규화된 질문 텍스트
+        self._responses = []     # 캐시된 응답
+        self._created_at = []    # 저장 시각
+        self._last_used = []     # 마지막 사용 시각 (LRU 제거용)
+        self._embeddings = None  # (N, dim) 정규화된 임베딩 행렬
+        self._exact_index = {}   # 정규화된 질문 -> 위치 (임베딩 없이 바로 조회)
+
+        self._stats = {'hits': 0, 'exact_hits': 0, 'misses': 0,
+                       'skipped': 0, 'stores': 0, 'evictions': 0, 'expired': 0}
+
+    @staticmethod
+    def normalize(message):
+        """공백/문장부호 차이를 무시하도록 질문 정규화"""
+        text = re.sub(r'[?!.,~\s]+', ' ', message.lower())
+        return text.strip()
+
+    def is_cacheable(self, message, conversation_history=None):
+        """대화 맥락이 없고 개인 정보가 없는 일반 질문인지 확인"""
+        if not message or len(message) > 200:
+            return False
+
+        # 클라이언트는 현재 메시지까지 history에 담아 보내므로 그 이전 대화만 확인
+        previous_turns = [
+            turn for turn in (conversation_history or [])
+            if turn.get('content') != message
+        ]
+        if previous_turns:
+            return False
+
+        return not self.PERSONAL_PATTERN.search(message)
+
+    def _encode(self, text):
+        embedding = self.model.encode([text], convert_to_numpy=True, normalize_embeddings=True)
+        return embedding[0].astype(np.float32)
+
+    def _remove_at(self, index):
+        """index 위치의 항목 제거 (호출 측에서 lock 보유)"""
+        del self._keys[index]
+        del self._responses[index]
+        del self._created_at[index]
+        del self._last_used[index]
+        self._embeddings = np.delete(self._embeddings, index, axis=0)
+        self._exact_index = {key: i for i, key in enumerate(self._keys)}
+
+    def _purge_expired(self, now):
+        expired = [i for i, created in enumerate(self._created_at)
+                   if now - created > self.ttl_seconds]
+        for index in reversed(expired):
+            self._remove_at(index)
+        self._stats['expired'] += len(expired)
+
+    def get(self, message, conversation_history=None):
+        """캐시된 응답 조회 (없으면 None)"""
+        if not self.is_cacheable(message, conversation_history):
+            with self._lock:
+                self._stats['skipped'] += 1
+            return None
+
+        key = self.normalize(message)
+        now = time.time()
+
+        with self._lock:
+            self._purge_expired(now)
+
+            # 1단계: 완전히 같은 질문은 임베딩 없이 바로 반환
+            if key in self._exact_index:
+                index = self._exact_index[key]
+                self._last_used[index] = now
+                self._stats['hits'] += 1
+                self._stats['exact_hits'] += 1
+                return self._responses[index]
+
+            if self._embeddings is None or len(self._keys) == 0:
+                self._stats['misses'] += 1
+                return None
+
+        # 2단계: 의미적 유사도 검색 (인코딩은 lock 밖에서 수행)
+        query_embedding = self._encode(key)
+
+        with self._lock:
+            if self._embeddings is None or len(self._keys) == 0:
+                self._stats['misses'] += 1
+                return None
+
+            similarities = self._embeddings @ query_embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                self._last_used[best] = now
+                self._stats['hits'] += 1
+                return self._responses[best]
+
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, message, response, conversation_history=None):
+        """AI 응답 저장"""
+        if not response or not self.is_cacheable(message, conversation_history):
+            return
+
+        key = self.normalize(message)
+        embedding = self._encode(key)
+        now = time.time()
+
+        with self._lock:
+            if key in self._exact_index:
+                index = self._exact_index[key]
+                self._responses[index] = response
+                self._created_at[index] = now
+                self._last_used[index] = now
+                return
+
+            # 크기 제한: 가장 오래 사용되지 않은 항목 제거
+            while len(self._keys) >= self.max_entries:
+                self._remove_at(int(np.argmin(self._last_used)))
+                self._stats['evictions'] += 1
+
+            self._keys.append(key)
+            self._responses.append(response)
+            self._created_at.append(now)
+            self._last_used.append(now)
+            self._exact_index[key] = len(self._keys) - 1
+
+            if self._embeddings is None or len(self._keys) == 1:
+                self._embeddings = embedding[np.newaxis, :]
+            else:
+                self._embeddings = np.vstack([self._embeddings, embedding])
+
+            self._stats['stores'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._keys, self._responses = [], []
+            self._created_at, self._last_used = [], []
+            self._embeddings = None
+            self._exact_index = {}
+
+    def stats(self):
+        """캐시 적중률 등 지표"""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'size': len(self._keys),
+                'max_entries': self.max_entries,
+                'threshold': self.threshold,
+                'ttl_seconds': self.ttl_seconds,
+                'hit_rate': round(self._stats['hits'] / lookups, 3) if lookups else 0.0
+            }
@@ -0,0 +1,997 @@
+# storage.py - 사용자/프로필/로드맵/할 일/대화 저장소 계층 (SQLite 기본, PostgreSQL 선택)
+#
+# 저장소 선택 (환경 변수):
+#   STORAGE_BACKEND=sqlite     (기본) database/iruda.db, 스키마는 database/migrations.py
+#   STORAGE_BACKEND=postgres   DATABASE_URL의 PostgreSQL, 스키마는 database/postgres_schema.sql
+#                              (python storage.py init-schema 로 적용, psycopg2 필요)
+#
+# 쿼리는 ? 자리표시자로 한 번만 작성하고 백엔드가 방언에 맞게 바꿔 실행
+# (작업 큐, 추천 결과, 캐시처럼 다시 만들 수 있는 데이터는 계속 로컬 SQLite 파일 사용)
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date
+
+try:
+    import psycopg2
+    import psycopg2.extensions
+    from psycopg2.pool import ThreadedConnectionPool
+except ImportError:
+    psycopg2 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+STORAGE_BACKENDS = ('sqlite', 'postgres')
+ARCHIVE_CODECS = ('zlib', 'zstd')
+POSTGRES_SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'postgres_schema.sql')
+
+_PLACEHOLDER = re.compile(r'\?')
+
+
+class StorageError(Exception):
+    """저장소 오류 (DB 잠금, 연결 끊김 등, 백엔드별 드라이버 예외를 하나로 맞춤)"""
+
+
+class ConstraintError(StorageError):
+    """무결성 제약 위반 (이미 가입된 이메일 등)"""
+
+
+@contextmanager
+def _driver_errors(integrity_error, driver_error):
+    """드라이버 예외 -> ConstraintError / StorageError (호출 측이 백엔드 종류를 몰라도 되도록)"""
+    try:
+        yield
+    except integrity_error as e:
+        raise ConstraintError(str(e)) from e
+    except driver_error as e:
+        raise StorageError(str(e)) from e
+
+
+def _text(value):
+    """PostgreSQL의 date/timestamp 값을 SQLite와 같은 문자열로 맞춤 (bytea는 bytes로)"""
+    if value is None or isinstance(value, (str, int, float, bytes)):
+        return value
+    return bytes(value) if isinstance(value, memoryview) else str(value)
+
+
+def compress_rows(rows, codec='zlib'):
+    """보관할 행 목록 -> 압축한 JSON 바이트 (zstd는 zstandard 패키지가 있을 때만)"""
+    data = json.dumps(rows, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('zstd 압축을 사용하려면 zstandard를 설치하세요 (pip install zstandard).')
+        return zstandard.ZstdCompressor(level=9).compress(data)
+    return zlib.compress(data, 9)
+
+
+def decompress_rows(codec, payload):
+    payload = bytes(payload)  # PostgreSQL bytea는 memoryview로 옴
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('zstd로 보관된 데이터를 읽으려면 zstandard를 설치하세요.')
+        data = zstandard.ZstdDecompressor().decompress(payload)
+    else:
+        data = zlib.decompress(payload)
+    return json.loads(data.decode('utf-8'))
+
+
+def read_archive(session, table, user_id):
+    """보관 테이블(chat_archive/todo_archive)에서 사용자의 월별 묶음을 최근 달부터 (월, 행 목록)으로"""
+    months = session.execute(
+        f'SELECT month, codec, payload FROM {table} WHERE user_id = ? ORDER BY month DESC', (user_id,)
+    ).fetchall()
+    for month, codec, payload in months:
+        yield month, decompress_rows(codec, payload)
+
+
+def bump_version(session, user_id, scope):
+    """사용자 데이터 버전 카운터 증가 (쓰기와 같은 트랜잭션에서 호출해 ETag가 변경과 함께 바뀌도록)"""
+    session.execute('''
+        INSERT INTO data_versions (user_id, scope, version) VALUES (?, ?, 1)
+        ON CONFLICT (user_id, scope) DO UPDATE SET version = data_versions.version + 1
+    ''', (user_id, scope))
+
+
+class SQLiteSession:
+    """연결 하나로 실행하는 작업 단위의 커서 (리포지토리 메서드가 공유)"""
+
+    errors = (sqlite3.IntegrityError, sqlite3.Error)
+
+    def __init__(self, conn):
+        self.cursor = conn.cursor()
+
+    def execute(self, sql, params=()):
+        with _driver_errors(*self.errors):
+            self.cursor.execute(sql, params)
+        return self
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+
+    def insert(self, sql, params=()):
+        """INSERT 실행 후 새 행의 id 반환"""
+        with _driver_errors(*self.errors):
+            self.cursor.execute(sql, params)
+        return self.cursor.lastrowid
+
+
+class SQLiteBackend:
+    """요청마다 연결을 열고 닫는 SQLite (쓰기는 BEGIN IMMEDIATE로 시작해 잠금 승격 실패 방지)"""
+
+    dialect = 'sqlite'
+    # 할 일 개수는 트리거로 유지되는 요약 테이블에서 읽음 (마이그레이션 3번)
+    summary_tables = True
+    days_between_sql = 'CAST(julianday(due_date) - julianday(?) AS INTEGER)'
+
+    def __init__(self, path='database/iruda.db', timeout=30):
+        self.path = path
+        self.timeout = timeout
+
+    @contextmanager
+    def session(self, write=False):
+        """정상 종료 시 커밋, 예외 시 롤백하는 트랜잭션"""
+        with _driver_errors(*SQLiteSession.errors):
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        try:
+            with _driver_errors(*SQLiteSession.errors):
+                conn.execute('BEGIN IMMEDIATE' if write else 'BEGIN')
+                yield SQLiteSession(conn)
+                conn.execute('COMMIT')
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def init_schema(self):
+        """SQLite 스키마는 init_database()의 마이그레이션이 관리"""
+
+    def compact(self, max_pages=None, enable=False):
+        """보관 작업으로 비운 페이지를 파일에서 반환
+
+        auto_vacuum=INCREMENTAL DB는 incremental_vacuum으로 max_pages만큼만(없으면 전부) 반환해 잠금을 짧게 유지.
+        그 전에 만든 DB는 enable=True일 때 한 번 전체 VACUUM으로 전환 (파일 크기만큼 시간이 걸리고 그동안 쓰기 대기)
+        """
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        try:
+            pages_before = conn.execute('PRAGMA page_count').fetchone()[0]
+            mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+            if mode == 2:
+                # execute()는 한 단계(한 페이지)만 실행하므로 끝까지 실행되는 executescript 사용
+                conn.executescript(f'PRAGMA incremental_vacuum({int(max_pages or 0)});')
+            elif enable:
+                conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                conn.execute('VACUUM')
+                mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+            return {
+                'auto_vacuum': {0: 'none', 1: 'full', 2: 'incremental'}.get(mode, mode),
+                'released_pages': max(pages_before - conn.execute('PRAGMA page_count').fetchone()[0], 0),
+                'free_pages': conn.execute('PRAGMA freelist_count').fetchone()[0]
+            }
+        finally:
+            conn.close()
+
+    def describe(self):
+        return {'backend': self.dialect, 'path': self.path}
+
+
+class PostgresSession(SQLiteSession):
+    """? 자리표시자를 서버 측 prepared statement로 실행 (연결마다 한 번 PREPARE 후 EXECUTE 재사용)"""
+
+    def __init__(self, conn, backend):
+        self.conn = conn
+        self.backend = backend
+        self.cursor = conn.cursor()
+        self.errors = (psycopg2.IntegrityError, psycopg2.Error)
+
+    def execute(self, sql, params=()):
+        with _driver_errors(*self.errors):
+            return self._execute(sql, tuple(params))
+
+    def _execute(self, sql, params):
+        if not self.backend.prepare:
+            self.cursor.execute(sql.replace('%', '%%').replace('?', '%s'), params)
+            return self
+        name = self.backend.statement_name(sql)
+        prepared = self.conn.prepared
+        if name in prepared:
+            prepared.move_to_end(name)
+        else:
+            if len(prepared) >= self.backend.max_prepared:
+                oldest, _ = prepared.popitem(last=False)
+                self.cursor.execute(f'DEALLOCATE {oldest}')
+            counter = iter(range(1, len(params) + 1))
+            numbered = _PLACEHOLDER.sub(lambda _: f'${next(counter)}', sql)
+            self.cursor.execute(f'PREPARE {name} AS {numbered}')
+            prepared[name] = True
+        if params:
+            self.cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+        else:
+            self.cursor.execute(f'EXECUTE {name}')
+        return self
+
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        return tuple(_text(value) for value in row) if row else row
+
+    def fetchall(self):
+        return [tuple(_text(value) for value in row) for row in self.cursor.fetchall()]
+
+    def insert(self, sql, params=()):
+        self.execute(sql + ' RETURNING id', params)
+        return self.cursor.fetchone()[0]
+
+
+if psycopg2 is not None:
+    class _PreparingConnection(psycopg2.extensions.connection):
+        """이 연결(서버 세션)에 PREPARE해 둔 문장 이름을 기억 (오래 안 쓴 순서로 정리)"""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.prepared = OrderedDict()
+
+
+class PostgresBackend:
+    """연결 풀 + 서버 측 prepared statement를 쓰는 PostgreSQL
+
+    - 풀이 가득 차면 예외 대신 pool_timeout초까지 빈 연결을 기다림
+    - 같은 SQL은 연결마다 한 번만 파싱/계획하고 이후에는 EXECUTE로 파라미터만 전달
+    """
+
+    dialect = 'postgres'
+    summary_tables = False
+    days_between_sql = '(due_date - CAST(? AS DATE))'
+
+    def __init__(self, dsn, min_connections=1, max_connections=10, prepare=True, max_prepared=256,
+                 pool_timeout=30):
+        if psycopg2 is None:
+            raise RuntimeError('PostgreSQL 저장소를 사용하려면 psycopg2를 설치하세요 (pip install psycopg2-binary).')
+        self.dsn = dsn
+        self.prepare = prepare
+        self.max_prepared = max_prepared
+        self.pool_timeout = pool_timeout
+        self.max_connections = max_connections
+        self._pool = ThreadedConnectionPool(min_connections, max_connections, dsn,
+                                            connection_factory=_PreparingConnection)
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    @staticmethod
+    def statement_name(sql):
+        return f"iruda_{zlib.crc32(sql.encode('utf-8')):08x}_{len(sql)}"
+
+    @contextmanager
+    def session(self, write=False):
+        if not self._slots.acquire(timeout=self.pool_timeout):
+            raise StorageError('PostgreSQL 연결 풀에 사용할 수 있는 연결이 없습니다.')
+        try:
+            with _driver_errors(psycopg2.IntegrityError, psycopg2.Error):
+                conn = self._pool.getconn()
+        except BaseException:
+            self._slots.release()
+            raise
+        broken = False
+        try:
+            with _driver_errors(psycopg2.IntegrityError, psycopg2.Error):
+                yield PostgresSession(conn, self)
+                conn.commit()
+        except BaseException:
+            broken = bool(conn.closed)
+            if not broken:
+                conn.rollback()
+            raise
+        finally:
+            self._pool.putconn(conn, close=broken)
+            self._slots.release()
+
+    def init_schema(self, path=POSTGRES_SCHEMA_PATH):
+        """테이블/인덱스 생성 (IF NOT EXISTS라 여러 번 실행해도 안전)"""
+        with open(path, encoding='utf-8') as f:
+            script = f.read()
+        conn = self._pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(script)
+            conn.commit()
+        finally:
+            self._pool.putconn(conn)
+
+    def compact(self, max_pages=None, enable=False):
+        """지운 행의 공간은 autovacuum이 재사용 가능하게 정리 (파일 크기를 줄이는 VACUUM FULL은 테이블 잠금이라 하지 않음)"""
+        return {'auto_vacuum': 'autovacuum', 'released_pages': 0}
+
+    def close(self):
+        self._pool.closeall()
+
+    def describe(self):
+        return {'backend': self.dialect, 'max_connections': self.max_connections, 'prepare': self.prepare}
+
+
+class _Repository:
+    def __init__(self, backend):
+        self.backend = backend
+
+    @contextmanager
+    def _session(self, session, write=False):
+        """호출 측 트랜잭션(session)이 있으면 그대로 사용, 없으면 새로 열어 이 호출만 실행"""
+        if session is not None:
+            yield session
+        else:
+            with self.backend.session(write=write) as own:
+                yield own
+
+
+class UserRepository(_Repository):
+    def get(self, user_id):
+        with self.backend.session() as session:
+            row = session.execute('SELECT id, email, name, age FROM users WHERE id = ?', (user_id,)).fetchone()
+        return {'id': row[0], 'email': row[1], 'name': row[2], 'age': row[3]} if row else None
+
+    def find_by_email(self, email):
+        with self.backend.session() as session:
+            row = session.execute(
+                'SELECT id, email, name, password_hash FROM users WHERE email = ?', (email,)
+            ).fetchone()
+        return {'id': row[0], 'email': row[1], 'name': row[2], 'password_hash': row[3]} if row else None
+
+    def password_hash(self, user_id):
+        with self.backend.session() as session:
+            row = session.execute('SELECT password_hash FROM users WHERE id = ?', (user_id,)).fetchone()
+        return row[0] if row else None
+
+    def create(self, name, email, password_hash, age, profile):
+        """사용자와 프로필을 한 트랜잭션으로 저장, 이메일 중복이면 ConstraintError"""
+        with self.backend.session(write=True) as session:
+            user_id = session.insert('''
+                INSERT INTO users (name, email, password_hash, age)
+                VALUES (?, ?, ?, ?)
+            ''', (name, email, password_hash, age))
+            session.execute('''
+                INSERT INTO user_profiles (user_id, housing_status, income_level, support_needs)
+                VALUES (?, ?, ?, ?)
+            ''', (user_id, profile.get('housing_status'), profile.get('income_level'),
+                  json.dumps(profile.get('support_needs', []))))
+        return user_id
+
+    def update(self, user_id, name, email, age, profile, password_hash=None):
+        """기본 정보/프로필/비밀번호(있으면)를 한 트랜잭션으로 변경"""
+        with self.backend.session(write=True) as session:
+            session.execute('UPDATE users SET name = ?, email = ?, age = ? WHERE id = ?',
+                            (name, email, age, user_id))
+            session.execute('''
+                UPDATE user_profiles
+                SET housing_status = ?, income_level = ?, support_needs = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE user_id = ?
+            ''', (profile.get('housing_status'), profile.get('income_level'),
+                  json.dumps(profile.get('support_needs', [])), user_id))
+            if password_hash:
+                session.execute('UPDATE users SET password_hash = ? WHERE id = ?', (password_hash, user_id))
+            bump_version(session, user_id, 'profile')
+
+
+class ProfileRepository(_Repository):
+    MATCHING_QUERY = '''
+        SELECT u.id, up.housing_status, up.income_level, up.support_needs, u.age
+        FROM users u
+        LEFT JOIN user_profiles up ON up.user_id = u.id
+    '''
+
+    def get(self, user_id):
+        """정책 매칭용 프로필 (주거/소득/지원 필요 영역/나이), 없으면 None"""
+        with self.backend.session() as session:
+            row = session.execute('''
+                SELECT housing_status, income_level, support_needs, age
+                FROM user_profiles up
+                JOIN users u ON up.user_id = u.id
+                WHERE user_id = ?
+            ''', (user_id,)).fetchone()
+        if not row:
+            return None
+        return {
+            'housing_status': row[0],
+            'income_level': row[1],
+            'support_needs': json.loads(row[2]) if row[2] else [],
+            'age': row[3]
+        }
+
+    def details(self, user_id):
+        """마이페이지용 프로필 전체 항목 (없으면 빈 dict)"""
+        with self.backend.session() as session:
+            row = session.execute('''
+                SELECT housing_status, income_level, education_level, employment_status, support_needs
+                FROM user_profiles WHERE user_id = ?
+            ''', (user_id,)).fetchone()
+        if not row:
+            return {}
+        return {
+            'housing_status': row[0],
+            'income_level': row[1],
+            'education_level': row[2],
+            'employment_status': row[3],
+            'support_needs': json.loads(row[4]) if row[4] else []
+        }
+
+    def load_for_matching(self, user_ids=None):
+        """추천/역매칭용 프로필 일괄 조회 {user_id: 프로필 또는 None} (policy_recommender.load_user_profiles와 같은 형식)"""
+        with self.backend.session() as session:
+            if user_ids is None:
+                rows = session.execute(self.MATCHING_QUERY).fetchall()
+            else:
+                user_ids = list(user_ids)
+                if not user_ids:
+                    return {}
+                rows = session.execute(
+                    self.MATCHING_QUERY + f" WHERE u.id IN ({','.join('?' * len(user_ids))})", user_ids
+                ).fetchall()
+
+        profiles = {}
+        for user_id, housing_status, income_level, support_needs, age in rows:
+            if housing_status is None and income_level is None and support_needs is None:
+                profiles[user_id] = None
+                continue
+            profiles[user_id] = {
+                'housing_status': housing_status or '',
+                'income_level': income_level or '',
+                'support_needs': json.loads(support_needs) if support_needs else [],
+                'age': age
+            }
+        return profiles
+
+
+class RoadmapRepository(_Repository):
+    def latest(self, user_id, session=None):
+        """가장 최근 로드맵 (없으면 None)"""
+        with self._session(session) as session:
+            row = session.execute('''
+                SELECT id, title, description, priority_areas, timeline
+                FROM roadmaps WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT 1
+            ''', (user_id,)).fetchone()
+        if not row:
+            return None
+        return {
+            'id': row[0],
+            'title': row[1],
+            'description': row[2],
+            'priority_areas': json.loads(row[3]) if row[3] else [],
+            'timeline': json.loads(row[4]) if row[4] else {}
+        }
+
+    def latest_id(self, user_id, session=None):
+        with self._session(session) as session:
+            row = session.execute(
+                'SELECT id FROM roadmaps WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT 1', (user_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def owns(self, user_id, roadmap_id, session=None):
+        """roadmap_id가 이 사용자의 로드맵인지"""
+        with self._session(session) as session:
+            row = session.execute('SELECT 1 FROM roadmaps WHERE id = ? AND user_id = ?', (roadmap_id, user_id)).fetchone()
+        return row is not None
+
+    def create(self, user_id, roadmap):
+        with self.backend.session(write=True) as session:
+            return session.insert('''
+                INSERT INTO roadmaps (user_id, title, description, priority_areas, timeline)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (
+                user_id,
+                roadmap['title'],
+                roadmap['description'],
+                json.dumps(roadmap['priority_areas']),
+                json.dumps(roadmap['timeline'])
+            ))
+
+
+class TodoRepository(_Repository):
+    COLUMNS = ('id', 'title', 'description', 'due_date', 'priority', 'status', 'category',
+               'completed_at', 'created_at')
+
+    @staticmethod
+    def filter_conditions(filters, today):
+        """우선순위/카테고리/제목/마감일 필터 -> (SQL 조건 목록, 파라미터)"""
+        conditions = []
+        params = []
+        if filters['priority'] != 'all':
+            conditions.append('priority = ?')
+            params.append(filters['priority'])
+        if filters['category'] != 'all':
+            conditions.append('category = ?')
+            params.append(filters['category'])
+        if filters['q']:
+            escaped = filters['q'].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            conditions.append("title LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+        if filters['due'] == 'overdue':
+            conditions.append('due_date < ?')
+            params.append(today)
+        elif filters['due'] == 'today':
+            conditions.append('due_date = ?')
+            params.append(today)
+        return conditions, params
+
+    def target_clause(self, target, today):
+        """일괄 작업 대상 -> (SQL 조건, 파라미터)
+
+        target: ('id', 할 일 ID) / ('ids', ID 목록) / ('filter', parse_todo_filters 결과)
+        """
+        kind, value = target
+        if kind == 'id':
+            return 'id = ?', [value]
+        if kind == 'ids':
+            return f"id IN ({','.join('?' * len(value))})", list(value)
+        conditions, params = self.filter_conditions(value, today)
+        if value['status'] != 'all':
+            conditions.append('status = ?')
+            params.append(value['status'])
+        if value['due'] != 'all':
+            conditions.append("status != 'completed'")
+        return ' AND '.join(conditions) or '1 = 1', params
+
+    def select_section(self, user_id, section, filters, today, after, limit, session=None):
+        """구간 하나에서 keyset 조건으로 limit개 조회
+
+        미완료 구간은 (user_id, due_date, id) 부분 인덱스, 상태 지정/완료 구간은
+        (user_id, status, due_date, id) 복합 인덱스 순서 그대로 읽으므로 정렬 없이 LIMIT에서 멈춤.
+        연체/오늘 마감/남은 일수는 마감일 비교로 SQL에서 계산. 구간 'a'는 보관된 완료 할 일
+        """
+        if section == 'a':
+            with self._session(session) as session:
+                return self._select_archived(session, user_id, filters, today, after, limit)
+
+        conditions = ['user_id = ?']
+        params = [today, today, today, user_id]
+        if section == 'c':
+            conditions.append("status = 'completed'")
+        elif filters['status'] != 'all':
+            conditions.append('status = ?')
+            params.append(filters['status'])
+        else:
+            conditions.append("status != 'completed'")
+
+        extra_conditions, extra_params = self.filter_conditions(filters, today)
+        conditions.extend(extra_conditions)
+        params.extend(extra_params)
+
+        order = 'ASC' if section == 'o' else 'DESC'
+        if after:
+            conditions.append(f"(due_date, id) {'>' if section == 'o' else '<'} (?, ?)")
+            params.extend(after)
+        params.append(limit)
+
+        with self._session(session) as session:
+            rows = session.execute(f'''
+                SELECT {', '.join(self.COLUMNS)},
+                       status != 'completed' AND due_date < ? AS is_overdue,
+                       status != 'completed' AND due_date = ? AS is_due_today,
+                       {self.backend.days_between_sql} AS days_left
+                FROM todos
+                WHERE {' AND '.join(conditions)}
+                ORDER BY due_date {order}, id {order}
+                LIMIT ?
+            ''', params).fetchall()
+
+        todos = []
+        for row in rows:
+            todo = dict(zip(self.COLUMNS, row))
+            todo.update({'is_overdue': bool(row[9]), 'is_due_today': bool(row[10]), 'days_left': row[11]})
+            todos.append(todo)
+        return todos
+
+    def _select_archived(self, session, user_id, filters, today, after, limit):
+        """보관된 완료 할 일을 완료 구간과 같은 순서(마감일, ID 내림차순)로 조회
+
+        사용자의 보관 묶음을 모두 풀어 필터/정렬하므로 완료 목록 끝까지 넘긴 경우에만 읽음
+        """
+        q = filters['q'].lower()
+        rows = []
+        for _, archived in read_archive(session, 'todo_archive', user_id):
+            for todo in archived:
+                if filters['priority'] != 'all' and todo['priority'] != filters['priority']:
+                    continue
+                if filters['category'] != 'all' and todo['category'] != filters['category']:
+                    continue
+                if q and q not in todo['title'].lower():
+                    continue
+                if after and (todo['due_date'], todo['id']) >= (after[0], after[1]):
+                    continue
+                rows.append(todo)
+        rows.sort(key=lambda todo: (todo['due_date'], todo['id']), reverse=True)
+
+        todos = []
+        for todo in rows[:limit]:
+            todo = {name: todo.get(name) for name in self.COLUMNS}
+            days_left = date.fromisoformat(todo['due_date'][:10]) - date.fromisoformat(today)
+            todo.update({'is_overdue': False, 'is_due_today': False, 'days_left': days_left.days, 'archived': True})
+            todos.append(todo)
+        return todos
+
+    def summary(self, user_id, today, roadmap_id=None, session=None):
+        """전체/완료/연체/오늘 마감 개수 (roadmap_id가 있으면 그 로드맵의 할 일만, 보관된 완료 할 일 포함)"""
+        with self._session(session) as session:
+            if self.backend.summary_tables:
+                counts = self._read_summary_table(session, user_id, today, roadmap_id)
+            else:
+                owner = 'user_id = ?' + (' AND roadmap_id = ?' if roadmap_id is not None else '')
+                owner_params = (user_id,) + ((roadmap_id,) if roadmap_id is not None else ())
+                row = session.execute(f'''
+                    SELECT COUNT(*),
+                           COUNT(*) FILTER (WHERE status = 'completed'),
+                           COUNT(*) FILTER (WHERE status != 'completed' AND due_date < ?),
+                           COUNT(*) FILTER (WHERE status != 'completed' AND due_date = ?)
+                    FROM todos WHERE {owner}
+                ''', (today, today) + owner_params).fetchone()
+                counts = dict(zip(('total', 'completed', 'overdue', 'due_today'), row))
+
+            if roadmap_id is None:
+                archived = session.execute(
+                    'SELECT COALESCE(SUM(completed), 0) FROM todo_archive_counts WHERE user_id = ?', (user_id,)
+                ).fetchone()[0]
+            else:
+                archived = session.execute(
+                    'SELECT COALESCE(SUM(completed), 0) FROM todo_archive_counts WHERE user_id = ? AND roadmap_id = ?',
+                    (user_id, roadmap_id)
+                ).fetchone()[0]
+        counts['total'] += archived
+        counts['completed'] += archived
+        return counts
+
+    @staticmethod
+    def _read_summary_table(session, user_id, today, roadmap_id):
+        """트리거로 유지되는 전체/완료 개수(기본 키 한 번) + 연체/오늘 마감 개수
+
+        연체/오늘 마감은 날짜에 따라 바뀌므로 저장하지 않고 미완료 부분 인덱스
+        (user_id, due_date)에서 오늘까지의 범위만 세어 읽기 트랜잭션이 쓰기를 하지 않음
+        """
+        if roadmap_id is None:
+            table, key, key_value, owner = 'todo_summary', 'user_id', user_id, 'user_id = ?'
+            owner_params = (user_id,)
+        else:
+            table, key, key_value, owner = 'roadmap_todo_summary', 'roadmap_id', roadmap_id, 'user_id = ? AND roadmap_id = ?'
+            owner_params = (user_id, roadmap_id)
+
+        row = session.execute(f'SELECT total, completed FROM {table} WHERE {key} = ?', (key_value,)).fetchone()
+        if row is None:
+            return {'total': 0, 'completed': 0, 'overdue': 0, 'due_today': 0}
+
+        due = session.execute(f'''
+            SELECT COALESCE(SUM(due_date < ?), 0), COALESCE(SUM(due_date = ?), 0)
+            FROM todos WHERE {owner} AND status != 'completed' AND due_date <= ?
+        ''', (today, today) + owner_params + (today,)).fetchone()
+        return dict(zip(('total', 'completed', 'overdue', 'due_today'), row + due))
+
+    def open_due_before(self, user_id, before, session=None):
+        """마감일이 before(YYYY-MM-DD) 이전인 미완료 할 일 (마감일 순)"""
+        with self._session(session) as session:
+            rows = session.execute('''
+                SELECT id, title, description, category, due_date FROM todos
+                WHERE user_id = ? AND status != 'completed' AND due_date < ?
+                ORDER BY due_date, id
+            ''', (user_id, before)).fetchall()
+        return [dict(zip(('id', 'title', 'description', 'category', 'due_date'), row)) for row in rows]
+
+    def create(self, user_id, fields, roadmap_id=None, session=None):
+        with self._session(session, write=True) as session:
+            bump_version(session, user_id, 'todos')
+            return session.insert('''
+                INSERT INTO todos (user_id, roadmap_id, title, description, due_date, priority, status, category, completed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                user_id, roadmap_id, fields['title'], fields.get('description', ''), fields['due_date'],
+                fields.get('priority', 'medium'), fields.get('status', 'pending'), fields.get('category', ''),
+                fields.get('completed_at')
+            ))
+
+    def update(self, user_id, target, fields, today, only_open=False, session=None):
+        """대상 할 일의 필드 변경 (only_open이면 미완료만), 변경된 행 수 반환"""
+        clause, params = self.target_clause(target, today)
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        extra = " AND status != 'completed'" if only_open else ''
+        with self._session(session, write=True) as session:
+            changed = session.execute(
+                f'UPDATE todos SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE user_id = ? AND {clause}{extra}',
+                list(fields.values()) + [user_id] + params
+            ).rowcount
+            if changed:
+                bump_version(session, user_id, 'todos')
+        return changed
+
+    def delete(self, user_id, target, today, session=None):
+        clause, params = self.target_clause(target, today)
+        if clause == '1 = 1':
+            raise ValueError('조건 없는 전체 삭제는 할 수 없습니다.')
+        with self._session(session, write=True) as session:
+            deleted = session.execute(f'DELETE FROM todos WHERE user_id = ? AND {clause}', [user_id] + params).rowcount
+            if deleted:
+                bump_version(session, user_id, 'todos')
+        return deleted
+
+    def reschedule(self, user_id, plan):
+        """{할 일 ID: 새 마감일}을 한 트랜잭션으로 반영"""
+        with self.backend.session(write=True) as session:
+            for todo_id, due_date in plan.items():
+                session.execute('''
+                    UPDATE todos SET due_date = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ? AND user_id = ?
+                ''', (due_date, todo_id, user_id))
+            bump_version(session, user_id, 'todos')
+
+
+class ChatRepository(_Repository):
+    def add(self, user_id, user_message, ai_response):
+        with self.backend.session(write=True) as session:
+            return session.insert('''
+                INSERT INTO chat_history (user_id, user_message, ai_response) VALUES (?, ?, ?)
+            ''', (user_id, user_message, ai_response))
+
+    def recent(self, user_id, limit=10, session=None):
+        """최근 대화 limit개 (오래된 것부터, 모자라면 보관된 대화에서 최근 달부터 이어서)"""
+        with self._session(session) as session:
+            rows = session.execute('''
+                SELECT user_message, ai_response, created_at FROM chat_history
+                WHERE user_id = ? ORDER BY id DESC LIMIT ?
+            ''', (user_id, limit)).fetchall()
+            history = [{'user_message': row[0], 'ai_response': row[1], 'created_at': row[2]} for row in rows]
+            if len(history) < limit:
+                for _, archived in read_archive(session, 'chat_archive', user_id):
+                    for turn in reversed(archived):
+                        history.append({name: turn[name] for name in ('user_message', 'ai_response', 'created_at')})
+                    if len(history) >= limit:
+                        break
+        return list(reversed(history[:limit]))
+
+
+class PolicyRepository(_Repository):
+    def sync(self, policies):
+        """카탈로그 정책의 ID/이름/기관/구분을 저장하고 카탈로그에서 빠진 정책은 비활성으로 표시
+
+        policies: [(정책 ID, 서비스명, 기관명, 구분)], 반환: 비활성으로 바뀐 정책 수
+        """
+        token = str(time.time())
+        with self.backend.session(write=True) as session:
+            for policy_id, name, agency, category in policies:
+                session.execute('''
+                    INSERT INTO policies (policy_id, name, agency, category, active, synced_at)
+                    VALUES (?, ?, ?, ?, 1, ?)
+                    ON CONFLICT (policy_id) DO UPDATE SET
+                        name = EXCLUDED.name, agency = EXCLUDED.agency, category = EXCLUDED.category,
+                        active = 1, synced_at = EXCLUDED.synced_at
+                ''', (policy_id, name, agency, category, token))
+            return session.execute(
+                'UPDATE policies SET active = 0 WHERE active = 1 AND (synced_at IS NULL OR synced_at != ?)', (token,)
+            ).rowcount
+
+
+class BookmarkRepository(_Repository):
+    COLUMNS = ('policy_id', 'name', 'agency', 'category', 'active', 'created_at')
+
+    def list(self, user_id):
+        """북마크한 정책 (최근 순), 카탈로그에서 빠진 정책은 active = 0"""
+        with self.backend.session() as session:
+            rows = session.execute('''
+                SELECT b.policy_id, p.name, p.agency, p.category, p.active, b.created_at
+                FROM policy_bookmarks b
+                JOIN policies p ON p.policy_id = b.policy_id
+                WHERE b.user_id = ?
+                ORDER BY b.created_at DESC, b.id DESC
+            ''', (user_id,)).fetchall()
+        return [dict(zip(self.COLUMNS, row)) for row in rows]
+
+    def ids(self, user_id):
+        with self.backend.session() as session:
+            rows = session.execute('SELECT policy_id FROM policy_bookmarks WHERE user_id = ?', (user_id,)).fetchall()
+        return {row[0] for row in rows}
+
+    def add(self, user_id, policy_id, name, agency='', category=''):
+        """이미 북마크한 정책이면 False (카탈로그 동기화 전이어도 정책 행을 먼저 만들어 둠)"""
+        with self.backend.session(write=True) as session:
+            session.execute('''
+                INSERT INTO policies (policy_id, name, agency, category) VALUES (?, ?, ?, ?)
+                ON CONFLICT (policy_id) DO NOTHING
+            ''', (policy_id, name, agency, category))
+            added = session.execute('''
+                INSERT INTO policy_bookmarks (user_id, policy_id) VALUES (?, ?)
+                ON CONFLICT (user_id, policy_id) DO NOTHING
+            ''', (user_id, policy_id)).rowcount > 0
+            if added:
+                bump_version(session, user_id, 'bookmarks')
+        return added
+
+    def remove(self, user_id, policy_id):
+        with self.backend.session(write=True) as session:
+            removed = session.execute(
+                'DELETE FROM policy_bookmarks WHERE user_id = ? AND policy_id = ?', (user_id, policy_id)
+            ).rowcount > 0
+            if removed:
+                bump_version(session, user_id, 'bookmarks')
+        return removed
+
+
+class VersionRepository(_Repository):
+    """사용자별 데이터 버전 카운터 (응답 ETag를 본문 해시 대신 이 값으로 계산)
+
+    할 일/북마크/프로필은 이 저장소의 쓰기 트랜잭션이 bump_version으로, 알림/추천은
+    로컬 SQLite의 트리거가 올림 (마이그레이션 7번)
+    """
+
+    def get(self, user_id, scopes):
+        """{범위: 버전}, 한 번도 바뀐 적 없는 범위는 0"""
+        scopes = list(scopes)
+        versions = dict.fromkeys(scopes, 0)
+        if not scopes:
+            return versions
+        with self.backend.session() as session:
+            rows = session.execute(
+                f"SELECT scope, version FROM data_versions WHERE user_id = ? AND scope IN ({','.join('?' * len(scopes))})",
+                [user_id] + scopes
+            ).fetchall()
+        versions.update(rows)
+        return versions
+
+
+class ArchiveRepository(_Repository):
+    """오래된 대화/완료한 할 일을 사용자-월 단위 압축 JSON 묶음으로 옮김
+
+    읽기는 ChatRepository.recent / TodoRepository.select_section('a')가 보관 테이블까지 이어서 처리
+    """
+
+    CHAT_COLUMNS = ('id', 'user_message', 'ai_response', 'created_at')
+    TODO_COLUMNS = TodoRepository.COLUMNS + ('roadmap_id', 'updated_at')
+    # 완료 시각이 비어 있는 예전 행은 마지막 변경 시각 기준
+    TODO_FINISHED_AT = 'COALESCE(completed_at, updated_at, created_at)'
+
+    def chat_users(self, cutoff):
+        """cutoff(YYYY-MM-DD) 이전 대화가 남아 있는 사용자별 행 수"""
+        with self.backend.session() as session:
+            rows = session.execute(
+                'SELECT user_id, COUNT(*) FROM chat_history WHERE created_at < ? GROUP BY user_id', (cutoff,)
+            ).fetchall()
+        return dict(rows)
+
+    def todo_users(self, cutoff):
+        """cutoff 이전에 완료한 할 일이 남아 있는 사용자별 행 수"""
+        with self.backend.session() as session:
+            rows = session.execute(f'''
+                SELECT user_id, COUNT(*) FROM todos
+                WHERE status = 'completed' AND {self.TODO_FINISHED_AT} < ?
+                GROUP BY user_id
+            ''', (cutoff,)).fetchall()
+        return dict(rows)
+
+    def archive_chat(self, user_id, cutoff, codec='zlib'):
+        """사용자 한 명의 cutoff 이전 대화를 보관 테이블로 옮김 (한 트랜잭션), (옮긴 행 수, 원본 바이트, 압축 바이트)"""
+        with self.backend.session(write=True) as session:
+            rows = session.execute(f'''
+                SELECT {', '.join(self.CHAT_COLUMNS)} FROM chat_history
+                WHERE user_id = ? AND created_at < ? ORDER BY id
+            ''', (user_id, cutoff)).fetchall()
+            if not rows:
+                return 0, 0, 0
+            raw_bytes, stored_bytes = self._store(session, 'chat_archive', user_id,
+                                                  [dict(zip(self.CHAT_COLUMNS, row)) for row in rows], codec)
+            session.execute('DELETE FROM chat_history WHERE user_id = ? AND created_at < ?', (user_id, cutoff))
+        return len(rows), raw_bytes, stored_bytes
+
+    def archive_todos(self, user_id, cutoff, codec='zlib'):
+        """사용자 한 명의 cutoff 이전 완료 할 일을 보관 (요약 트리거가 빠진 만큼 빼고, 보관 개수에 더함)"""
+        condition = f"user_id = ? AND status = 'completed' AND {self.TODO_FINISHED_AT} < ?"
+        with self.backend.session(write=True) as session:
+            rows = session.execute(
+                f"SELECT {', '.join(self.TODO_COLUMNS)} FROM todos WHERE {condition} ORDER BY id", (user_id, cutoff)
+            ).fetchall()
+            if not rows:
+                return 0, 0, 0
+            todos = [dict(zip(self.TODO_COLUMNS, row)) for row in rows]
+            raw_bytes, stored_bytes = self._store(session, 'todo_archive', user_id, todos, codec)
+
+            per_roadmap = {}
+            for todo in todos:
+                per_roadmap[todo['roadmap_id'] or 0] = per_roadmap.get(todo['roadmap_id'] or 0, 0) + 1
+            for roadmap_id, count in per_roadmap.items():
+                session.execute('''
+                    INSERT INTO todo_archive_counts (user_id, roadmap_id, completed) VALUES (?, ?, ?)
+                    ON CONFLICT (user_id, roadmap_id)
+                    DO UPDATE SET completed = todo_archive_counts.completed + EXCLUDED.completed
+                ''', (user_id, roadmap_id, count))
+            session.execute(f'DELETE FROM todos WHERE {condition}', (user_id, cutoff))
+            bump_version(session, user_id, 'todos')
+        return len(rows), raw_bytes, stored_bytes
+
+    def _store(self, session, table, user_id, rows, codec):
+        """행을 월별로 나눠 기존 묶음에 합쳐 저장, (원본 JSON 바이트, 압축 바이트)"""
+        by_month = {}
+        for row in rows:
+            stamp = row.get('completed_at') or row.get('updated_at') or row['created_at']
+            by_month.setdefault(stamp[:7], []).append(row)
+
+        raw_bytes = stored_bytes = 0
+        for month, month_rows in by_month.items():
+            existing = session.execute(
+                f'SELECT codec, payload FROM {table} WHERE user_id = ? AND month = ?', (user_id, month)
+            ).fetchone()
+            if existing:
+                # 같은 달이 이미 보관돼 있으면 (보관 기준일이 달 중간이었던 경우 등) 합쳐서 다시 압축
+                merged = {row['id']: row for row in decompress_rows(*existing)}
+                merged.update((row['id'], row) for row in month_rows)
+                month_rows = [merged[row_id] for row_id in sorted(merged)]
+            payload = compress_rows(month_rows, codec)
+            raw_bytes += len(json.dumps(month_rows, ensure_ascii=False).encode('utf-8'))
+            stored_bytes += len(payload)
+            session.execute(f'''
+                INSERT INTO {table} (user_id, month, codec, row_count, payload) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, month) DO UPDATE SET
+                    codec = EXCLUDED.codec, row_count = EXCLUDED.row_count,
+                    payload = EXCLUDED.payload, archived_at = CURRENT_TIMESTAMP
+            ''', (user_id, month, codec, len(month_rows), payload))
+        return raw_bytes, stored_bytes
+
+
+class Storage:
+    """백엔드 하나를 공유하는 리포지토리 묶음
+
+    여러 리포지토리 호출을 한 트랜잭션으로 묶을 때는 transaction()의 세션을 session=으로 넘김
+    (읽기만 묶을 때는 snapshot(): 연결 하나로 같은 시점의 데이터를 읽음)
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.users = UserRepository(backend)
+        self.profiles = ProfileRepository(backend)
+        self.roadmaps = RoadmapRepository(backend)
+        self.todos = TodoRepository(backend)
+        self.chat = ChatRepository(backend)
+        self.archive = ArchiveRepository(backend)
+        self.policies = PolicyRepository(backend)
+        self.bookmarks = BookmarkRepository(backend)
+        self.versions = VersionRepository(backend)
+
+    def transaction(self):
+        return self.backend.session(write=True)
+
+    def snapshot(self):
+        return self.backend.session()
+
+    def init_schema(self):
+        self.backend.init_schema()
+
+
+def create_storage(backend=None):
+    """환경 변수 설정으로 저장소 생성 (STORAGE_BACKEND, DATABASE_URL, DB_POOL_SIZE, DB_PREPARE)"""
+    backend = (backend or os.getenv('STORAGE_BACKEND') or 'sqlite').lower()
+    if backend == 'sqlite':
+        return Storage(SQLiteBackend('database/iruda.db'))
+    if backend == 'postgres':
+        dsn = os.getenv('DATABASE_URL')
+        if not dsn:
+            raise RuntimeError('STORAGE_BACKEND=postgres에는 DATABASE_URL이 필요합니다.')
+        return Storage(PostgresBackend(
+            dsn,
+            max_connections=int(os.getenv('DB_POOL_SIZE', 10)),
+            prepare=os.getenv('DB_PREPARE', 'true').lower() != 'false'
+        ))
+    raise ValueError(f"지원하지 않는 저장소입니다: {backend} (가능: {', '.join(STORAGE_BACKENDS)})")
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['init-schema']:
+        storage = create_storage()
+        storage.init_schema()
+        print(f"✅ 스키마 적용 완료: {storage.backend.describe()}")
+    else:
+        print('사용법: python storage.py init-schema')